@@ -0,0 +1,148 @@
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import GMATExam, GMATQuestion
+from . import snapshots
+
+# Rasch difficulty offset per module difficulty; a question's weight shifts it by log(weight)
+DIFFICULTY_OFFSETS = {'easy': -1.0, 'medium': 0.0, 'standard': 0.0, 'hard': 1.0}
+ABILITY_RANGE = (-4.0, 4.0)
+SESSION_TIMEOUT = 4 * 60 * 60
+MAX_POOLS = 32
+
+# Shared by the threads of a worker process; loading happens outside the lock
+_pools = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+class ItemPool:
+    """Questions of one exam held in arrays sorted by difficulty."""
+
+    def __init__(self, ids, difficulties, correct_answers):
+        order = np.argsort(difficulties, kind='stable')
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.difficulties = np.asarray(difficulties, dtype=np.float64)[order]
+        self.correct_answers = [correct_answers[index] for index in order]
+        self.positions = {int(question_id): position for position, question_id in enumerate(self.ids)}
+
+    @classmethod
+    def load(cls, exam_id):
+        rows = GMATQuestion.objects.filter(module__section__exam_id=exam_id).values_list(
+            'id', 'weight', 'correct_answer', 'module__difficulty'
+        )
+        ids, difficulties, correct_answers = [], [], []
+        for question_id, weight, correct_answer, module_difficulty in rows:
+            ids.append(question_id)
+            difficulties.append(DIFFICULTY_OFFSETS.get(module_difficulty, 0.0) + math.log(max(weight, 1e-6)))
+            correct_answers.append(correct_answer)
+        return cls(ids, difficulties, correct_answers)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, question_id):
+        return question_id in self.positions
+
+    def difficulty(self, question_id):
+        return float(self.difficulties[self.positions[question_id]])
+
+    def is_correct(self, question_id, answer):
+        return answer == self.correct_answers[self.positions[question_id]]
+
+    def next_item(self, ability, answered):
+        """Return the unanswered question whose difficulty is closest to ``ability``.
+
+        Under the Rasch model that is the most informative item; a binary search finds the
+        starting point and the scan widens outwards past already answered questions.
+        """
+        size = len(self.ids)
+        high = int(np.searchsorted(self.difficulties, ability))
+        low = high - 1
+        while low >= 0 or high < size:
+            if high >= size or (low >= 0 and ability - self.difficulties[low] <= self.difficulties[high] - ability):
+                candidate, low = low, low - 1
+            else:
+                candidate, high = high, high + 1
+            question_id = int(self.ids[candidate])
+            if question_id not in answered:
+                return question_id
+        return None
+
+
+def get_pool(exam_id):
+    # Keyed by the exam's content version, so edits to its questions load a fresh pool
+    key = (exam_id, snapshots.current_version(GMATExam, exam_id))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            _pools.move_to_end(key)
+            return pool
+
+    pool = ItemPool.load(exam_id)
+    with _pools_lock:
+        _pools[key] = pool
+        while len(_pools) > MAX_POOLS:
+            _pools.popitem(last=False)
+    return pool
+
+
+def estimate_ability(responses):
+    """MAP ability estimate under the Rasch model with a standard normal prior."""
+    if not responses:
+        return 0.0
+    difficulties = np.array([difficulty for difficulty, _ in responses])
+    outcomes = np.array([1.0 if correct else 0.0 for _, correct in responses])
+    ability = 0.0
+    for _ in range(20):
+        p = 1.0 / (1.0 + np.exp(difficulties - ability))
+        gradient = np.sum(outcomes - p) - ability
+        curvature = -np.sum(p * (1.0 - p)) - 1.0
+        step = gradient / curvature
+        ability = float(np.clip(ability - step, *ABILITY_RANGE))
+        if abs(step) < 1e-4:
+            break
+    return ability
+
+
+class AdaptiveSession:
+    """Per-candidate CAT state kept in the cache; nothing is written to shared question rows."""
+
+    def __init__(self, exam_id, user_id, state=None):
+        self.exam_id = exam_id
+        self.user_id = user_id
+        state = state or {}
+        self.ability = state.get('ability', 0.0)
+        # question id -> [difficulty, correct]
+        self.responses = state.get('responses', {})
+        self.changes_made = state.get('changes_made', 0)
+
+    @staticmethod
+    def cache_key(exam_id, user_id):
+        return f"gmat-cat:{exam_id}:{user_id}"
+
+    @classmethod
+    def load(cls, exam_id, user_id):
+        return cls(exam_id, user_id, cache.get(cls.cache_key(exam_id, user_id)))
+
+    @classmethod
+    def reset(cls, exam_id, user_id):
+        """Forget an earlier sitting, so a new session starts from the prior ability with no answers."""
+        cache.delete(cls.cache_key(exam_id, user_id))
+
+    def save(self):
+        cache.set(self.cache_key(self.exam_id, self.user_id), {
+            'ability': self.ability,
+            'responses': self.responses,
+            'changes_made': self.changes_made,
+        }, SESSION_TIMEOUT)
+
+    def record(self, pool, question_id, answer):
+        self.responses[question_id] = [pool.difficulty(question_id), pool.is_correct(question_id, answer)]
+        self.ability = estimate_ability(self.responses.values())
+
+    def next_question_id(self, pool):
+        return pool.next_item(self.ability, self.responses)
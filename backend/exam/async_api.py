@@ -0,0 +1,61 @@
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+
+def authenticate(request):
+    """Return the JWT user of a plain Django request, or None.
+
+    EventSource cannot set headers, so the access token may also come as ``?token=``.
+    """
+    authentication = JWTAuthentication()
+    try:
+        result = authentication.authenticate(request)
+        if result is None and request.GET.get('token'):
+            token = authentication.get_validated_token(request.GET['token'])
+            result = authentication.get_user(token), token
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
+
+def async_api_view(methods, login_required=True):
+    """Decorate an async view with DRF-like method checks, JWT authentication and JSON errors.
+
+    DRF views are synchronous, so the async hot-path views are plain Django views. They set
+    ``request.data`` from a JSON or form body and return ``JsonResponse``.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+            user = await sync_to_async(authenticate)(request)
+            if user is None and login_required:
+                return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+            request.user = user or AnonymousUser()
+
+            request.data = request.POST
+            if request.content_type == 'application/json' and request.body:
+                try:
+                    request.data = json.loads(request.body)
+                except ValueError:
+                    return JsonResponse({"detail": "JSON parse error"}, status=400)
+
+            try:
+                return await view(request, *args, **kwargs)
+            except Http404:
+                return JsonResponse({"detail": "Not found."}, status=404)
+
+        # Token-authenticated like the DRF views, which are exempt from CSRF checks too
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
@@ -0,0 +1,140 @@
+import queue
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Activity, BaseSection, BaseModule, BaseQuestion
+
+_local = threading.local()
+_flusher = None
+
+
+def describe(instance):
+    # The abstract bases format from the row's own fields; the concrete __str__ methods walk FKs
+    for base in (BaseSection, BaseModule, BaseQuestion):
+        if isinstance(instance, base):
+            return base.__str__(instance)
+    return str(instance)
+
+
+def write(activities):
+    if activities:
+        Activity.objects.bulk_create(activities)
+
+
+def write_one(activity):
+    write([activity])
+
+
+def record(action, details, model_name=''):
+    """Queue an Activity row; it is only kept if the surrounding transaction commits."""
+    activity = Activity(action=action, model_name=model_name, details=details, timestamp=timezone.now())
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is not None:
+        sink = buffer.append
+    elif _flusher is not None:
+        sink = _flusher.put
+    else:
+        sink = write_one
+    transaction.on_commit(partial(sink, activity))
+
+
+@contextmanager
+def buffered():
+    """Collect every Activity recorded inside the block and write them with one INSERT.
+
+    The write is itself deferred to commit, so it runs after the records' own on_commit hooks.
+    """
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is not None:
+        yield buffer
+        return
+
+    buffer = _local.buffer = []
+    try:
+        yield buffer
+    finally:
+        _local.buffer = None
+        transaction.on_commit(partial(write, buffer))
+
+
+class AuditBufferMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered():
+            return self.get_response(request)
+
+
+class BackgroundFlusher:
+    """Drains recorded activities from a bounded queue on a worker thread.
+
+    When the queue is full the producer blocks for up to ``put_timeout`` seconds and then
+    writes the backlog itself, so a slow database slows producers instead of growing memory.
+    """
+
+    def __init__(self, interval=1.0, max_queue=10000, batch_size=1000, put_timeout=1.0):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def put(self, activity):
+        try:
+            self.queue.put(activity, timeout=self.put_timeout)
+        except queue.Full:
+            self.flush(extra=[activity])
+
+    def drain(self):
+        activities = []
+        while len(activities) < self.batch_size:
+            try:
+                activities.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return activities
+
+    def flush(self, extra=()):
+        with self.lock:
+            activities = list(extra) + self.drain()
+            while activities:
+                write(activities)
+                activities = self.drain()
+
+    def run(self):
+        try:
+            while not self.stopping.wait(self.interval):
+                self.flush()
+        finally:
+            connection.close()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='activity-flusher', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+
+
+@contextmanager
+def background_flusher(**options):
+    """Route activities recorded outside a request to a background flusher, e.g. in long jobs."""
+    global _flusher
+    flusher = BackgroundFlusher(**options)
+    flusher.start()
+    previous, _flusher = _flusher, flusher
+    try:
+        yield flusher
+    finally:
+        _flusher = previous
+        flusher.stop()
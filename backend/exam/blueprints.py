@@ -0,0 +1,152 @@
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SATExam, GREExam, GMATExam, IELTSExam
+from . import counters
+
+SectionBlueprint = namedtuple('SectionBlueprint', ['name', 'modules'])
+ModuleBlueprint = namedtuple('ModuleBlueprint', ['name', 'duration', 'question_count', 'difficulty'])
+
+# Default structure stamped out by create_structure, keyed by BaseExam.exam_type
+BLUEPRINTS = {
+    'sat': [
+        SectionBlueprint('verbal', [
+            ModuleBlueprint('reading_standard', 32, 27, 'standard'),
+            ModuleBlueprint('writing_standard', 32, 27, 'standard'),
+        ]),
+        SectionBlueprint('math', [
+            ModuleBlueprint('math1_standard', 35, 22, 'standard'),
+            ModuleBlueprint('math2_standard', 35, 22, 'standard'),
+        ]),
+    ],
+    'gre': [
+        SectionBlueprint('verbal', [
+            ModuleBlueprint('verbal1_standard', 18, 12, 'standard'),
+            ModuleBlueprint('verbal2_standard', 23, 15, 'standard'),
+        ]),
+        SectionBlueprint('math', [
+            ModuleBlueprint('math1_standard', 21, 22, 'standard'),
+            ModuleBlueprint('math2_standard', 26, 22, 'standard'),
+        ]),
+    ],
+    'gmat': [
+        SectionBlueprint('verbal', [ModuleBlueprint('Verbal', 45, 23, 'standard')]),
+        SectionBlueprint('quant', [ModuleBlueprint('Quantitative', 45, 21, 'standard')]),
+        SectionBlueprint('di', [ModuleBlueprint('Data Interpretation', 45, 20, 'standard')]),
+    ],
+    'ielts': [
+        SectionBlueprint('listening', [ModuleBlueprint('Listening_standard', 60, 40, 'standard')]),
+        SectionBlueprint('reading', [ModuleBlueprint('Reading_standard', 60, 40, 'standard')]),
+        SectionBlueprint('writing', [ModuleBlueprint('Writing_standard', 60, 40, 'standard')]),
+        SectionBlueprint('speaking', [ModuleBlueprint('Speaking_standard', 60, 40, 'standard')]),
+    ],
+}
+
+EXAM_MODELS = {
+    'sat': SATExam,
+    'gre': GREExam,
+    'gmat': GMATExam,
+    'ielts': IELTSExam,
+}
+
+QUESTION_BATCH_SIZE = 1000
+
+
+def tree_models(exam_model):
+    """Return the (section, module, question) models that hang off an exam model."""
+    section_model = exam_model.sections.rel.related_model
+    module_model = section_model.modules.rel.related_model
+    question_model = module_model.questions.rel.related_model
+    return section_model, module_model, question_model
+
+
+def _copy(instance, **overrides):
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if not field.primary_key
+    }
+    values.update(overrides)
+    return type(instance)(**values)
+
+
+def _materialize(exams, blueprint):
+    section_model, module_model, _ = tree_models(type(exams[0]))
+
+    sections = section_model.objects.bulk_create([
+        section_model(exam=exam, name=section.name, order=order)
+        for exam in exams
+        for order, section in enumerate(blueprint, start=1)
+    ])
+
+    # bulk_create returns sections in input order, so they line up with the blueprint again
+    section_blueprints = blueprint * len(exams)
+    module_model.objects.bulk_create([
+        module_model(
+            section=section,
+            name=module.name,
+            duration=module.duration,
+            question_count=module.question_count,
+            difficulty=module.difficulty,
+            order=order,
+        )
+        for section, section_blueprint in zip(sections, section_blueprints)
+        for order, module in enumerate(section_blueprint.modules, start=1)
+    ])
+
+
+def build_structure(exam, blueprint=None):
+    """Create the sections and modules of ``exam`` from a blueprint in one transaction."""
+    with transaction.atomic():
+        _materialize([exam], blueprint or BLUEPRINTS[exam.exam_type])
+
+
+def provision_exams(exam_model, names, blueprint=None):
+    """Create one exam per name, each with the full blueprint structure, in three INSERTs."""
+    names = list(names)
+    if not names:
+        return []
+
+    with transaction.atomic():
+        exams = exam_model.objects.bulk_create([exam_model(name=name) for name in names])
+        _materialize(exams, blueprint or BLUEPRINTS[exams[0].exam_type])
+        counters.increment(exam_model, len(exams))
+    return exams
+
+
+def clone_exam(exam, name=None):
+    """Copy an exam with all of its sections, modules and questions, one query per level."""
+    exam_model = type(exam)
+    section_model, module_model, question_model = tree_models(exam_model)
+
+    with transaction.atomic():
+        clone = _copy(exam, name=name or f"{exam.name} (copy)", created_at=timezone.now())
+        clone.save()
+
+        sections = list(section_model.objects.filter(exam=exam).order_by('order', 'id'))
+        new_sections = section_model.objects.bulk_create([
+            _copy(section, exam_id=clone.pk) for section in sections
+        ])
+        section_map = {old.pk: new.pk for old, new in zip(sections, new_sections)}
+
+        modules = list(module_model.objects.filter(section__exam=exam).order_by('order', 'id'))
+        new_modules = module_model.objects.bulk_create([
+            _copy(module, section_id=section_map[module.section_id]) for module in modules
+        ])
+        module_map = {old.pk: new.pk for old, new in zip(modules, new_modules)}
+
+        # Questions are read and inserted a chunk at a time, so a large bank is never held in memory at once
+        copied = 0
+        batch = []
+        questions = question_model.objects.filter(module__section__exam=exam).order_by('id')
+        for question in questions.iterator(chunk_size=QUESTION_BATCH_SIZE):
+            batch.append(_copy(question, module_id=module_map[question.module_id]))
+            if len(batch) >= QUESTION_BATCH_SIZE:
+                copied += len(question_model.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            copied += len(question_model.objects.bulk_create(batch))
+        counters.apply({exam_model._meta.label: 1, question_model._meta.label: copied})
+    return clone
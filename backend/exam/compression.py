@@ -0,0 +1,142 @@
+import gzip
+import secrets
+import string
+import struct
+from collections import namedtuple
+
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bodies below this size are sent as they are; compressing them saves less than the headers cost
+MIN_SIZE = 1024
+COMPRESSIBLE_TYPES = ('application/json', 'application/msgpack', 'text/')
+# Up to this many random bytes pad every response the middleware compresses, as GZipMiddleware
+# does against BREACH: a response that reflects request input next to a secret no longer leaks
+# the secret through its compressed length
+MAX_RANDOM_BYTES = 100
+PADDING_CHARS = (string.ascii_letters + string.digits).encode()
+
+# ``level`` for responses compressed on every request, ``snapshot_level`` for cached exam snapshots,
+# which are compressed once per content version and can afford the slower, denser setting.
+# ``pad`` adds random bytes that decoders skip to a compressed body; None where the format has no room
+Codec = namedtuple('Codec', ['compress', 'level', 'snapshot_level', 'pad'])
+
+
+def random_padding(max_bytes):
+    return bytes(secrets.choice(PADDING_CHARS) for _ in range(secrets.randbelow(max_bytes) + 1))
+
+
+def pad_gzip(compressed, max_bytes):
+    # A file name in the member header, as django.utils.text.compress_string(max_random_bytes=...)
+    header = bytearray(compressed[:10])
+    header[3] |= gzip.FNAME
+    return bytes(header) + random_padding(max_bytes) + b'\0' + compressed[10:]
+
+
+def pad_zstd(compressed, max_bytes):
+    # A skippable frame after the data frame (RFC 8878, 3.1.2)
+    padding = random_padding(max_bytes)
+    return compressed + struct.pack('<II', 0x184D2A50, len(padding)) + padding
+
+
+# In order of preference when a client accepts several equally
+CODECS = {}
+if zstandard is not None:
+    CODECS['zstd'] = Codec(lambda body, level: zstandard.ZstdCompressor(level=level).compress(body), 3, 12, pad_zstd)
+if brotli is not None:
+    CODECS['br'] = Codec(lambda body, level: brotli.compress(body, quality=level), 4, 9, None)
+CODECS['gzip'] = Codec(lambda body, level: gzip.compress(body, compresslevel=level, mtime=0), 6, 9, pad_gzip)
+
+# Brotli streams can't carry padding, so it is kept to the cached snapshots, which hold no secrets
+PADDED_CODECS = {encoding: codec for encoding, codec in CODECS.items() if codec.pad is not None}
+
+
+def accepted_encodings(header):
+    """``{coding: q}`` from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate(header, codecs=CODECS):
+    """The encoding in ``codecs`` the client prefers, or None to send the body as it is."""
+    accepted = accepted_encodings(header or '')
+    best, best_quality = None, 0.0
+    for encoding in codecs:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body, encoding, snapshot=False):
+    """``body`` compressed with ``encoding``; only snapshots, which are public exam content, go unpadded."""
+    codec = CODECS[encoding]
+    if snapshot:
+        return codec.compress(body, codec.snapshot_level)
+    return codec.pad(codec.compress(body, codec.level), MAX_RANDOM_BYTES)
+
+
+def encoded_etag(etag, suffix):
+    """A distinct ETag per representation: '"abc"' -> '"abc-gzip"'."""
+    return f'{etag[:-1]}-{suffix}"'
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress API responses with the best of zstd, brotli and gzip the client accepts.
+
+    Like django.middleware.gzip.GZipMiddleware, with zstd when its package is installed, and like it
+    pads each body with random bytes and weakens the ETag, as the bytes differ on every request.
+    Streaming responses (the session event streams) and responses that are already encoded, such
+    as pre-compressed exam snapshots, pass through untouched.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding') or not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < MIN_SIZE:
+            return response
+
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING'), PADDED_CODECS)
+        if encoding is None:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + encoded_etag(etag, encoding)
+        return response
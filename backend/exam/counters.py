@@ -0,0 +1,74 @@
+from django.db.models import Count, F
+
+from .models import (
+    ExamCounter, Question,
+    SATExam, SATQuestion,
+    GREExam, GREQuestion,
+    GMATExam, GMATQuestion,
+    IELTSExam, IELTSQuestion,
+)
+
+EXAM_MODELS = {'SAT': SATExam, 'GRE': GREExam, 'GMAT': GMATExam, 'IELTS': IELTSExam}
+QUESTION_MODELS = {'SAT': SATQuestion, 'GRE': GREQuestion, 'GMAT': GMATQuestion, 'IELTS': IELTSQuestion}
+COUNTED_LABELS = {model._meta.label for model in [*EXAM_MODELS.values(), *QUESTION_MODELS.values()]}
+
+
+def apply(deltas):
+    """Add ``{model label: delta}`` to the stored row counts; untracked labels are ignored."""
+    for label, delta in deltas.items():
+        if label not in COUNTED_LABELS or not delta:
+            continue
+        if not ExamCounter.objects.filter(key=label).update(value=F('value') + delta):
+            counter, created = ExamCounter.objects.get_or_create(key=label, defaults={'value': delta})
+            if not created:
+                ExamCounter.objects.filter(key=label).update(value=F('value') + delta)
+
+
+def increment(model, amount=1):
+    apply({model._meta.label: amount})
+
+
+def read():
+    values = dict(ExamCounter.objects.filter(key__in=COUNTED_LABELS).values_list('key', 'value'))
+    return {
+        'exam_counts': {name: values.get(model._meta.label, 0) for name, model in EXAM_MODELS.items()},
+        'total_questions': sum(values.get(model._meta.label, 0) for model in QUESTION_MODELS.values()),
+    }
+
+
+def reconcile():
+    """Recount every tracked table and overwrite the stored values; returns the corrected counts."""
+    counts = {model._meta.label: model.objects.count() for model in EXAM_MODELS.values()}
+    # Question totals for every exam type in one grouped query over the unified view
+    per_type = dict(
+        Question.objects.values('exam_type').annotate(count=Count('uid')).order_by().values_list('exam_type', 'count')
+    )
+    for name, model in QUESTION_MODELS.items():
+        counts[model._meta.label] = per_type.get(name.lower(), 0)
+    for label, value in counts.items():
+        ExamCounter.objects.update_or_create(key=label, defaults={'value': value})
+    return counts
+
+
+def exam_breakdown(exam_type, exam_id):
+    """Questions per section and per module difficulty for one exam, from one grouped query."""
+    rows = (
+        Question.objects.filter(exam_type=exam_type.lower(), exam_id=exam_id)
+        .values('section_id', 'section_name', 'module_difficulty')
+        .annotate(count=Count('uid'))
+        .order_by()
+    )
+    sections = {}
+    difficulties = {}
+    for row in rows:
+        section = sections.setdefault(row['section_id'], {
+            'id': row['section_id'],
+            'name': row['section_name'],
+            'questions': 0,
+        })
+        section['questions'] += row['count']
+        difficulties[row['module_difficulty']] = difficulties.get(row['module_difficulty'], 0) + row['count']
+    return {
+        'questions_per_section': sorted(sections.values(), key=lambda section: section['id']),
+        'difficulty_distribution': difficulties,
+    }
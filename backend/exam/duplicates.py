@@ -0,0 +1,293 @@
+import hashlib
+import re
+import zlib
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .models import (
+    DuplicatePair, Question, QuestionBand, QuestionSignature,
+    SATQuestion, GREQuestion, GMATQuestion, IELTSQuestion,
+)
+
+QUESTION_MODELS = {'sat': SATQuestion, 'gre': GREQuestion, 'gmat': GMATQuestion, 'ielts': IELTSQuestion}
+EXAM_TYPES = {model: exam_type for exam_type, model in QUESTION_MODELS.items()}
+
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 120
+# 20 bands of 6 rows: a pair at 0.8 Jaccard shares a bucket with ~99.8% probability, one at 0.3 with ~1.5%
+BANDS = 20
+ROWS = NUM_PERMUTATIONS // BANDS
+SIMILARITY_THRESHOLD = 0.8
+# Verified candidates per lookup, most shared buckets first, so heavily duplicated text stays cheap
+MAX_CANDIDATES = 200
+BUCKET_CHUNK = 2000
+
+# Hash functions (a * x + b) mod p over 32-bit shingle hashes, p being the smallest prime above 2**32.
+# Legacy RandomState streams are frozen, so signatures stay comparable across processes and numpy
+# versions; changing any of these constants requires `find_duplicates --rebuild`.
+PRIME = 4294967311
+_random = np.random.RandomState(1729)
+A = _random.randint(1, 2 ** 32, NUM_PERMUTATIONS, dtype=np.uint64)
+B = _random.randint(0, 2 ** 32, NUM_PERMUTATIONS, dtype=np.uint64)
+
+WORD = re.compile(r'\w+')
+
+
+def shingles(content):
+    words = WORD.findall(content.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[index:index + SHINGLE_SIZE]) for index in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def signature(content):
+    """MinHash signature of the word shingles of ``content`` as a uint64 array, or None when it has no words."""
+    tokens = shingles(content or '')
+    if not tokens:
+        return None
+    hashes = np.fromiter((zlib.crc32(token.encode()) for token in tokens), dtype=np.uint64, count=len(tokens))
+    # Both factors are below 2**32, so the products and sums cannot overflow uint64
+    return ((np.outer(hashes, A) + B) % PRIME).min(axis=0)
+
+
+def buckets(values):
+    """One signed 64-bit bucket per band, salted with the band number so one column indexes all bands."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(bytes([band]) + values[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+            'big', signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(first == second))
+
+
+def question_similarity(first, second):
+    """Similarity of two ``(text, passage)`` signature pairs: the lower of the text and passage scores.
+
+    The text and passage are compared separately because a passage is usually far longer than the
+    question and would otherwise dominate the shingles, making every question of a reading set look
+    like a duplicate of its siblings. Questions without a passage only match each other.
+    """
+    (text, passage), (other_text, other_passage) = first, second
+    if passage is None or other_passage is None:
+        passages = 1.0 if passage is None and other_passage is None else 0.0
+    else:
+        passages = similarity(passage, other_passage)
+    return min(similarity(text, other_text), passages)
+
+
+def question_uid(question):
+    return f'{EXAM_TYPES[type(question)]}:{question.pk}'
+
+
+def uid_filter(uids):
+    """A Question filter for ``uids`` on (exam_type, question_id), which each branch of the view serves by its key.
+
+    The computed uid column has no index, so filtering on it scans every question table.
+    """
+    question_ids = defaultdict(list)
+    for uid in uids:
+        exam_type, _, question_id = uid.partition(':')
+        question_ids[exam_type].append(int(question_id))
+    condition = Q(pk__in=[])
+    for exam_type, ids in question_ids.items():
+        condition |= Q(exam_type=exam_type, question_id__in=ids)
+    return condition
+
+
+def from_bytes(value):
+    return None if value is None else np.frombuffer(bytes(value), dtype=np.uint64)
+
+
+def load_signatures(uids):
+    """``{uid: (text signature, passage signature or None)}`` of indexed questions."""
+    rows = QuestionSignature.objects.filter(uid__in=uids).values_list('uid', 'signature', 'passage_signature')
+    return {uid: (from_bytes(text), from_bytes(passage)) for uid, text, passage in rows}
+
+
+def candidates(bucket_sets, extra=None):
+    """Return ``{key: [candidate uid, ...]}`` for ``{key: buckets}`` from one indexed lookup per chunk.
+
+    ``extra`` maps buckets to uids not yet stored, such as the rest of a batch being indexed.
+    """
+    wanted = list({bucket for bucket_set in bucket_sets.values() for bucket in bucket_set})
+    members = defaultdict(set)
+    for start in range(0, len(wanted), BUCKET_CHUNK):
+        rows = QuestionBand.objects.filter(bucket__in=wanted[start:start + BUCKET_CHUNK])
+        for bucket, uid in rows.values_list('bucket', 'signature_id'):
+            members[bucket].add(uid)
+    for bucket, uids in (extra or {}).items():
+        members[bucket].update(uids)
+
+    found = {}
+    for key, bucket_set in bucket_sets.items():
+        shared = Counter(uid for bucket in bucket_set for uid in members.get(bucket, ()) if uid != key)
+        found[key] = [uid for uid, _ in shared.most_common(MAX_CANDIDATES)]
+    return found
+
+
+def index_questions(questions):
+    """Add or refresh questions in the LSH index and record their duplicates; returns the new pairs.
+
+    Only the question text is banded, so candidates are questions asking much the same thing; their
+    passages are then compared to tell a repeated question from a standard stem on another passage.
+    """
+    signatures = {}
+    passage_signatures = {}
+    for question in questions:
+        values = signature(question.text)
+        if values is not None:
+            uid = question_uid(question)
+            signatures[uid] = (question, values)
+            # Shared passages are stored once, so siblings reuse one signature
+            if question.passage_id not in passage_signatures:
+                passage_signatures[question.passage_id] = signature(question.passage.text) if question.passage_id else None
+
+    with transaction.atomic():
+        # Cascades to the old bands and pairs of edited questions
+        QuestionSignature.objects.filter(uid__in=[question_uid(question) for question in questions]).delete()
+        if not signatures:
+            return []
+
+        bucket_sets = {uid: buckets(values) for uid, (_, values) in signatures.items()}
+        batch_members = defaultdict(set)
+        for uid, bucket_set in bucket_sets.items():
+            for bucket in bucket_set:
+                batch_members[bucket].add(uid)
+        found = candidates(bucket_sets, batch_members)
+
+        stored = load_signatures({uid for uids in found.values() for uid in uids if uid not in signatures})
+        stored.update({
+            uid: (values, passage_signatures[question.passage_id]) for uid, (question, values) in signatures.items()
+        })
+        pairs = {}
+        for uid, others in found.items():
+            for other in others:
+                key = tuple(sorted((uid, other)))
+                if key not in pairs:
+                    pairs[key] = question_similarity(stored[uid], stored[other])
+
+        QuestionSignature.objects.bulk_create([
+            QuestionSignature(
+                uid=uid, exam_type=EXAM_TYPES[type(question)], question_id=question.pk, signature=values.tobytes(),
+                passage_signature=to_bytes(passage_signatures[question.passage_id]),
+            )
+            for uid, (question, values) in signatures.items()
+        ])
+        QuestionBand.objects.bulk_create(
+            [QuestionBand(bucket=bucket, signature_id=uid) for uid, bucket_set in bucket_sets.items() for bucket in bucket_set],
+            batch_size=1000,
+        )
+        return DuplicatePair.objects.bulk_create([
+            DuplicatePair(first_id=first, second_id=second, similarity=value)
+            for (first, second), value in pairs.items()
+            if value >= SIMILARITY_THRESHOLD
+        ])
+
+
+def to_bytes(values):
+    return None if values is None else values.tobytes()
+
+
+def remove(question):
+    QuestionSignature.objects.filter(uid=question_uid(question)).delete()
+
+
+def similar(text, passage='', min_similarity=SIMILARITY_THRESHOLD):
+    """Indexed questions resembling ``text`` and ``passage`` as [(uid, similarity)], most similar first."""
+    values = signature(text)
+    if values is None:
+        return []
+    draft = (values, signature(passage))
+    found = candidates({None: buckets(values)})[None]
+    scored = [(uid, question_similarity(draft, other)) for uid, other in load_signatures(found).items()]
+    return sorted(
+        [(uid, value) for uid, value in scored if value >= min_similarity], key=lambda item: (-item[1], item[0])
+    )
+
+
+def describe(questions, uids):
+    return [
+        {
+            'uid': uid,
+            'exam_type': questions[uid].exam_type,
+            'question_id': questions[uid].question_id,
+            'exam_id': questions[uid].exam_id,
+            'text': questions[uid].text,
+        }
+        for uid in sorted(uids)
+        if uid in questions
+    ]
+
+
+def clusters(exam_type=None, min_similarity=SIMILARITY_THRESHOLD):
+    """Connected groups of duplicate pairs as [{size, similarity, questions}], largest first.
+
+    Questions deleted along with their module, section or exam are skipped until ``prune`` runs.
+    """
+    parent = {}
+
+    def find(uid):
+        parent.setdefault(uid, uid)
+        while parent[uid] != uid:
+            parent[uid] = parent[parent[uid]]
+            uid = parent[uid]
+        return uid
+
+    pairs = list(DuplicatePair.objects.filter(similarity__gte=min_similarity).values_list('first_id', 'second_id', 'similarity'))
+    for first, second, _ in pairs:
+        parent[find(first)] = find(second)
+
+    groups = defaultdict(set)
+    for uid in list(parent):
+        groups[find(uid)].add(uid)
+    lowest = {}
+    for first, _, value in pairs:
+        root = find(first)
+        lowest[root] = min(value, lowest.get(root, 1.0))
+
+    questions = Question.objects.filter(uid_filter(parent)).only('uid', 'exam_type', 'question_id', 'exam_id', 'text')
+    questions = {question.uid: question for question in questions}
+    result = []
+    for root, uids in groups.items():
+        members = describe(questions, uids)
+        if len(members) < 2 or (exam_type and not any(member['exam_type'] == exam_type for member in members)):
+            continue
+        result.append({'size': len(members), 'similarity': round(lowest[root], 3), 'questions': members})
+    return sorted(result, key=lambda cluster: (-cluster['size'], cluster['questions'][0]['uid']))
+
+
+def prune():
+    """Drop index entries of questions that no longer exist; returns how many were removed."""
+    removed = QuestionSignature.objects.exclude(exam_type__in=QUESTION_MODELS).delete()[1].get(QuestionSignature._meta.label, 0)
+    for exam_type, model in QUESTION_MODELS.items():
+        stale = QuestionSignature.objects.filter(exam_type=exam_type).exclude(
+            Exists(model.objects.filter(pk=OuterRef('question_id')))
+        )
+        removed += stale.delete()[1].get(QuestionSignature._meta.label, 0)
+    return removed
+
+
+def rebuild(batch_size=1000):
+    """Re-index every question from scratch; returns the number of duplicate pairs found."""
+    with transaction.atomic():
+        QuestionSignature.objects.all().delete()
+        found = 0
+        for model in QUESTION_MODELS.values():
+            batch = []
+            for question in model.objects.select_related('passage').only('id', 'text', 'passage__text').order_by('id').iterator(chunk_size=batch_size):
+                batch.append(question)
+                if len(batch) >= batch_size:
+                    found += len(index_questions(batch))
+                    batch = []
+            if batch:
+                found += len(index_questions(batch))
+    return found
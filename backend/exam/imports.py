@@ -0,0 +1,162 @@
+import csv
+import io
+import json
+
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import ValidationError
+
+from . import audit, counters, duplicates, passages, snapshots
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(filename, default='jsonl'):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in FORMATS else default
+
+
+def read_rows(stream, file_format):
+    """Yield (row number, row, error) from a text stream one line at a time.
+
+    The upload is decoded as it is read, so bytes that are not UTF-8 can turn up after earlier
+    batches were saved; they end the import with an error on the row where decoding stopped.
+    """
+    number = 0
+    try:
+        for number, row, error in parse_rows(stream, file_format):
+            yield number, row, error
+    except UnicodeDecodeError:
+        yield number + 1, None, {'non_field_errors': ['File is not valid UTF-8; rows from here on were not read.']}
+
+
+def parse_rows(stream, file_format):
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            row = {key: value for key, value in row.items() if key and value not in ('', None)}
+            if 'options' in row:
+                try:
+                    row['options'] = json.loads(row['options'])
+                except ValueError:
+                    yield number, None, {'options': ['Must be a JSON object.']}
+                    continue
+            yield number, row, None
+    elif file_format == 'jsonl':
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, None, {'non_field_errors': ['Invalid JSON.']}
+                continue
+            if not isinstance(row, dict):
+                yield number, None, {'non_field_errors': ['Expected a JSON object.']}
+                continue
+            yield number, row, None
+    else:
+        raise ValueError(f"Unsupported format '{file_format}'")
+
+
+def open_upload(upload):
+    return io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+
+
+class QuestionImport:
+    """Validate and insert question rows in chunks, collecting per-row errors."""
+
+    def __init__(self, serializer_class, activity_model_name, batch_size=BATCH_SIZE):
+        self.serializer_class = serializer_class
+        self.question_model = serializer_class.Meta.model
+        self.module_model = self.question_model._meta.get_field('module').related_model
+        self.activity_model_name = activity_model_name
+        self.batch_size = batch_size
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.touched_modules = set()
+
+    def run(self, rows):
+        module_ids = set(self.module_model.objects.values_list('id', flat=True))
+        batch = []
+        for number, row, error in rows:
+            if error:
+                self.add_error(number, error)
+                continue
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch, module_ids)
+                batch = []
+        if batch:
+            self.import_batch(batch, module_ids)
+        self.invalidate_snapshots()
+        return self
+
+    def import_batch(self, batch, module_ids):
+        # One serializer instance per batch; building its fields per row dominates the cost
+        serializer = self.serializer_class()
+        questions, numbers = [], []
+        for number, row in batch:
+            module_id = row.get('module')
+            try:
+                module_id = int(module_id)
+            except (TypeError, ValueError):
+                module_id = None
+            if module_id not in module_ids:
+                self.add_error(number, {'module': ['Invalid module ID']})
+                continue
+
+            try:
+                validated_data = serializer.run_validation(row)
+            except ValidationError as exc:
+                self.add_error(number, exc.detail)
+                continue
+            questions.append(self.question_model(module_id=module_id, **validated_data))
+            numbers.append(number)
+
+        if not questions:
+            return
+
+        try:
+            with transaction.atomic():
+                passages.store(question.passage for question in questions)
+                self.question_model.objects.bulk_create(questions)
+                counters.increment(self.question_model, len(questions))
+                duplicates.index_questions(questions)
+                audit.record(
+                    action=f"Imported {self.activity_model_name}",
+                    model_name=self.activity_model_name,
+                    details=f"{len(questions)} {self.activity_model_name} rows were imported (rows {numbers[0]}-{numbers[-1]})"
+                )
+        except DatabaseError as exc:
+            for number in numbers:
+                self.add_error(number, {'non_field_errors': [str(exc)]})
+            return
+
+        self.created += len(questions)
+        self.touched_modules.update(question.module_id for question in questions)
+
+    def add_error(self, number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'errors': errors})
+
+    def invalidate_snapshots(self):
+        if not self.touched_modules:
+            return
+        exam_model = self.module_model._meta.get_field('section').related_model._meta.get_field('exam').related_model
+        exam_ids = (
+            self.module_model.objects.filter(id__in=self.touched_modules)
+            .values_list('section__exam_id', flat=True).distinct()
+        )
+        snapshots.invalidate(*((exam_model, exam_id) for exam_id in exam_ids))
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from exam.retention import add_months, ensure_partitions, month_start, rollup
+
+
+class Command(BaseCommand):
+    help = "Create upcoming Activity partitions and roll activities past retention up into daily summaries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=6, help="Full months of detailed activity to keep besides the current one")
+        parser.add_argument('--months-ahead', type=int, default=2, help="Monthly partitions to create past the current month")
+
+    def handle(self, *args, keep_months, months_ahead, **options):
+        if keep_months < 0 or months_ahead < 0:
+            raise CommandError("--keep-months and --months-ahead must not be negative")
+
+        cutoff = add_months(month_start(timezone.now()), -keep_months)
+        compacted, dropped = rollup(cutoff)
+        created = ensure_partitions(cutoff, months_ahead)
+
+        for name in created:
+            self.stdout.write(f"Created partition {name}")
+        for name in dropped:
+            self.stdout.write(f"Dropped partition {name}")
+        self.stdout.write(self.style.SUCCESS(f"Compacted {compacted} activities older than {cutoff:%Y-%m-%d}"))
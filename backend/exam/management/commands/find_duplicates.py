@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exam import duplicates
+
+
+class Command(BaseCommand):
+    help = "List clusters of near-duplicate questions from the MinHash index, optionally rebuilding it first"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam-type', choices=sorted(duplicates.QUESTION_MODELS), default=None)
+        parser.add_argument('--min-similarity', type=float, default=duplicates.SIMILARITY_THRESHOLD)
+        parser.add_argument('--rebuild', action='store_true', help="Re-index every question before listing")
+        parser.add_argument('--prune', action='store_true', help="Drop index entries of deleted questions")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, exam_type, min_similarity, rebuild, prune, batch_size, **options):
+        if not 0 < min_similarity <= 1:
+            raise CommandError("--min-similarity must be in (0, 1]")
+
+        if rebuild:
+            self.stdout.write(f"Indexed all questions, {duplicates.rebuild(batch_size)} duplicate pairs found")
+        elif prune:
+            self.stdout.write(f"Pruned {duplicates.prune()} deleted questions from the index")
+
+        clusters = duplicates.clusters(exam_type, min_similarity)
+        for cluster in clusters:
+            self.stdout.write(f"{cluster['size']} questions, similarity >= {cluster['similarity']}")
+            for question in cluster['questions']:
+                self.stdout.write(f"  {question['uid']} (exam {question['exam_id']}): {question['text'][:80]}")
+        self.stdout.write(self.style.SUCCESS(f"{len(clusters)} duplicate clusters"))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exam.audit import background_flusher
+from exam.imports import BATCH_SIZE, FORMATS, QuestionImport, detect_format, read_rows
+from exam.serializers import SATQuestionSerializer, GREQuestionSerializer, GMATQuestionSerializer, IELTSQuestionSerializer
+
+QUESTION_SERIALIZERS = {
+    'sat': SATQuestionSerializer,
+    'gre': GREQuestionSerializer,
+    'gmat': GMATQuestionSerializer,
+    'ielts': IELTSQuestionSerializer,
+}
+
+
+class Command(BaseCommand):
+    help = "Stream questions from a CSV or JSONL file into the question bank in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_type', choices=sorted(QUESTION_SERIALIZERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='file_format', choices=FORMATS, default=None)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, exam_type, path, file_format, batch_size, **options):
+        file_format = file_format or detect_format(path)
+        activity_model_name = f"{exam_type.upper()} Question"
+
+        try:
+            stream = open(path, encoding='utf-8-sig', newline='')
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with stream, background_flusher():
+            question_import = QuestionImport(
+                QUESTION_SERIALIZERS[exam_type], activity_model_name, batch_size=batch_size
+            ).run(read_rows(stream, file_format))
+
+        for error in question_import.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {question_import.created} questions, {question_import.error_count} rows rejected"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from exam.blueprints import EXAM_MODELS, provision_exams
+from exam import audit
+
+
+class Command(BaseCommand):
+    help = "Create practice exams with the default blueprint structure in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_type', choices=sorted(EXAM_MODELS))
+        parser.add_argument('count', type=int)
+        parser.add_argument('--name-prefix', default=None)
+
+    def handle(self, *args, exam_type, count, name_prefix, **options):
+        prefix = name_prefix or f"{exam_type.upper()} Practice"
+        exams = provision_exams(EXAM_MODELS[exam_type], (f"{prefix} {number}" for number in range(1, count + 1)))
+        audit.record(
+            action=f"Provisioned {exam_type.upper()} Exam",
+            model_name=f"{exam_type.upper()} Exam",
+            details=f"{len(exams)} {exam_type.upper()} practice exams were provisioned"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Provisioned {len(exams)} {exam_type.upper()} exams"))
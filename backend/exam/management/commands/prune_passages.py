@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from exam.passages import prune
+
+
+class Command(BaseCommand):
+    help = "Delete shared passages that no question refers to any more"
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f"Deleted {prune()} unused passages"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from exam.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recount exams and questions and correct the stored exam_stats counters"
+
+    def handle(self, *args, **options):
+        for label, value in reconcile().items():
+            self.stdout.write(f"{label}: {value}")
+        self.stdout.write(self.style.SUCCESS("Counters reconciled"))
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0008_alter_ieltsexamsubmission_listening_score_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gmatmodule',
+            index=models.Index(fields=['section', 'difficulty', 'order'], name='exam_gmatmodule_route_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gremodule',
+            index=models.Index(fields=['section', 'difficulty', 'order'], name='exam_gremodule_route_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ieltsmodule',
+            index=models.Index(fields=['section', 'difficulty', 'order'], name='exam_ieltsmodule_route_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='satmodule',
+            index=models.Index(fields=['section', 'difficulty', 'order'], name='exam_satmodule_route_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:30
+
+from django.db import migrations, models
+
+
+COUNTED_MODELS = [
+    'SATExam', 'GREExam', 'GMATExam', 'IELTSExam',
+    'SATQuestion', 'GREQuestion', 'GMATQuestion', 'IELTSQuestion',
+]
+
+
+def populate_counters(apps, schema_editor):
+    ExamCounter = apps.get_model('exam', 'ExamCounter')
+    ExamCounter.objects.bulk_create(
+        ExamCounter(key=f'exam.{name}', value=apps.get_model('exam', name).objects.count())
+        for name in COUNTED_MODELS
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0009_module_route_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
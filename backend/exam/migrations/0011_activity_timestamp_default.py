@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0010_examcounter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activity',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:36
+
+from django.db import migrations, models
+
+
+EXAM_TYPES = ['sat', 'gre', 'gmat', 'ielts']
+
+BRANCH_SQL = """
+    SELECT '{exam_type}:' || CAST(q.id AS TEXT) AS uid, '{exam_type}' AS exam_type, q.id AS question_id,
+           s.exam_id, s.id AS section_id, s.name AS section_name, m.id AS module_id, m.difficulty AS module_difficulty,
+           q.question_type, q.text, q.passage, q.options, q.correct_answer, q.explanation, q.unit, q."order", q.weight
+    FROM exam_{exam_type}question q
+    JOIN exam_{exam_type}module m ON m.id = q.module_id
+    JOIN exam_{exam_type}section s ON s.id = m.section_id"""
+
+CREATE_VIEW_SQL = 'CREATE VIEW exam_question AS' + '\n    UNION ALL'.join(
+    BRANCH_SQL.format(exam_type=exam_type) for exam_type in EXAM_TYPES
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0012_activity_partitioning'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_VIEW_SQL, 'DROP VIEW exam_question'),
+        migrations.CreateModel(
+            name='Question',
+            fields=[
+                ('uid', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('exam_type', models.CharField(max_length=10)),
+                ('question_id', models.BigIntegerField()),
+                ('exam_id', models.BigIntegerField()),
+                ('section_id', models.BigIntegerField()),
+                ('section_name', models.CharField(max_length=50)),
+                ('module_id', models.BigIntegerField()),
+                ('module_difficulty', models.CharField(max_length=10)),
+                ('question_type', models.CharField(max_length=50)),
+                ('text', models.TextField()),
+                ('passage', models.TextField()),
+                ('options', models.JSONField(default=dict)),
+                ('correct_answer', models.CharField(blank=True, max_length=1)),
+                ('explanation', models.TextField(blank=True)),
+                ('unit', models.CharField(blank=True, max_length=100)),
+                ('order', models.PositiveIntegerField()),
+                ('weight', models.FloatField()),
+            ],
+            options={
+                'db_table': 'exam_question',
+                'managed': False,
+            },
+        ),
+    ]
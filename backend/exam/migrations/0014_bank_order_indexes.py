@@ -0,0 +1,61 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0013_unified_question_view'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gmatmodule',
+            index=models.Index(fields=['order', 'id'], name='exam_gmatmodule_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gmatquestion',
+            index=models.Index(fields=['order', 'id'], name='exam_gmatquestion_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gmatsection',
+            index=models.Index(fields=['order', 'id'], name='exam_gmatsection_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gremodule',
+            index=models.Index(fields=['order', 'id'], name='exam_gremodule_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grequestion',
+            index=models.Index(fields=['order', 'id'], name='exam_grequestion_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gresection',
+            index=models.Index(fields=['order', 'id'], name='exam_gresection_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ieltsmodule',
+            index=models.Index(fields=['order', 'id'], name='exam_ieltsmodule_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ieltsquestion',
+            index=models.Index(fields=['order', 'id'], name='exam_ieltsquestion_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ieltssection',
+            index=models.Index(fields=['order', 'id'], name='exam_ieltssection_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='satmodule',
+            index=models.Index(fields=['order', 'id'], name='exam_satmodule_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='satquestion',
+            index=models.Index(fields=['order', 'id'], name='exam_satquestion_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='satsection',
+            index=models.Index(fields=['order', 'id'], name='exam_satsection_order_idx'),
+        ),
+    ]
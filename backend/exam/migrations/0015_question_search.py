@@ -0,0 +1,94 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:05
+
+import importlib
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+EXAM_TYPES = ['sat', 'gre', 'gmat', 'ielts']
+
+# Weighted so that matches in the question text rank above unit, passage and explanation
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce({row}text, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({row}unit, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce({row}passage, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce({row}explanation, '')), 'D')"""
+
+TRIGGER_FUNCTION_SQL = f"""
+CREATE FUNCTION exam_question_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql"""
+
+TABLE_SQL = [
+    "ALTER TABLE exam_{exam_type}question ADD COLUMN search_vector tsvector",
+    "UPDATE exam_{exam_type}question SET search_vector = " + SEARCH_VECTOR_SQL.format(row=''),
+    """CREATE TRIGGER exam_{exam_type}question_search_vector
+        BEFORE INSERT OR UPDATE OF text, passage, explanation, unit ON exam_{exam_type}question
+        FOR EACH ROW EXECUTE FUNCTION exam_question_search_vector()""",
+    "CREATE INDEX exam_{exam_type}question_search_idx ON exam_{exam_type}question USING gin (search_vector)",
+    "CREATE INDEX exam_{exam_type}question_trgm_idx ON exam_{exam_type}question USING gin (text gin_trgm_ops)",
+]
+
+BRANCH_SQL = """
+    SELECT '{exam_type}:' || CAST(q.id AS TEXT) AS uid, '{exam_type}' AS exam_type, q.id AS question_id,
+           s.exam_id, s.id AS section_id, s.name AS section_name, m.id AS module_id, m.difficulty AS module_difficulty,
+           q.question_type, q.text, q.passage, q.options, q.correct_answer, q.explanation, q.unit, q."order", q.weight,
+           {search_vector} AS search_vector
+    FROM exam_{exam_type}question q
+    JOIN exam_{exam_type}module m ON m.id = q.module_id
+    JOIN exam_{exam_type}section s ON s.id = m.section_id"""
+
+
+def create_view_sql(search_vector):
+    return 'CREATE VIEW exam_question AS' + '\n    UNION ALL'.join(
+        BRANCH_SQL.format(exam_type=exam_type, search_vector=search_vector) for exam_type in EXAM_TYPES
+    )
+
+
+def add_search(apps, schema_editor):
+    execute = schema_editor.execute
+    execute('DROP VIEW exam_question')
+    if schema_editor.connection.vendor != 'postgresql':
+        # Other databases have no tsvector; the view keeps the column so the model stays portable
+        execute(create_view_sql('NULL'))
+        return
+
+    execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    execute(TRIGGER_FUNCTION_SQL)
+    for exam_type in EXAM_TYPES:
+        for sql in TABLE_SQL:
+            execute(sql.format(exam_type=exam_type))
+    execute(create_view_sql('q.search_vector'))
+
+
+def remove_search(apps, schema_editor):
+    execute = schema_editor.execute
+    execute('DROP VIEW exam_question')
+    if schema_editor.connection.vendor == 'postgresql':
+        for exam_type in EXAM_TYPES:
+            execute(f'DROP TRIGGER exam_{exam_type}question_search_vector ON exam_{exam_type}question')
+            execute(f'ALTER TABLE exam_{exam_type}question DROP COLUMN search_vector')
+            # The search index goes with its column; the trigram index is on text, which stays
+            execute(f'DROP INDEX exam_{exam_type}question_trgm_idx')
+        execute('DROP FUNCTION exam_question_search_vector()')
+    execute(importlib.import_module('exam.migrations.0013_unified_question_view').CREATE_VIEW_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0014_bank_order_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search, remove_search),
+        migrations.AddField(
+            model_name='question',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(null=True),
+        ),
+    ]
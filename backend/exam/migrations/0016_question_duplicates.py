@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0015_question_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSignature',
+            fields=[
+                ('uid', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('exam_type', models.CharField(max_length=10)),
+                ('question_id', models.BigIntegerField()),
+                ('signature', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField()),
+                ('signature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='exam.questionsignature')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='exam_questionband_bucket_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicatePair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField()),
+                ('first', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exam.questionsignature')),
+                ('second', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exam.questionsignature')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('first', 'second'), name='unique_duplicate_pair')],
+            },
+        ),
+    ]
@@ -0,0 +1,162 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:40
+
+import hashlib
+import importlib
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+EXAM_TYPES = ['sat', 'gre', 'gmat', 'ielts']
+QUESTION_MODELS = [f'{exam_type}question' for exam_type in EXAM_TYPES]
+BATCH_SIZE = 1000
+
+# The search vector of 0015, reading the passage text through the question's reference
+TRIGGER_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION exam_question_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.text, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.unit, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce((SELECT text FROM exam_passage WHERE digest = NEW.passage_id), '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.explanation, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql"""
+
+TRIGGER_SQL = """CREATE TRIGGER exam_{exam_type}question_search_vector
+    BEFORE INSERT OR UPDATE OF text, passage_id, explanation, unit ON exam_{exam_type}question
+    FOR EACH ROW EXECUTE FUNCTION exam_question_search_vector()"""
+
+BRANCH_SQL = """
+    SELECT '{exam_type}:' || CAST(q.id AS TEXT) AS uid, '{exam_type}' AS exam_type, q.id AS question_id,
+           s.exam_id, s.id AS section_id, s.name AS section_name, m.id AS module_id, m.difficulty AS module_difficulty,
+           q.question_type, q.text, coalesce(p.text, '') AS passage, q.options, q.correct_answer, q.explanation, q.unit,
+           q."order", q.weight, {search_vector} AS search_vector
+    FROM exam_{exam_type}question q
+    JOIN exam_{exam_type}module m ON m.id = q.module_id
+    JOIN exam_{exam_type}section s ON s.id = m.section_id
+    LEFT JOIN exam_passage p ON p.digest = q.passage_id"""
+
+
+def create_view_sql(search_vector):
+    return 'CREATE VIEW exam_question AS' + '\n    UNION ALL'.join(
+        BRANCH_SQL.format(exam_type=exam_type, search_vector=search_vector) for exam_type in EXAM_TYPES
+    )
+
+
+def drop_search_triggers(schema_editor):
+    for exam_type in EXAM_TYPES:
+        schema_editor.execute(f'DROP TRIGGER exam_{exam_type}question_search_vector ON exam_{exam_type}question')
+
+
+def drop_inline_dependents(apps, schema_editor):
+    # The view and the search triggers refer to the passage column being replaced
+    schema_editor.execute('DROP VIEW exam_question')
+    if schema_editor.connection.vendor == 'postgresql':
+        drop_search_triggers(schema_editor)
+
+
+def restore_inline_dependents(apps, schema_editor):
+    previous = importlib.import_module('exam.migrations.0015_question_search')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(previous.create_view_sql('NULL'))
+        return
+    schema_editor.execute(previous.TRIGGER_FUNCTION_SQL.replace('CREATE FUNCTION', 'CREATE OR REPLACE FUNCTION'))
+    for exam_type in EXAM_TYPES:
+        schema_editor.execute(previous.TABLE_SQL[2].format(exam_type=exam_type))
+    schema_editor.execute(previous.create_view_sql('q.search_vector'))
+
+
+def create_shared_dependents(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(create_view_sql('NULL'))
+        return
+    schema_editor.execute(TRIGGER_FUNCTION_SQL)
+    for exam_type in EXAM_TYPES:
+        schema_editor.execute(TRIGGER_SQL.format(exam_type=exam_type))
+    schema_editor.execute(create_view_sql('q.search_vector'))
+
+
+def check_constraints_immediately(schema_editor):
+    # Deferred foreign key checks left pending would block the ALTER TABLEs that follow on PostgreSQL
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+def extract_passages(apps, schema_editor):
+    check_constraints_immediately(schema_editor)
+    Passage = apps.get_model('exam', 'Passage')
+    for model_name in QUESTION_MODELS:
+        model = apps.get_model('exam', model_name)
+        questions = model.objects.exclude(passage='').only('id', 'passage').order_by('id')
+        batch = []
+        for question in questions.iterator(chunk_size=BATCH_SIZE):
+            text = question.passage.replace('\r\n', '\n').strip()
+            if text:
+                question.passage_ref_id = hashlib.sha256(text.encode()).hexdigest()
+                batch.append((question, text))
+            if len(batch) >= BATCH_SIZE:
+                link_passages(Passage, model, batch)
+                batch = []
+        if batch:
+            link_passages(Passage, model, batch)
+
+
+def link_passages(Passage, model, batch):
+    texts = {question.passage_ref_id: text for question, text in batch}
+    Passage.objects.bulk_create(
+        [Passage(digest=digest, text=text) for digest, text in texts.items()], ignore_conflicts=True
+    )
+    model.objects.bulk_update([question for question, _ in batch], ['passage_ref'])
+
+
+def inline_passages(apps, schema_editor):
+    check_constraints_immediately(schema_editor)
+    for model_name in QUESTION_MODELS:
+        model = apps.get_model('exam', model_name)
+        questions = model.objects.filter(passage_ref__isnull=False).select_related('passage_ref').order_by('id')
+        batch = []
+        for question in questions.iterator(chunk_size=BATCH_SIZE):
+            question.passage = question.passage_ref.text
+            batch.append(question)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, ['passage'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['passage'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0016_question_duplicates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Passage',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(drop_inline_dependents, restore_inline_dependents),
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name='passage_ref',
+                field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='exam.passage'),
+            )
+            for model_name in QUESTION_MODELS
+        ],
+        migrations.RunPython(extract_passages, inline_passages),
+        *[migrations.RemoveField(model_name=model_name, name='passage') for model_name in QUESTION_MODELS],
+        *[
+            migrations.RenameField(model_name=model_name, old_name='passage_ref', new_name='passage')
+            for model_name in QUESTION_MODELS
+        ],
+        migrations.RunPython(create_shared_dependents, drop_inline_dependents),
+    ]
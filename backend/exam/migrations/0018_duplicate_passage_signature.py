@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:27
+
+from django.db import migrations, models
+
+
+def clear_index(apps, schema_editor):
+    # Existing signatures shingle the text and passage together and pair up reading-set siblings;
+    # `find_duplicates --rebuild` re-indexes the bank with separate signatures
+    apps.get_model('exam', 'QuestionSignature').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0017_shared_passages'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_index, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='questionsignature',
+            name='passage_signature',
+            field=models.BinaryField(null=True),
+        ),
+    ]
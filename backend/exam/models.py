@@ -2,19 +2,51 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.search import SearchVectorField
 
 
 User = get_user_model()
 
 class Activity(models.Model):
+    # On PostgreSQL the table is range-partitioned by month on timestamp (see exam.retention)
     id = models.AutoField(primary_key=True)
     action = models.CharField(max_length=255)
+    model_name = models.CharField(max_length=100, blank=True, default='')
     details = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the activity is recorded, not when a buffered batch is written
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='exam_activity_feed_idx'),
+            models.Index(fields=['action', '-timestamp'], name='exam_activity_action_idx'),
+            models.Index(fields=['model_name', '-timestamp'], name='exam_activity_model_idx'),
+        ]
 
     def __str__(self):
         return f"{self.action} - {self.timestamp}"
 
+class ActivitySummary(models.Model):
+    day = models.DateField()
+    action = models.CharField(max_length=255)
+    model_name = models.CharField(max_length=100, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'action', 'model_name'], name='unique_activity_summary'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.action}: {self.count}"
+
+class ExamCounter(models.Model):
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
+
 class BaseExam(models.Model):
     name = models.CharField(max_length=255)
     created_at = models.DateTimeField(default=timezone.now)
@@ -33,6 +65,10 @@ class BaseSection(models.Model):
 
     class Meta:
         abstract = True
+        # Keyset pagination of the admin lists
+        indexes = [
+            models.Index(fields=['order', 'id'], name='%(app_label)s_%(class)s_order_idx'),
+        ]
 
     def __str__(self):
         return f"Section: {self.name}"
@@ -50,10 +86,23 @@ class BaseModule(models.Model):
 
     class Meta:
         abstract = True
+        indexes = [
+            models.Index(fields=['section', 'difficulty', 'order'], name='%(app_label)s_%(class)s_route_idx'),
+            models.Index(fields=['order', 'id'], name='%(app_label)s_%(class)s_order_idx'),
+        ]
 
     def __str__(self):
         return f"Module: {self.name}"
 
+class Passage(models.Model):
+    """A reading passage stored once per distinct text and shared by every question that uses it."""
+    digest = models.CharField(max_length=64, primary_key=True)  # SHA-256 of the text, see exam.passages
+    text = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Passage {self.digest[:12]}: {self.text[:50]}"
+
 class BaseQuestion(models.Model):
     text = models.TextField()
     question_type = models.CharField(max_length=50, choices=[
@@ -62,7 +111,7 @@ class BaseQuestion(models.Model):
         ('writing', 'Writing'),
         ('speaking', 'Speaking'),
     ])
-    passage = models.TextField(blank=True)
+    passage = models.ForeignKey(Passage, null=True, blank=True, on_delete=models.PROTECT, related_name='+')
     options = models.JSONField(default=dict)
     correct_answer = models.CharField(max_length=1, choices=[
         ('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D')
@@ -74,6 +123,9 @@ class BaseQuestion(models.Model):
 
     class Meta:
         abstract = True
+        indexes = [
+            models.Index(fields=['order', 'id'], name='%(app_label)s_%(class)s_order_idx'),
+        ]
 
     def __str__(self):
         return f"Question: {self.text[:50]}..."
@@ -258,4 +310,73 @@ class IELTSExamSubmission(BaseExamSubmission):
     reading_score = models.FloatField(validators=[MinValueValidator(0), MaxValueValidator(9)])
     writing_score = models.FloatField(validators=[MinValueValidator(0), MaxValueValidator(9)])
     speaking_score = models.FloatField(validators=[MinValueValidator(0), MaxValueValidator(9)])
-    overall_score = models.FloatField(validators=[MinValueValidator(0), MaxValueValidator(9)])
\ No newline at end of file
+    overall_score = models.FloatField(validators=[MinValueValidator(0), MaxValueValidator(9)])
+# Cross-exam question store
+class Question(models.Model):
+    """Read-only union of the four per-exam question tables, one row per question.
+
+    Backed by the ``exam_question`` database view (migrations 0013, 0015, 0017); writes still go through
+    the per-exam models, which remain the source of truth.
+    """
+    uid = models.CharField(max_length=32, primary_key=True)  # "<exam_type>:<question id>"
+    exam_type = models.CharField(max_length=10)
+    question_id = models.BigIntegerField()
+    exam_id = models.BigIntegerField()
+    section_id = models.BigIntegerField()
+    section_name = models.CharField(max_length=50)
+    module_id = models.BigIntegerField()
+    module_difficulty = models.CharField(max_length=10)
+    question_type = models.CharField(max_length=50)
+    text = models.TextField()
+    passage = models.TextField()
+    options = models.JSONField(default=dict)
+    correct_answer = models.CharField(max_length=1, blank=True)
+    explanation = models.TextField(blank=True)
+    unit = models.CharField(max_length=100, blank=True)
+    order = models.PositiveIntegerField()
+    weight = models.FloatField()
+    # Maintained by a trigger on each question table on PostgreSQL (migration 0015); NULL elsewhere
+    search_vector = SearchVectorField(null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'exam_question'
+
+    def __str__(self):
+        return f"{self.exam_type.upper()} Question {self.question_id}: {self.text[:50]}"
+
+class QuestionSignature(models.Model):
+    """MinHash signatures of a question's text and passage, maintained by exam.duplicates."""
+    uid = models.CharField(max_length=32, primary_key=True)  # Same "<exam_type>:<question id>" as Question
+    exam_type = models.CharField(max_length=10)
+    question_id = models.BigIntegerField()
+    signature = models.BinaryField()  # Question text only; this is what the bands index
+    passage_signature = models.BinaryField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.uid
+
+class QuestionBand(models.Model):
+    """One LSH band of a signature; questions sharing a bucket are duplicate candidates."""
+    bucket = models.BigIntegerField()
+    signature = models.ForeignKey(QuestionSignature, on_delete=models.CASCADE, related_name='bands')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['bucket'], name='exam_questionband_bucket_idx'),
+        ]
+
+class DuplicatePair(models.Model):
+    """Two questions whose estimated Jaccard similarity passed the duplicate threshold."""
+    first = models.ForeignKey(QuestionSignature, on_delete=models.CASCADE, related_name='+')
+    second = models.ForeignKey(QuestionSignature, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['first', 'second'], name='unique_duplicate_pair'),
+        ]
+
+    def __str__(self):
+        return f"{self.first_id} ~ {self.second_id} ({self.similarity:.2f})"
@@ -0,0 +1,115 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a unique tuple of ascending int or text columns, e.g. ``('order', 'id')``.
+
+    The cursor holds the whole key of the row at the page boundary and the next page is every row
+    after that tuple, so each page is one index range scan however many rows share a leading value.
+    DRF's CursorPagination keys on the first column only and steps over ties with an offset that is
+    capped at 1000, which loops forever once more rows than that tie.
+    """
+    ordering = ('id',)
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        if reverse:
+            queryset = queryset.filter(self.before(position)).order_by(*(f'-{field}' for field in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+            if position is not None:
+                queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+
+        first, last = (self.key(rows[0]), self.key(rows[-1])) if rows else (position, position)
+        if reverse:
+            # The cursor row itself follows this page
+            self.next_position = last
+            self.previous_position = first if has_more else None
+        else:
+            self.next_position = last if has_more else None
+            self.previous_position = first if position is not None else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.link(self.next_position, reverse=False),
+            'previous': self.link(self.previous_position, reverse=True),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def key(self, row):
+        return [getattr(row, field) for field in self.ordering]
+
+    def after(self, position):
+        # (a, b) > (x, y) as a >= x AND (a > x OR (a = x AND b > y)); the leading bound is an index range
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            condition |= Q(**dict(zip(self.ordering[:index], position)), **{f'{field}__gt': position[index]})
+        return Q(**{f'{self.ordering[0]}__gte': position[0]}) & condition
+
+    def before(self, position):
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            condition |= Q(**dict(zip(self.ordering[:index], position)), **{f'{field}__lt': position[index]})
+        return Q(**{f'{self.ordering[0]}__lte': position[0]}) & condition
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position, reverse = cursor['p'], bool(cursor.get('r'))
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [self.clean_value(model, field, value) for field, value in zip(self.ordering, position)]
+        except (FieldDoesNotExist, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def clean_value(self, model, field, value):
+        # Only a scalar the column's own field accepts can be compared in the key; a key is never NULL
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise ValidationError(self.invalid_cursor_message)
+        return model._meta.get_field(field).clean(value, None)
+
+    def link(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        cursor = {'p': position, 'r': 1} if reverse else {'p': position}
+        encoded = base64.urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode()).decode()
+        return replace_query_param(url, self.cursor_query_param, encoded)
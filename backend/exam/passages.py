@@ -0,0 +1,44 @@
+import hashlib
+
+from django.db.models import Exists, OuterRef
+
+from .models import Passage, SATQuestion, GREQuestion, GMATQuestion, IELTSQuestion
+
+QUESTION_MODELS = (SATQuestion, GREQuestion, GMATQuestion, IELTSQuestion)
+
+
+def normalize(text):
+    return (text or '').replace('\r\n', '\n').strip()
+
+
+def digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def build(text):
+    """An unsaved Passage addressed by the digest of ``text``, or None for a blank passage."""
+    text = normalize(text)
+    return Passage(digest=digest(text), text=text) if text else None
+
+
+def store(passages):
+    """Insert the passages not stored yet in one query; stored ones are identical by construction."""
+    passages = {passage.digest: passage for passage in passages if passage is not None}
+    if passages:
+        Passage.objects.bulk_create(passages.values(), ignore_conflicts=True)
+
+
+def texts(digests):
+    """``{digest: text}`` for a response's passage references, in one query."""
+    digests = [value for value in digests if value]
+    if not digests:
+        return {}
+    return dict(Passage.objects.filter(digest__in=digests).values_list('digest', 'text'))
+
+
+def prune():
+    """Delete passages no question refers to any more; returns how many were removed."""
+    unused = Passage.objects.all()
+    for model in QUESTION_MODELS:
+        unused = unused.exclude(Exists(model.objects.filter(passage=OuterRef('pk'))))
+    return unused.delete()[0]
@@ -0,0 +1,25 @@
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render responses as MessagePack for clients sending ``Accept: application/msgpack``.
+
+    Smaller and cheaper to encode and decode than JSON. Offered by the API only when the optional
+    msgpack package is installed (see REST_FRAMEWORK in settings).
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Dates, decimals, UUIDs and the like are converted the way the JSON renderer converts them
+        return msgpack.packb(data, default=JSONEncoder().default, use_bin_type=True)
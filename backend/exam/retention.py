@@ -0,0 +1,128 @@
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Activity, ActivitySummary
+
+TABLE = Activity._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_NAME = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year:04d}m{month.month:02d}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def partitions():
+    """Return {month: table name} for the monthly partitions currently attached."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    result = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            result[datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)] = name
+    return result
+
+
+@transaction.atomic
+def create_partition(month):
+    """Attach the partition for ``month``, moving any of its rows out of the default partition."""
+    name = partition_name(month)
+    bounds = [month, add_months(month, 1)]
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE timestamp >= %s AND timestamp < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            bounds,
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', bounds)
+
+
+def ensure_partitions(first_month, months_ahead=2):
+    """Create the monthly partitions from ``first_month`` up to ``months_ahead`` past the current month."""
+    if not is_partitioned():
+        return []
+    existing = partitions()
+    last_month = add_months(month_start(timezone.now()), months_ahead)
+    created = []
+    month = first_month
+    while month <= last_month:
+        if month not in existing:
+            create_partition(month)
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+@transaction.atomic
+def rollup(cutoff):
+    """Fold activities older than ``cutoff`` into daily summaries and remove them.
+
+    ``cutoff`` is a month boundary, so on PostgreSQL whole monthly partitions are dropped
+    instead of deleting their rows one by one.
+    """
+    rows = (
+        Activity.objects.filter(timestamp__lt=cutoff)
+        .annotate(day=TruncDate('timestamp'))
+        .values('day', 'action', 'model_name')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    totals = {(row['day'], row['action'], row['model_name']): row['count'] for row in rows}
+    if totals:
+        days = {day for day, _, _ in totals}
+        existing = {
+            (summary.day, summary.action, summary.model_name): summary
+            for summary in ActivitySummary.objects.filter(day__in=days)
+        }
+        changed, created = [], []
+        for key, count in totals.items():
+            summary = existing.get(key)
+            if summary is None:
+                day, action, model_name = key
+                created.append(ActivitySummary(day=day, action=action, model_name=model_name, count=count))
+            else:
+                summary.count += count
+                changed.append(summary)
+        ActivitySummary.objects.bulk_create(created, batch_size=1000)
+        ActivitySummary.objects.bulk_update(changed, ['count'], batch_size=1000)
+
+    dropped = []
+    if is_partitioned():
+        with connection.cursor() as cursor:
+            for month, name in sorted(partitions().items()):
+                if add_months(month, 1) <= cutoff:
+                    cursor.execute(f'DROP TABLE "{name}"')
+                    dropped.append(name)
+    # Whatever is left lives in the default partition (or the plain table off PostgreSQL)
+    Activity.objects.filter(timestamp__lt=cutoff).delete()
+    return sum(totals.values()), dropped
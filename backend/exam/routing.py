@@ -0,0 +1,30 @@
+from bisect import bisect_right
+
+
+def build_routes(exam, module_serializer):
+    """Precompute section -> difficulty -> [(order, module id)] for an exam with a prefetched tree."""
+    sections = {}
+    modules = {}
+    for section in exam.sections.all():
+        table = sections.setdefault(section.id, {})
+        for module in section.modules.all():
+            table.setdefault(module.difficulty, []).append((module.order, module.id))
+            modules[module.id] = {
+                'section': section.id,
+                'order': module.order,
+                'question_count': module.question_count,
+                'data': module_serializer(module).data,
+            }
+    for table in sections.values():
+        for route in table.values():
+            route.sort()
+    return {'sections': sections, 'modules': modules}
+
+
+def next_module_id(section_routes, difficulty, after_order=0):
+    """First module of ``difficulty`` placed after ``after_order`` in the section, if any."""
+    route = section_routes.get(difficulty)
+    if not route:
+        return None
+    index = bisect_right(route, (after_order, float('inf')))
+    return route[index][1] if index < len(route) else None
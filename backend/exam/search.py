@@ -0,0 +1,36 @@
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Greatest
+
+from .models import Question
+
+SEARCH_CONFIG = 'english'
+SEARCHED_FIELDS = ('text', 'unit', 'passage', 'explanation')
+
+# `text % query`, served by the gin_trgm_ops index on each question table. Registered on this
+# field only, so django.contrib.postgres need not be installed on other databases.
+Question._meta.get_field('text').register_lookup(TrigramSimilar)
+
+
+def search(queryset, query, fuzzy=False):
+    """Filter unified-store questions by a free-text ``query`` and order them by relevance.
+
+    On PostgreSQL this is a web-search style match on the weighted ``search_vector``, ranked with
+    ts_rank; ``fuzzy`` also admits questions whose text is trigram-similar to the query, which
+    catches typos. Other databases fall back to an unranked substring match.
+    """
+    if connection.vendor != 'postgresql':
+        condition = Q()
+        for field in SEARCHED_FIELDS:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition).annotate(rank=Value(0.0, output_field=FloatField())).order_by('uid')
+
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    rank = SearchRank(F('search_vector'), search_query)
+    condition = Q(search_vector=search_query)
+    if fuzzy:
+        condition |= Q(text__trigram_similar=query)
+        rank = Greatest(rank, TrigramSimilarity('text', query))
+    return queryset.filter(condition).annotate(rank=rank).order_by('-rank', 'uid')
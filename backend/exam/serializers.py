@@ -3,10 +3,53 @@ from .models import (
     SATExam, SATSection, SATModule, SATQuestion, SATExamSubmission,
     GREExam, GRESection, GREModule, GREQuestion, GREExamSubmission,
     GMATExam, GMATSection, GMATModule, GMATQuestion, GMATExamSubmission,
-    IELTSExam, IELTSSection, IELTSModule, IELTSQuestion, IELTSExamSubmission
+    IELTSExam, IELTSSection, IELTSModule, IELTSQuestion, IELTSExamSubmission,
+    Activity, Question
 )
+from . import passages
+
+
+class PassageField(serializers.Field):
+    """A question's passage, written as text.
+
+    It reads back as text, unless the serializer context has a ``passages`` set: then the digest of
+    the shared Passage is emitted and collected, so that a response can carry each text only once.
+    """
+    default_error_messages = {'invalid': 'Passage must be text.'}
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('allow_null', True)
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if self.context.get('passages') is not None:
+            return instance.passage_id
+        return instance.passage
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        return passages.build(data)
+
+    def to_representation(self, value):
+        if isinstance(value, str):
+            self.context['passages'].add(value)
+            return value
+        return value.text
+
+
+class PassageStoringMixin:
+    """Store the passage of a created or updated question before the question row refers to it."""
+
+    def save(self, **kwargs):
+        passages.store([self.validated_data.get('passage')])
+        return super().save(**kwargs)
+
+
+class BaseQuestionSerializer(PassageStoringMixin, serializers.ModelSerializer):
+    passage = PassageField()
 
-class BaseQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         abstract = True
         fields = ['id', 'text', 'question_type', 'passage', 'options', 'correct_answer', 'explanation', 'unit', 'order']
@@ -107,7 +150,9 @@ class GMATExamSubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = GMATExamSubmission
         fields = ['id', 'exam', 'user', 'verbal_score', 'quant_score', 'di_score', 'total_score', 'submitted_at']
-class IELTSQuestionSerializer(serializers.ModelSerializer):
+class IELTSQuestionSerializer(PassageStoringMixin, serializers.ModelSerializer):
+    passage = PassageField()
+
     class Meta:
         model = IELTSQuestion
         fields = ['id', 'text', 'passage', 'options', 'correct_answer', 'explanation', 'question_type', 'sub_type', 'unit', 'graph_description', 'image', 'set']
@@ -137,4 +182,36 @@ class IELTSExamSerializer(serializers.ModelSerializer):
 class IELTSExamSubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = IELTSExamSubmission
-        fields = ['id', 'exam', 'user', 'listening_score', 'reading_score', 'writing_score', 'speaking_score', 'overall_score', 'submitted_at']
\ No newline at end of file
+        fields = ['id', 'exam', 'user', 'listening_score', 'reading_score', 'writing_score', 'speaking_score', 'overall_score', 'submitted_at']
+
+class ActivitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Activity
+        fields = ['id', 'action', 'model_name', 'details', 'timestamp']
+
+class QuestionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Question
+        fields = [
+            'uid', 'exam_type', 'question_id', 'exam_id', 'section_id', 'section_name', 'module_id', 'module_difficulty',
+            'text', 'question_type', 'passage', 'options', 'correct_answer', 'explanation', 'unit', 'order', 'weight',
+        ]
+
+class QuestionSearchResultSerializer(QuestionSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(QuestionSerializer.Meta):
+        fields = QuestionSerializer.Meta.fields + ['rank']
+
+
+def prune_fields(serializer, fields=None, depth=None):
+    """Drop the fields not named in ``fields``, and nested serializers more than ``depth`` levels down."""
+    for name, field in list(serializer.fields.items()):
+        nested = getattr(field, 'child', field)
+        if fields is not None and name not in fields:
+            serializer.fields.pop(name)
+        elif depth is not None and isinstance(nested, serializers.BaseSerializer):
+            if depth <= 0:
+                serializer.fields.pop(name)
+            else:
+                prune_fields(nested, depth=depth - 1)
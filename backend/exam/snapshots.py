@@ -0,0 +1,118 @@
+import hashlib
+import json
+import time
+from collections import namedtuple
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from . import compression
+from .models import BaseExam, BaseSection, BaseModule, BaseQuestion
+
+# Per-process tier, checked first; its entries are keyed by version so they never go stale
+LOCAL_CACHE = 'exam_snapshots'
+# Shared tier holding the content versions and cached exam data for every worker
+SHARED_CACHE = 'default'
+
+# ``key`` is the cache key the snapshot is stored under; its encoded variants are cached next to it
+Snapshot = namedtuple('Snapshot', ['etag', 'body', 'key'], defaults=[None])
+
+
+def exam_key(instance):
+    """Return (exam model, exam id) for an exam or any section, module or question in its tree."""
+    if isinstance(instance, BaseExam):
+        return type(instance), instance.pk
+    if isinstance(instance, BaseSection):
+        return instance._meta.get_field('exam').related_model, instance.exam_id
+    if isinstance(instance, BaseModule):
+        return exam_key(instance.section)
+    if isinstance(instance, BaseQuestion):
+        return exam_key(instance.module)
+    return None
+
+
+def _version_key(exam_model, exam_id):
+    return f"exam-version:{exam_model._meta.label_lower}:{exam_id}"
+
+
+def current_version(exam_model, exam_id):
+    shared = caches[SHARED_CACHE]
+    key = _version_key(exam_model, exam_id)
+    version = shared.get(key)
+    if version is None:
+        # Never restart from a fixed value, or an evicted key could resurrect an old snapshot
+        shared.add(key, time.time_ns(), None)
+        version = shared.get(key)
+    return version
+
+
+def invalidate(*keys):
+    shared = caches[SHARED_CACHE]
+    for key in set(filter(None, keys)):
+        shared.set(_version_key(*key), time.time_ns(), None)
+
+
+def cache_key(kind, exam_model, exam_id):
+    version = current_version(exam_model, exam_id)
+    return f"exam-cache:{kind}:{exam_model._meta.label_lower}:{exam_id}:{version}"
+
+
+def get_cached(kind, exam_model, exam_id, build):
+    """Return ``build()`` for the exam's current content version, via the local then shared tier."""
+    return _get_or_build(cache_key(kind, exam_model, exam_id), build)
+
+
+def _get_or_build(key, build):
+    local = caches[LOCAL_CACHE]
+    value = local.get(key)
+    if value is not None:
+        return value
+
+    shared = caches[SHARED_CACHE]
+    value = shared.get(key)
+    if value is None:
+        value = build()
+        shared.set(key, value)
+    local.set(key, value)
+    return value
+
+
+def get_snapshot(kind, exam_model, exam_id, render):
+    key = cache_key(kind, exam_model, exam_id)
+
+    def build():
+        body = render()
+        return Snapshot(etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body=body, key=key)
+
+    return _get_or_build(key, build)
+
+
+def snapshot_response(request, snapshot):
+    """Serve a snapshot in the negotiated format and encoding, each variant built once per version.
+
+    DRF requests that negotiated the MessagePack renderer get the snapshot re-encoded as MessagePack;
+    the body is then compressed with the client's preferred Accept-Encoding.
+    """
+    content_type, body, etag, variant = 'application/json', snapshot.body, snapshot.etag, 'json'
+    renderer = getattr(request, 'accepted_renderer', None)
+    if snapshot.key and renderer is not None and renderer.format == 'msgpack':
+        content_type, etag, variant = renderer.media_type, compression.encoded_etag(etag, 'msgpack'), 'msgpack'
+        body = _get_or_build(f"{snapshot.key}:msgpack", lambda: renderer.render(json.loads(snapshot.body)))
+
+    encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING'))
+    if snapshot.key and encoding and len(body) >= compression.MIN_SIZE:
+        plain = body
+        body = _get_or_build(f"{snapshot.key}:{variant}:{encoding}", lambda: compression.compress(plain, encoding, snapshot=True))
+        etag = compression.encoded_etag(etag, encoding)
+    else:
+        encoding = None
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type=content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
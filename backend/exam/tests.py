@@ -1,3 +1,895 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Count
+from django.test import AsyncClient, TestCase
+from rest_framework.permissions import BasePermission
+from rest_framework.test import APIClient
+
+from exam_display.models import ExamDisplay
+from . import adaptive, audit, compression, duplicates, passages, views
+from .renderers import msgpack
+from .blueprints import build_structure
+from .models import Activity, ActivitySummary, DuplicatePair, Passage, Question, QuestionSignature, SATExam, SATSection, SATModule, SATQuestion, GMATExam, GMATModule, GMATQuestion
+
+User = get_user_model()
+
+
+def build_sat_tree(sections=100, modules_per_section=2, questions_per_module=10):
+    exam = SATExam.objects.create(name='Large SAT')
+    SATSection.objects.bulk_create(
+        SATSection(exam=exam, name='verbal', order=order) for order in range(1, sections + 1)
+    )
+    SATModule.objects.bulk_create(
+        SATModule(section=section, name='reading', duration=32, question_count=questions_per_module, order=order)
+        for section in exam.sections.all()
+        for order in range(1, modules_per_section + 1)
+    )
+    SATQuestion.objects.bulk_create(
+        SATQuestion(module=module, text=f'Question {order}', question_type='multiple-choice', order=order)
+        for module in SATModule.objects.filter(section__exam=exam)
+        for order in range(1, questions_per_module + 1)
+    )
+    return exam
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+class ExamTreeQueryPlanTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.exam = build_sat_tree()
+
+    def test_retrieve_loads_full_tree_in_constant_queries(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/sat-exams/{self.exam.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        sections = response.json()['sections']
+        self.assertEqual(len(sections), 100)
+        self.assertEqual(sum(len(module['questions']) for section in sections for module in section['modules']), 2000)
+
+    def test_list_loads_full_tree_in_constant_queries(self):
+        build_sat_tree(sections=5)
+
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/sat-exams/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_tree_is_ordered(self):
+        response = self.client.get(f'/api/sat-exams/{self.exam.id}/')
+
+        section_orders = [section['order'] for section in response.json()['sections']]
+        self.assertEqual(section_orders, sorted(section_orders))
+        question_orders = [question['order'] for question in response.json()['sections'][0]['modules'][0]['questions']]
+        self.assertEqual(question_orders, list(range(1, 11)))
+
+
+class BankListTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.exam = build_sat_tree(sections=3, modules_per_section=2, questions_per_module=10)
+
+    def test_question_list_is_cursor_paginated_on_order_and_id(self):
+        seen = []
+        url = '/api/sat-questions/?limit=25'
+        while url:
+            with self.assertNumQueries(1):
+                page = self.client.get(url).data
+            self.assertLessEqual(len(page['results']), 25)
+            seen += [(question['order'], question['id']) for question in page['results']]
+            url = page['next']
+
+        self.assertEqual(len(seen), 60)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_pages_step_through_more_than_a_thousand_tied_rows(self):
+        SATSection.objects.bulk_create(SATSection(exam=self.exam, name='math', order=1) for _ in range(1100))
+        expected = list(SATSection.objects.order_by('order', 'id').values_list('id', flat=True))
+
+        seen, pages = [], []
+        url = '/api/sat-sections/?limit=500&depth=0'
+        while url:
+            page = self.client.get(url).data
+            seen += [section['id'] for section in page['results']]
+            pages.append(page)
+            url = page['next']
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+        previous = self.client.get(pages[2]['previous']).data
+        self.assertEqual([section['id'] for section in previous['results']], expected[500:1000])
+        self.assertIsNone(self.client.get(previous['previous']).data['previous'])
+
+    def test_malformed_cursor_values_are_not_found(self):
+        for position in (['x', 1], [{'a': 1}, 1], [None, 1], [True, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps({'p': position}).encode()).decode()
+            self.assertEqual(self.client.get('/api/sat-questions/', {'cursor': cursor}).status_code, 404, position)
+        cursor = base64.urlsafe_b64encode(json.dumps({'p': ['sat', 'x']}).encode()).decode()
+        self.assertEqual(self.client.get('/api/questions/', {'cursor': cursor}).status_code, 404)
+
+    def test_sparse_fields_load_only_those_columns(self):
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get('/api/sat-questions/?fields=id,text')
+
+        self.assertEqual(set(response.data['results'][0]), {'id', 'text'})
+        self.assertNotIn('explanation', queries.captured_queries[0]['sql'])
+
+    def test_depth_limits_the_exam_tree_and_its_prefetches(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/sat-exams/?depth=1')
+
+        section = response.data['results'][0]['sections'][0]
+        self.assertNotIn('modules', section)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/sat-exams/{self.exam.id}/?fields=id,name')
+        self.assertEqual(response.data, {'id': self.exam.id, 'name': 'Large SAT'})
+
+    def test_depth_applies_to_nested_section_lists(self):
+        response = self.client.get('/api/sat-sections/?depth=1&fields=id,modules')
+
+        module = response.data['results'][0]['modules'][0]
+        self.assertEqual(set(response.data['results'][0]), {'id', 'modules'})
+        self.assertNotIn('questions', module)
+
+
+class ExamSnapshotTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.exam = build_sat_tree(sections=2, modules_per_section=1, questions_per_module=3)
+        self.url = f'/api/sat-exams/{self.exam.id}/'
+
+    def test_repeat_retrieve_is_served_from_snapshot(self):
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_question_change_invalidates_snapshot(self):
+        etag = self.client.get(self.url)['ETag']
+        question = SATQuestion.objects.filter(module__section__exam=self.exam).first()
+
+        self.client.patch(f'/api/sat-questions/{question.id}/', {'text': 'Rewritten'}, format='json')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn(b'Rewritten', response.content)
+
+    def test_deleted_exam_is_not_served_from_snapshot(self):
+        self.client.get(self.url)
+
+        self.client.delete(self.url)
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_equivalent_ids_share_one_snapshot(self):
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/sat-exams/0{self.exam.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/sat-exams/latest/').status_code, 404)
+
+    def test_object_permissions_are_checked_on_every_retrieve(self):
+        class NoExams(BasePermission):
+            def has_object_permission(self, request, view, obj):
+                return False
+
+        self.client.force_authenticate(User.objects.create_user(username='author', email='author@example.com', password='pass12345'))
+        self.client.get(self.url)
+        with mock.patch.object(views.SATExamViewSet, 'permission_classes', [NoExams]):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 403)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.exam = build_sat_tree(sections=2, modules_per_section=2, questions_per_module=10)
+        self.url = f'/api/sat-exams/{self.exam.id}/'
+
+    def test_snapshot_variants_are_compressed_once(self):
+        plain = self.client.get(self.url)
+
+        first = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(first.content), plain.content)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(first['ETag'], compression.encoded_etag(plain['ETag'], 'gzip'))
+        self.assertIn('Accept-Encoding', first['Vary'])
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_dynamic_responses_are_compressed_by_middleware(self):
+        response = self.client.get('/api/sat-questions/', {'limit': 40}, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['results']), 40)
+        # Random padding varies the compressed bytes between identical responses
+        repeats = [self.client.get('/api/sat-questions/', {'limit': 40}, HTTP_ACCEPT_ENCODING='gzip') for _ in range(5)]
+        self.assertEqual({gzip.decompress(repeat.content) for repeat in repeats}, {gzip.decompress(response.content)})
+        self.assertGreater(len({repeat.content for repeat in repeats}), 1)
+        self.assertIsNone(compression.negotiate('br', compression.PADDED_CODECS))
+        small = self.client.get('/api/sat-questions/', {'limit': 1, 'fields': 'id'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    def test_negotiation_follows_quality_then_preference(self):
+        self.assertEqual(compression.negotiate('gzip;q=0.5, br, zstd;q=0'), 'br' if 'br' in compression.CODECS else 'gzip')
+        self.assertEqual(compression.negotiate('*'), next(iter(compression.CODECS)))
+        self.assertIsNone(compression.negotiate('gzip;q=0, identity'))
+        self.assertIsNone(compression.negotiate(None))
+
+    @skipUnless(msgpack, "msgpack is not installed")
+    def test_snapshot_is_served_as_messagepack(self):
+        plain = self.client.get(self.url)
+
+        response = self.client.get(self.url, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(plain.content))
+
+
+PASSAGE = 'The committee met at dawn.\nIts members argued over the river crossing until noon.'
+
+
+class SharedPassageTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.exam = build_sat_tree(sections=1, modules_per_section=1, questions_per_module=0)
+        self.module = SATModule.objects.get(section__exam=self.exam)
+
+    def create(self, text, passage):
+        return self.client.post('/api/sat-questions/', {
+            'module': self.module.id, 'text': text, 'passage': passage, 'question_type': 'multiple-choice',
+        }, format='json')
+
+    def test_questions_share_one_stored_passage(self):
+        first = self.create('Q1', PASSAGE)
+        self.create('Q2', PASSAGE.replace('\n', '\r\n') + '\n')
+        self.create('Q3', '')
+
+        self.assertEqual(first.data['passage'], PASSAGE)
+        self.assertEqual(Passage.objects.count(), 1)
+        self.assertEqual(SATQuestion.objects.filter(passage__text=PASSAGE).count(), 2)
+        self.assertEqual(Question.objects.get(uid=f"sat:{first.data['id']}").passage, PASSAGE)
+
+    def test_exam_payload_carries_each_passage_once(self):
+        for number in range(3):
+            self.create(f'Q{number}', PASSAGE)
+
+        response = self.client.get(f'/api/sat-exams/{self.exam.id}/')
+
+        digest = Passage.objects.get().digest
+        questions = response.json()['sections'][0]['modules'][0]['questions']
+        self.assertEqual({question['passage'] for question in questions}, {digest})
+        self.assertEqual(response.json()['passages'], {digest: PASSAGE})
+        self.assertEqual(response.content.count(b'river crossing'), 1)
+        self.assertEqual(self.client.get('/api/sat-exams/').data['passages'], {digest: PASSAGE})
+
+    def test_import_stores_passages_per_batch_and_prune_drops_unused(self):
+        rows = [
+            json.dumps({'module': self.module.id, 'text': f'Q{number}', 'question_type': 'math', 'passage': PASSAGE})
+            for number in range(5)
+        ]
+        self.client.post('/api/sat-questions/import/', {'file': SimpleUploadedFile('set.jsonl', '\n'.join(rows).encode())}, format='multipart')
+        self.assertEqual(Passage.objects.count(), 1)
+
+        SATQuestion.objects.filter(module=self.module).update(passage=None)
+        out = StringIO()
+        call_command('prune_passages', stdout=out)
+
+        self.assertIn('Deleted 1 unused passages', out.getvalue())
+        self.assertFalse(Passage.objects.exists())
+
+
+class ExamBlueprintTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+
+    def test_create_structure_uses_constant_queries(self):
+        exam = SATExam.objects.create(name='Blueprint SAT')
+
+        # exam lookup, savepoint, two INSERTs, release savepoint
+        with self.assertNumQueries(5):
+            response = self.client.post(f'/api/sat-exams/{exam.id}/create_structure/')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(SATModule.objects.filter(section__exam=exam).order_by('section__order', 'order').values_list('name', flat=True)),
+            ['reading_standard', 'writing_standard', 'math1_standard', 'math2_standard'],
+        )
+
+    def test_clone_copies_full_tree(self):
+        exam = build_sat_tree(sections=3, modules_per_section=2, questions_per_module=4)
+
+        # Questions are copied in chunks, the last one partial
+        with mock.patch('exam.blueprints.QUESTION_BATCH_SIZE', 10):
+            response = self.client.post(f'/api/sat-exams/{exam.id}/clone/', {'name': 'Copy'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        clone = SATExam.objects.get(id=response.data['id'])
+        self.assertEqual(clone.name, 'Copy')
+        self.assertEqual(clone.sections.count(), 3)
+        self.assertEqual(SATQuestion.objects.filter(module__section__exam=clone).count(), 24)
+        self.assertEqual(SATQuestion.objects.filter(module__section__exam=exam).count(), 24)
+
+    def test_provision_creates_exams_with_structure(self):
+        response = self.client.post('/api/gmat-exams/provision/', {'count': 50}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['ids']), 50)
+        self.assertEqual(GMATModule.objects.filter(section__exam_id__in=response.data['ids']).count(), 150)
+
+    def test_provision_rejects_invalid_count(self):
+        response = self.client.post('/api/gmat-exams/provision/', {'count': 0}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class QuestionImportTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.exam = build_sat_tree(sections=1, modules_per_section=1, questions_per_module=0)
+        self.module = SATModule.objects.get(section__exam=self.exam)
+
+    def upload(self, name, content, **extra):
+        return self.client.post(
+            '/api/sat-questions/import/',
+            {'file': SimpleUploadedFile(name, content.encode()), **extra},
+            format='multipart',
+        )
+
+    def test_jsonl_import_reports_row_errors_without_aborting(self):
+        lines = [
+            json.dumps({'module': self.module.id, 'text': 'Q1', 'question_type': 'multiple-choice', 'options': {'A': '1'}}),
+            'not json',
+            json.dumps({'module': 999999, 'text': 'Q2', 'question_type': 'multiple-choice'}),
+            json.dumps({'module': self.module.id, 'text': 'Q3', 'question_type': 'unknown'}),
+            json.dumps({'module': self.module.id, 'text': 'Q4', 'question_type': 'math', 'order': 4}),
+        ]
+
+        response = self.upload('bank.jsonl', '\n'.join(lines))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+        self.assertEqual(SATQuestion.objects.filter(module=self.module).count(), 2)
+
+    def test_csv_import_inserts_in_batches_with_one_activity_per_batch(self):
+        rows = ['module,text,question_type,options']
+        rows += [f'{self.module.id},Question {number},multiple-choice,"{{""A"": ""x""}}"' for number in range(2500)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload('bank.csv', '\n'.join(rows))
+
+        self.assertEqual(response.data['created'], 2500)
+        self.assertEqual(SATQuestion.objects.filter(module=self.module, options={'A': 'x'}).count(), 2500)
+        self.assertEqual(Activity.objects.filter(action='Imported SAT Question').count(), 3)
+
+    def test_undecodable_bytes_end_the_import_with_a_row_error(self):
+        lines = [json.dumps({'module': self.module.id, 'text': f'Question {number}', 'question_type': 'math'}) for number in range(500)]
+        content = '\n'.join(lines).encode() + b'\n\xff\xfe{"text": "Latin-1"}\n'
+
+        response = self.client.post(
+            '/api/sat-questions/import/', {'file': SimpleUploadedFile('bank.jsonl', content)}, format='multipart'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.data['created'], 0)
+        self.assertEqual(response.data['created'], SATQuestion.objects.filter(module=self.module).count())
+        self.assertEqual(response.data['errors'], [{
+            'row': response.data['created'] + 1,
+            'errors': {'non_field_errors': ['File is not valid UTF-8; rows from here on were not read.']},
+        }])
+
+    def test_missing_file_is_rejected(self):
+        response = self.client.post('/api/sat-questions/import/', {}, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+
+
+STEM = 'A train leaves the station at noon travelling east at sixty miles per hour while a second train leaves'
+
+
+class DuplicateDetectionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.exam = build_sat_tree(sections=1, modules_per_section=1, questions_per_module=0)
+        self.module = SATModule.objects.get(section__exam=self.exam)
+
+    def create(self, text, passage=''):
+        response = self.client.post('/api/sat-questions/', {
+            'module': self.module.id, 'text': text, 'passage': passage, 'question_type': 'multiple-choice',
+        }, format='json')
+        return response.data['id']
+
+    def test_created_and_imported_questions_are_clustered(self):
+        first = self.create(f'{STEM} one hour later travelling west. When are they 300 miles apart?')
+        self.create('Which word best describes the tone of the passage?')
+        rows = [
+            json.dumps({'module': self.module.id, 'text': f'{STEM} one hour later travelling west. When are they 360 miles apart?', 'question_type': 'math'}),
+            json.dumps({'module': self.module.id, 'text': 'Solve for x.', 'question_type': 'math'}),
+        ]
+        self.client.post(
+            '/api/sat-questions/import/', {'file': SimpleUploadedFile('bank.jsonl', '\n'.join(rows).encode())}, format='multipart'
+        )
+
+        response = self.client.get('/api/questions/duplicates/')
+
+        self.assertEqual(len(response.data['results']), 1)
+        cluster = response.data['results'][0]
+        self.assertEqual(cluster['size'], 2)
+        self.assertGreaterEqual(cluster['similarity'], duplicates.SIMILARITY_THRESHOLD)
+        self.assertEqual(cluster['questions'][0]['uid'], f'sat:{first}')
+        self.assertEqual(self.client.get('/api/questions/duplicates/', {'exam_type': 'gmat'}).data['results'], [])
+
+    def test_edits_and_deletes_update_the_index(self):
+        first = self.create(f'{STEM} later.')
+        second = self.create(f'{STEM} later!')
+        self.assertEqual(DuplicatePair.objects.count(), 1)
+
+        self.client.patch(f'/api/sat-questions/{second}/', {'text': 'Something else entirely'}, format='json')
+        self.assertEqual(DuplicatePair.objects.count(), 0)
+
+        self.client.patch(f'/api/sat-questions/{second}/', {'text': f'{STEM} later?'}, format='json')
+        self.client.delete(f'/api/sat-questions/{first}/')
+        self.assertFalse(QuestionSignature.objects.filter(uid=f'sat:{first}').exists())
+        self.assertEqual(DuplicatePair.objects.count(), 0)
+
+    def test_similar_lookup_reads_matching_buckets_only(self):
+        question = self.create(STEM, passage='Trains and their timetables.')
+        for number in range(20):
+            self.create(f'Unrelated question number {number} about geometry')
+
+        with self.assertNumQueries(2):
+            matches = duplicates.similar(STEM, 'Trains and their timetables')
+        self.assertEqual(matches, [(f'sat:{question}', 1.0)])
+
+        response = self.client.post(
+            '/api/questions/similar/', {'text': STEM, 'passage': 'Trains and their timetables.'}, format='json'
+        )
+        self.assertEqual([result['question_id'] for result in response.data['results']], [question])
+
+    def test_questions_sharing_a_passage_are_not_duplicates(self):
+        passage = ' '.join(f'Paragraph {number} of a long reading passage about railway history.' for number in range(30))
+        original = self.create('Which choice best states the main purpose of the passage?', passage=passage)
+        self.create('As used in line 12, "track" most nearly means', passage=passage)
+        self.create('Which choice best states the main purpose of the passage?', passage='A short poem about the sea.')
+        self.assertEqual(DuplicatePair.objects.count(), 0)
+
+        repeated = self.create('Which choice best states the main purpose of the passage?', passage=passage)
+        pair = DuplicatePair.objects.get()
+        self.assertEqual({pair.first_id, pair.second_id}, {f'sat:{original}', f'sat:{repeated}'})
+
+    def test_prune_drops_signatures_of_questions_deleted_in_bulk(self):
+        kept = self.create(f'{STEM} later.')
+        deleted = self.create(f'{STEM} later!')
+        SATQuestion.objects.filter(id=deleted).delete()
+
+        self.assertEqual(duplicates.prune(), 1)
+        self.assertEqual(list(QuestionSignature.objects.values_list('uid', flat=True)), [f'sat:{kept}'])
+
+    def test_rebuild_command_indexes_existing_questions(self):
+        SATQuestion.objects.bulk_create(
+            SATQuestion(module=self.module, text=f'{STEM} {suffix}', question_type='math') for suffix in ('today', 'today.')
+        )
+        out = StringIO()
+
+        call_command('find_duplicates', '--rebuild', stdout=out)
+
+        self.assertIn('1 duplicate pairs found', out.getvalue())
+        self.assertIn('1 duplicate clusters', out.getvalue())
+
+
+class GMATAdaptiveTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user(username='gmat', email='gmat@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.exam = GMATExam.objects.create(name='Adaptive GMAT')
+        build_structure(self.exam)
+        module = GMATModule.objects.filter(section__exam=self.exam).first()
+        # Weights spread difficulty from easy (0.1) to hard (10)
+        self.questions = GMATQuestion.objects.bulk_create(
+            GMATQuestion(module=module, text=f'Q{index}', question_type='multiple-choice', correct_answer='A',
+                         weight=10 ** ((index - 10) / 10), order=index)
+            for index in range(21)
+        )
+        self.url = f'/api/gmat-exams/{self.exam.id}/submit_answer/'
+
+    def submit(self, question_id, answer):
+        return self.client.post(self.url, {'question_id': question_id, 'answer': answer}, format='json')
+
+    def test_correct_answers_route_to_harder_questions(self):
+        start = self.questions[10]
+
+        first = self.submit(start.id, 'A').data
+        second = self.submit(first['id'], 'A').data
+
+        weights = dict(GMATQuestion.objects.values_list('id', 'weight'))
+        self.assertGreater(weights[first['id']], weights[start.id])
+        self.assertGreater(weights[second['id']], weights[first['id']])
+
+    def test_wrong_answers_route_to_easier_questions(self):
+        start = self.questions[10]
+
+        following = self.submit(start.id, 'B').data
+
+        weights = dict(GMATQuestion.objects.values_list('id', 'weight'))
+        self.assertLess(weights[following['id']], weights[start.id])
+
+    def test_answering_never_writes_question_rows(self):
+        before = list(GMATQuestion.objects.order_by('id').values_list('weight', flat=True))
+        self.submit(self.questions[10].id, 'A')
+
+        # exam lookup, next question; the item pool is already loaded
+        with self.assertNumQueries(2):
+            self.submit(self.questions[0].id, 'B')
+
+        self.assertEqual(list(GMATQuestion.objects.order_by('id').values_list('weight', flat=True)), before)
+
+    def test_questions_are_not_repeated(self):
+        seen = set()
+        question_id = self.questions[10].id
+        for _ in range(len(self.questions) - 1):
+            seen.add(question_id)
+            question_id = self.submit(question_id, 'A').data['id']
+            self.assertNotIn(question_id, seen)
+
+        self.assertEqual(self.submit(question_id, 'A').data['message'], 'No more questions available')
+
+    def test_change_answer_is_limited(self):
+        question_id = self.questions[10].id
+        self.submit(question_id, 'B')
+        change_url = f'/api/gmat-exams/{self.exam.id}/change_answer/'
+
+        statuses = [
+            self.client.post(change_url, {'question_id': question_id, 'new_answer': 'A'}, format='json').status_code
+            for _ in range(4)
+        ]
+
+        self.assertEqual(statuses, [200, 200, 200, 400])
+
+    def test_changing_a_question_removed_since_is_rejected(self):
+        question = self.questions[10]
+        self.submit(question.id, 'B')
+        self.client.delete(f'/api/gmat-questions/{question.id}/')
+
+        response = self.client.post(
+            f'/api/gmat-exams/{self.exam.id}/change_answer/', {'question_id': question.id, 'new_answer': 'A'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_new_sitting_starts_without_earlier_answers(self):
+        display = ExamDisplay.objects.create(gmat_exam=self.exam)
+        self.submit(self.questions[10].id, 'A')
+
+        self.client.post(f'/api/exam-displays/{display.id}/start_session/')
+
+        self.assertEqual(adaptive.AdaptiveSession.load(self.exam.id, self.user.pk).responses, {})
+
+
+class ModuleRoutingTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.exam = SATExam.objects.create(name='Routed SAT')
+        self.section = SATSection.objects.create(exam=self.exam, name='math', order=1)
+        self.first = SATModule.objects.create(section=self.section, name='math1', duration=35, question_count=10, order=1, difficulty='standard')
+        self.easy = SATModule.objects.create(section=self.section, name='math2', duration=35, question_count=10, order=2, difficulty='easy')
+        self.hard = SATModule.objects.create(section=self.section, name='math2', duration=35, question_count=10, order=2, difficulty='hard')
+        self.url = f'/api/sat-exams/{self.exam.id}/get_next_module/'
+
+    def next_module(self, **params):
+        return self.client.get(self.url, {'section_id': self.section.id, **params})
+
+    def test_routes_by_previous_score(self):
+        self.assertEqual(self.next_module().data['id'], self.first.id)
+        self.assertEqual(self.next_module(previous_module_id=self.first.id, previous_score=9).data['id'], self.hard.id)
+        self.assertEqual(self.next_module(previous_module_id=self.first.id, previous_score=1).data['id'], self.easy.id)
+
+    def test_no_later_stage_returns_not_found(self):
+        response = self.next_module(previous_module_id=self.hard.id, previous_score=9)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_transitions_are_served_from_cache(self):
+        self.next_module()
+
+        with self.assertNumQueries(0):
+            response = self.next_module(previous_module_id=self.first.id, previous_score=9)
+
+        self.assertEqual(response.data['id'], self.hard.id)
+
+    def test_equivalent_ids_share_the_routing_table(self):
+        self.next_module()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/sat-exams/0{self.exam.id}/get_next_module/', {'section_id': self.section.id})
+
+        self.assertEqual(response.data['id'], self.first.id)
+        self.assertEqual(self.client.get('/api/sat-exams/first/get_next_module/', {'section_id': 1}).status_code, 404)
+
+    def test_routes_join_passages_into_the_question_prefetch(self):
+        for number in range(5):
+            passage = passages.build(f'Passage number {number}.')
+            passages.store([passage])
+            SATQuestion.objects.create(module=self.first, text=f'Q{number}', question_type='math', passage=passage)
+
+        # exam, sections, modules, questions with their passages
+        with self.assertNumQueries(4):
+            response = self.next_module()
+
+        self.assertEqual(response.data['questions'][0]['passage'], 'Passage number 0.')
+
+    def test_module_change_rebuilds_routes(self):
+        self.next_module()
+
+        self.client.patch(f'/api/sat-modules/{self.hard.id}/', {'difficulty': 'medium'}, format='json')
+        response = self.next_module(previous_module_id=self.first.id, previous_score=9)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_section_returns_not_found(self):
+        response = self.client.get(self.url, {'section_id': 0})
+
+        self.assertEqual(response.status_code, 404)
+
+    async def test_async_view_shares_the_routing_table(self):
+        client = AsyncClient()
+        url = f'/api/async/sat-exams/{self.exam.id}/get_next_module/'
+
+        response = await client.get(url, {'section_id': self.section.id, 'previous_module_id': self.first.id, 'previous_score': 9})
+
+        self.assertEqual(response.json()['id'], self.hard.id)
+        self.assertEqual((await client.get(url, {'section_id': 0})).status_code, 404)
+        self.assertEqual((await client.get(f'/api/async/sat-exams/0/get_next_module/', {'section_id': 1})).status_code, 404)
+
+
+class ExamStatsTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+
+    def test_stats_are_read_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/exam-stats/')
+
+        self.assertEqual(response.data, {
+            'exam_counts': {'SAT': 0, 'GRE': 0, 'GMAT': 0, 'IELTS': 0},
+            'total_questions': 0,
+        })
+
+    def test_counters_follow_api_and_bulk_writes(self):
+        self.client.post('/api/sat-exams/', {'name': 'Counted'}, format='json')
+        self.client.post('/api/gre-exams/provision/', {'count': 3}, format='json')
+        exam = SATExam.objects.get(name='Counted')
+        self.client.post(f'/api/sat-exams/{exam.id}/create_structure/')
+        module = SATModule.objects.filter(section__exam=exam).first()
+        for number in range(4):
+            self.client.post('/api/sat-questions/', {'module': module.id, 'text': f'Q{number}', 'question_type': 'math'}, format='json')
+        self.client.post(f'/api/sat-exams/{exam.id}/clone/', format='json')
+
+        stats = self.client.get('/api/exam-stats/').data
+        self.assertEqual(stats['exam_counts'], {'SAT': 2, 'GRE': 3, 'GMAT': 0, 'IELTS': 0})
+        self.assertEqual(stats['total_questions'], 8)
+
+        self.client.delete(f'/api/sat-exams/{exam.id}/')
+
+        stats = self.client.get('/api/exam-stats/').data
+        self.assertEqual(stats['exam_counts']['SAT'], 1)
+        self.assertEqual(stats['total_questions'], 4)
+
+    def test_reconcile_corrects_drift(self):
+        build_sat_tree(sections=1, modules_per_section=1, questions_per_module=5)
+
+        call_command('reconcile_counters', stdout=StringIO())
+
+        stats = self.client.get('/api/exam-stats/').data
+        self.assertEqual((stats['exam_counts']['SAT'], stats['total_questions']), (1, 5))
+
+    def test_exam_breakdown(self):
+        exam = build_sat_tree(sections=2, modules_per_section=1, questions_per_module=3)
+
+        breakdown = self.client.get('/api/exam-stats/', {'exam_type': 'sat', 'exam_id': exam.id}).data['breakdown']
+
+        self.assertEqual([section['questions'] for section in breakdown['questions_per_section']], [3, 3])
+        self.assertEqual(breakdown['difficulty_distribution'], {'medium': 6})
+
+
+class AuditLogTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.client = APIClient()
+        self.exam = build_sat_tree(sections=1, modules_per_section=1, questions_per_module=1)
+        self.module = SATModule.objects.get(section__exam=self.exam)
+
+    def test_request_activities_are_written_together_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/sat-questions/', {'module': self.module.id, 'text': 'New', 'question_type': 'math'}, format='json')
+
+        activity = Activity.objects.get()
+        self.assertEqual(activity.action, 'Created SAT Question')
+        self.assertEqual(activity.details, "SAT Question 'Question: New...' was created")
+
+    def test_formatting_does_not_walk_foreign_keys(self):
+        question = SATQuestion.objects.get(module=self.module)
+
+        with self.assertNumQueries(0):
+            audit.describe(question)
+
+    def test_buffered_scope_writes_once(self):
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            with audit.buffered():
+                for number in range(5):
+                    audit.record('Test', f'entry {number}')
+
+        self.assertEqual(Activity.objects.filter(action='Test').count(), 5)
+
+    def test_rolled_back_activities_are_discarded(self):
+        with self.captureOnCommitCallbacks(execute=True), audit.buffered():
+            audit.record('Test', 'kept')
+            try:
+                with transaction.atomic():
+                    audit.record('Test', 'rolled back')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(list(Activity.objects.filter(action='Test').values_list('details', flat=True)), ['kept'])
+
+    def test_full_queue_applies_back_pressure(self):
+        flusher = audit.BackgroundFlusher(max_queue=2, put_timeout=0)
+        for number in range(3):
+            flusher.put(Activity(action='Test', details=f'entry {number}'))
+
+        self.assertEqual(Activity.objects.filter(action='Test').count(), 3)
+        self.assertTrue(flusher.queue.empty())
+
+
+class ActivityFeedTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        start = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        Activity.objects.bulk_create(
+            Activity(
+                action='Created SAT Exam' if number % 2 else 'Deleted GRE Question',
+                model_name='SAT Exam' if number % 2 else 'GRE Question',
+                details=f'entry {number}',
+                timestamp=start + timedelta(hours=number // 3),
+            )
+            for number in range(30)
+        )
+
+    def test_feed_pages_by_cursor_without_gaps(self):
+        seen = []
+        url = '/api/activities/?limit=7'
+        while url:
+            page = self.client.get(url).json()
+            seen.extend(item['id'] for item in page['results'])
+            url = page['next']
+
+        expected = list(Activity.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_feed_filters_by_action_and_model(self):
+        by_action = self.client.get('/api/activities/', {'action': 'Created SAT Exam'}).json()['results']
+        by_model = self.client.get('/api/activities/', {'model': 'GRE Question'}).json()['results']
+
+        self.assertEqual(len(by_action), 15)
+        self.assertTrue(all(item['model_name'] == 'SAT Exam' for item in by_action))
+        self.assertEqual(len(by_model), 15)
+
+    def test_compaction_rolls_old_activities_into_daily_summaries(self):
+        recent = Activity.objects.create(action='Created SAT Exam', model_name='SAT Exam', details='recent')
+
+        call_command('compact_activities', '--keep-months', '1', stdout=StringIO())
+        call_command('compact_activities', '--keep-months', '1', stdout=StringIO())
+
+        self.assertEqual(list(Activity.objects.values_list('id', flat=True)), [recent.id])
+        summaries = ActivitySummary.objects.order_by('action')
+        self.assertEqual(
+            [(summary.day.isoformat(), summary.action, summary.count) for summary in summaries],
+            [('2026-01-01', 'Created SAT Exam', 15), ('2026-01-01', 'Deleted GRE Question', 15)],
+        )
+
+
+class UnifiedQuestionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.sat = build_sat_tree(sections=2, modules_per_section=1, questions_per_module=3)
+        self.gmat = GMATExam.objects.create(name='GMAT')
+        build_structure(self.gmat)
+        GMATQuestion.objects.bulk_create(
+            GMATQuestion(module=module, text=f'{module.name} question', question_type='multiple-choice', correct_answer='B')
+            for module in GMATModule.objects.filter(section__exam=self.gmat)
+        )
+
+    def test_view_covers_every_exam_type(self):
+        counts = dict(Question.objects.values_list('exam_type').annotate(count=Count('uid')).order_by())
+
+        self.assertEqual(counts, {'sat': SATQuestion.objects.count(), 'gmat': GMATQuestion.objects.count()})
+        question = Question.objects.get(uid=f'sat:{SATQuestion.objects.first().id}')
+        self.assertEqual((question.exam_id, question.section_name), (self.sat.id, 'verbal'))
+
+    def test_cross_exam_listing_is_one_query_per_page(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/questions/', {'exam_type': 'GMAT', 'limit': 2})
+
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertTrue(all(item['exam_type'] == 'gmat' and item['correct_answer'] == 'B' for item in response.data['results']))
+        self.assertIsNotNone(response.data['next'])
+
+    def test_listing_pages_in_exam_type_and_numeric_id_order(self):
+        SATQuestion.objects.bulk_create(
+            SATQuestion(module=SATModule.objects.filter(section__exam=self.sat).first(), text='More', question_type='math')
+            for _ in range(5)
+        )
+        seen, url, params = [], '/api/questions/', {'limit': 4}
+        while url:
+            response = self.client.get(url, params)
+            seen += [(item['exam_type'], item['question_id']) for item in response.data['results']]
+            url, params = response.data['next'], None
+
+        self.assertEqual(seen, sorted(Question.objects.values_list('exam_type', 'question_id')))
+
+    def test_search_ranks_matches_and_applies_filters(self):
+        SATQuestion.objects.filter(module__section__exam=self.sat, order=2).update(explanation='Solve the quadratic equation')
+
+        response = self.client.get('/api/questions/search/', {'q': 'quadratic', 'exam_type': 'sat', 'limit': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        result = response.data['results'][0]
+        self.assertEqual((result['exam_type'], result['order']), ('sat', 2))
+        self.assertIn('rank', result)
+        response = self.client.get('/api/questions/search/', {'q': 'quadratic', 'exam_type': 'gmat'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_search_requires_a_query(self):
+        response = self.client.get('/api/questions/search/', {'q': ' '})
+
+        self.assertEqual(response.status_code, 400)
@@ -5,7 +5,7 @@ from .views import (
     GREExamViewSet, GRESectionViewSet, GREModuleViewSet, GREQuestionViewSet,
     GMATExamViewSet, GMATSectionViewSet, GMATModuleViewSet, GMATQuestionViewSet,
     IELTSExamViewSet, IELTSSectionViewSet, IELTSModuleViewSet, IELTSQuestionViewSet,
-        exam_stats, recent_activities, recent_activities
+        ActivityViewSet, QuestionViewSet, EXAM_VIEWSETS, async_get_next_module, exam_stats, recent_activities
 )
 
 router = DefaultRouter()
@@ -26,6 +26,8 @@ router.register(r'ielts-exams', IELTSExamViewSet)
 router.register(r'ielts-sections', IELTSSectionViewSet)
 router.register(r'ielts-modules', IELTSModuleViewSet)
 router.register(r'ielts-questions', IELTSQuestionViewSet)
+router.register(r'activities', ActivityViewSet, basename='activity')
+router.register(r'questions', QuestionViewSet, basename='question')
 
 
 urlpatterns = [
@@ -44,5 +46,10 @@ urlpatterns = [
     path('ielts-modules/<int:pk>/add-question/', IELTSModuleViewSet.as_view({'post': 'add_question'}), name='add-ielts-question'),
     path('exam-stats/', exam_stats, name='exam-stats'),
     path('recent-activities/', recent_activities, name='recent-activities'),
+]
 
-]
\ No newline at end of file
+# ASGI-native variants of the candidate-facing endpoints
+urlpatterns += [
+    path(f'async/{exam_type}-exams/<int:pk>/get_next_module/', async_get_next_module, {'exam_type': exam_type}, name=f'async-{exam_type}-next-module')
+    for exam_type in EXAM_VIEWSETS
+]
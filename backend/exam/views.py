@@ -1,46 +1,219 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action, api_view
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
-from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Prefetch
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
 from .models import (
     SATExam, SATSection, SATModule, SATQuestion, SATExamSubmission,
     GREExam, GRESection, GREModule, GREQuestion, GREExamSubmission,
     GMATExam, GMATSection, GMATModule, GMATQuestion, GMATExamSubmission,
     IELTSExam, IELTSSection, IELTSModule, IELTSQuestion, IELTSExamSubmission,
-    Activity
+    Activity, Question
 )
 from .serializers import (
     SATExamSerializer, SATSectionSerializer, SATModuleSerializer, SATQuestionSerializer, SATExamSubmissionSerializer,
     GREExamSerializer, GRESectionSerializer, GREModuleSerializer, GREQuestionSerializer, GREExamSubmissionSerializer,
     GMATExamSerializer, GMATSectionSerializer, GMATModuleSerializer, GMATQuestionSerializer, GMATExamSubmissionSerializer,
-    IELTSExamSerializer, IELTSSectionSerializer, IELTSModuleSerializer, IELTSQuestionSerializer, IELTSExamSubmissionSerializer
+    IELTSExamSerializer, IELTSSectionSerializer, IELTSModuleSerializer, IELTSQuestionSerializer, IELTSExamSubmissionSerializer,
+    ActivitySerializer, QuestionSerializer, QuestionSearchResultSerializer, prune_fields
 )
+from . import adaptive, audit, blueprints, counters, duplicates, imports, passages, routing, search, snapshots
+from .async_api import async_api_view
+from .pagination import KeysetPagination
+from student_dashboard import analytics, read_model
 
 class ActivityLoggingMixin:
     activity_model_name = "Unknown"
 
     def perform_create(self, serializer):
-        instance = serializer.save()
-        Activity.objects.create(
+        instance = serializer.save(**self.get_create_kwargs())
+        snapshots.invalidate(snapshots.exam_key(instance))
+        counters.increment(type(instance))
+        audit.record(
             action=f"Created {self.activity_model_name}",
-            details=f"{self.activity_model_name} '{instance}' was created"
+            model_name=self.activity_model_name,
+            details=f"{self.activity_model_name} '{audit.describe(instance)}' was created"
         )
 
     def perform_update(self, serializer):
+        previous_exam = snapshots.exam_key(serializer.instance)
         instance = serializer.save()
-        Activity.objects.create(
+        snapshots.invalidate(previous_exam, snapshots.exam_key(instance))
+        audit.record(
             action=f"Updated {self.activity_model_name}",
-            details=f"{self.activity_model_name} '{instance}' was updated"
+            model_name=self.activity_model_name,
+            details=f"{self.activity_model_name} '{audit.describe(instance)}' was updated"
         )
 
     def perform_destroy(self, instance):
-        Activity.objects.create(
+        exam = snapshots.exam_key(instance)
+        audit.record(
             action=f"Deleted {self.activity_model_name}",
-            details=f"{self.activity_model_name} '{instance}' was deleted"
+            model_name=self.activity_model_name,
+            details=f"{self.activity_model_name} '{audit.describe(instance)}' was deleted"
+        )
+        _, deleted = instance.delete()
+        snapshots.invalidate(exam)
+        counters.apply({label: -count for label, count in deleted.items()})
+
+    def get_create_kwargs(self):
+        return {}
+
+class BankPagination(KeysetPagination):
+    # Keyset pagination on (order, id), served by the *_order_idx indexes
+    ordering = ('order', 'id')
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 500
+
+class ExamPagination(BankPagination):
+    ordering = ('id',)
+
+class SparseFieldsMixin:
+    """``?fields=a,b`` keeps only the named fields and ``?depth=n`` drops nested lists below n levels."""
+    sparse_actions = ('list', 'retrieve')
+
+    def requested_fields(self):
+        if self.action not in self.sparse_actions or not self.request.query_params.get('fields'):
+            return None
+        return {name.strip() for name in self.request.query_params['fields'].split(',') if name.strip()}
+
+    def requested_depth(self):
+        depth = self.request.query_params.get('depth', '') if self.action in self.sparse_actions else ''
+        return int(depth) if depth.isdigit() else None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.requested_fields()
+        if fields:
+            # Only load the requested columns, plus what the cursor needs
+            columns = {field.name for field in queryset.model._meta.concrete_fields}
+            ordering = [name.lstrip('-') for name in self.pagination_class.ordering]
+            queryset = queryset.only(*(fields & columns), 'id', *ordering)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields, depth = self.requested_fields(), self.requested_depth()
+        if fields is not None or depth is not None:
+            prune_fields(getattr(serializer, 'child', serializer), fields, depth)
+        return serializer
+
+class BankViewSet(SparseFieldsMixin, ActivityLoggingMixin, viewsets.ModelViewSet):
+    pagination_class = BankPagination
+
+class BaseExamViewSet(BankViewSet):
+    # Actions that serialize the full sections -> modules -> questions tree
+    tree_actions = ('list', 'retrieve')
+    max_provision_count = 1000
+    pagination_class = ExamPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.tree_actions:
+            queryset = queryset.prefetch_related(*self.get_tree_prefetches()[:self.tree_levels()])
+        return queryset
+
+    def tree_levels(self):
+        """How many of the sections, modules and questions levels the response includes."""
+        fields, depth = self.requested_fields(), self.requested_depth()
+        if fields is not None and 'sections' not in fields:
+            return 0
+        return 3 if depth is None else min(depth, 3)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in self.tree_actions and self.tree_levels() == 3:
+            # Questions refer to their passages by digest; the texts are sent once, under "passages"
+            context['passages'] = self.passage_refs = set()
+        return context
+
+    def add_passages(self, response):
+        if self.tree_levels() == 3:
+            response.data['passages'] = passages.texts(self.passage_refs)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.add_passages(super().list(request, *args, **kwargs))
+
+    def get_tree_prefetches(self, passage_texts=False):
+        # One query per level, regardless of how many sections/modules an exam has. Serializers without
+        # a ``passages`` context read each question's passage text, which is then joined in
+        questions = self.question_model.objects.order_by('order', 'id')
+        if passage_texts:
+            questions = questions.select_related('passage')
+        return [
+            Prefetch('sections', queryset=self.section_model.objects.order_by('order', 'id')),
+            Prefetch('sections__modules', queryset=self.module_model.objects.order_by('order', 'id')),
+            Prefetch('sections__modules__questions', queryset=questions),
+        ]
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.requested_fields() is not None or self.requested_depth() is not None or self.checks_object_permissions():
+            return self.add_passages(super().retrieve(request, *args, **kwargs))
+        # A snapshot hit never loads the exam, which is safe while no permission decides per object:
+        # check_permissions already ran in initial() and the body is the same for every requester
+        snapshot = snapshots.get_snapshot('detail', self.queryset.model, self.exam_id(kwargs['pk']), self.render_exam)
+        return snapshots.snapshot_response(request, snapshot)
+
+    def exam_id(self, pk):
+        """The exam id in a URL as an int, so that "7" and "07" share one cached entry."""
+        try:
+            return int(pk)
+        except (TypeError, ValueError):
+            raise Http404
+
+    def checks_object_permissions(self):
+        return any(
+            type(permission).has_object_permission is not BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        )
+
+    def render_exam(self):
+        serializer = self.get_serializer(self.get_object())
+        return JSONRenderer().render({**serializer.data, 'passages': passages.texts(self.passage_refs)})
+
+    @action(detail=True, methods=['post'])
+    def create_structure(self, request, pk=None):
+        exam = self.get_object()
+        blueprints.build_structure(exam)
+        snapshots.invalidate(snapshots.exam_key(exam))
+        return Response({"message": f"{exam.exam_type.upper()} exam structure created successfully"}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        exam = self.get_object()
+        clone = blueprints.clone_exam(exam, name=request.data.get('name'))
+        audit.record(
+            action=f"Cloned {self.activity_model_name}",
+            model_name=self.activity_model_name,
+            details=f"{self.activity_model_name} '{exam}' was cloned as '{clone}'"
+        )
+        return Response({"id": clone.id, "name": clone.name}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def provision(self, request):
+        try:
+            count = int(request.data.get('count', 0))
+        except (TypeError, ValueError):
+            count = 0
+        if not 0 < count <= self.max_provision_count:
+            return Response({"error": f"count must be between 1 and {self.max_provision_count}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        prefix = request.data.get('name_prefix') or f"{self.activity_model_name} Practice"
+        exams = blueprints.provision_exams(self.queryset.model, (f"{prefix} {number}" for number in range(1, count + 1)))
+        audit.record(
+            action=f"Provisioned {self.activity_model_name}",
+            model_name=self.activity_model_name,
+            details=f"{len(exams)} {self.activity_model_name} practice exams were provisioned"
         )
-        instance.delete()
+        return Response({"ids": [exam.id for exam in exams]}, status=status.HTTP_201_CREATED)
 
-class BaseExamViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def submit_exam(self, request, pk=None):
         exam = self.get_object()
@@ -58,39 +231,69 @@ class BaseExamViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
             total_score=total_score,
             **{score: scores[score] for score in self.required_scores}
         )
-        
+        read_model.submission_created(submission)
+        analytics.record_submission(submission)
+
         serializer = self.submission_serializer(submission)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['get'])
     def get_next_module(self, request, pk=None):
-        exam = self.get_object()
-        user = request.user
-        section_id = request.query_params.get('section_id')
-        previous_module_id = request.query_params.get('previous_module_id')
-        previous_score = request.query_params.get('previous_score')
+        data, status_code = self.next_module(self.get_routes(pk), request.query_params)
+        return Response(data, status=status_code)
+
+    def next_module(self, routes, params):
+        """Pick the next module from an exam's routing table; returns (response data, status)."""
+        section_id = params.get('section_id')
+        previous_module_id = params.get('previous_module_id')
+        previous_score = params.get('previous_score')
 
         if not section_id:
-            return Response({"error": "Section ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+            return {"error": "Section ID is required"}, status.HTTP_400_BAD_REQUEST
 
-        section = exam.sections.get(id=section_id)
-        
-        if previous_module_id and previous_score:
-            previous_module = section.modules.get(id=previous_module_id)
-            next_difficulty = self.determine_next_difficulty(int(previous_score), previous_module.question_count)
+        try:
+            section_id = int(section_id)
+            previous_module_id = int(previous_module_id) if previous_module_id else None
+            previous_score = int(previous_score) if previous_score else None
+        except ValueError:
+            return {"error": "Section ID, module ID and score must be integers"}, status.HTTP_400_BAD_REQUEST
+
+        section_routes = routes['sections'].get(section_id)
+        if section_routes is None:
+            return {"error": "Section not found"}, status.HTTP_404_NOT_FOUND
+
+        after_order = 0
+        if previous_module_id and previous_score is not None:
+            previous_module = routes['modules'].get(previous_module_id)
+            if previous_module is None or previous_module['section'] != section_id:
+                return {"error": "Module not found"}, status.HTTP_404_NOT_FOUND
+            next_difficulty = self.determine_next_difficulty(previous_score, previous_module['question_count'])
+            # Multi-stage sections: only modules of a later stage are candidates
+            after_order = previous_module['order']
         else:
             next_difficulty = 'standard'
 
-        next_module = section.modules.filter(difficulty=next_difficulty).first()
+        next_module_id = routing.next_module_id(section_routes, next_difficulty, after_order)
 
-        if not next_module:
-            next_module = section.modules.filter(difficulty='standard').first()
+        if not next_module_id:
+            next_module_id = routing.next_module_id(section_routes, 'standard', after_order)
 
-        if not next_module:
-            return Response({"message": "No more modules available"}, status=status.HTTP_404_NOT_FOUND)
+        if not next_module_id:
+            return {"message": "No more modules available"}, status.HTTP_404_NOT_FOUND
 
-        serializer = self.get_module_serializer()(next_module)
-        return Response(serializer.data)
+        return routes['modules'][next_module_id]['data'], status.HTTP_200_OK
+
+    def get_routes(self, pk):
+        # Independent of the request, so the async view can share the cached table
+        pk = self.exam_id(pk)
+
+        def build():
+            exam = get_object_or_404(
+                self.queryset.model.objects.prefetch_related(*self.get_tree_prefetches(passage_texts=True)), pk=pk
+            )
+            return routing.build_routes(exam, self.get_module_serializer())
+
+        return snapshots.get_cached('routes', self.queryset.model, pk, build)
 
     def determine_next_difficulty(self, previous_score, question_count):
         score_percentage = (previous_score / question_count) * 100
@@ -104,7 +307,14 @@ class BaseExamViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
     def get_module_serializer(self):
         raise NotImplementedError("Subclasses must implement this method")
 
-class BaseQuestionViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
+class BaseQuestionViewSet(BankViewSet):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.requested_fields()
+        if fields is None or 'passage' in fields:
+            queryset = queryset.select_related('passage')
+        return queryset
+
     def create(self, request, *args, **kwargs):
         module_id = request.data.get('module')
         if not module_id:
@@ -117,12 +327,38 @@ class BaseQuestionViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer, request)
+        self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-    def perform_create(self, serializer, request):
-        serializer.save(module_id=request.data.get('module'))
+    def get_create_kwargs(self):
+        return {'module_id': self.request.data.get('module')}
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        duplicates.index_questions([serializer.instance])
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        duplicates.index_questions([serializer.instance])
+
+    def perform_destroy(self, instance):
+        duplicates.remove(instance)
+        super().perform_destroy(instance)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_questions(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "A CSV or JSONL file is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('file_format') or imports.detect_format(upload.name)
+        if file_format not in imports.FORMATS:
+            return Response({"error": f"Unsupported format '{file_format}'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = imports.read_rows(imports.open_upload(upload), file_format)
+        question_import = imports.QuestionImport(self.get_serializer_class(), self.activity_model_name).run(rows)
+        return Response(question_import.summary())
 
     def get_module_model(self):
         raise NotImplementedError("Subclasses must implement this method")
@@ -130,25 +366,14 @@ class BaseQuestionViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
 class SATExamViewSet(BaseExamViewSet):
     queryset = SATExam.objects.all()
     serializer_class = SATExamSerializer
+    section_model = SATSection
+    module_model = SATModule
+    question_model = SATQuestion
     submission_model = SATExamSubmission
     submission_serializer = SATExamSubmissionSerializer
     required_scores = ['verbal_score', 'math_score']
     activity_model_name = "SAT Exam"
 
-    @action(detail=True, methods=['post'])
-    def create_structure(self, request, pk=None):
-        exam = self.get_object()
-        
-        verbal_section = SATSection.objects.create(exam=exam, name='verbal', order=1)
-        SATModule.objects.create(section=verbal_section, name='reading_standard', duration=32, question_count=27, order=1, difficulty='standard')
-        SATModule.objects.create(section=verbal_section, name='writing_standard', duration=32, question_count=27, order=2, difficulty='standard')
-        
-        math_section = SATSection.objects.create(exam=exam, name='math', order=2)
-        SATModule.objects.create(section=math_section, name='math1_standard', duration=35, question_count=22, order=1, difficulty='standard')
-        SATModule.objects.create(section=math_section, name='math2_standard', duration=35, question_count=22, order=2, difficulty='standard')
-        
-        return Response({"message": "SAT exam structure created successfully"}, status=status.HTTP_201_CREATED)
-
     def calculate_total_score(self, scores):
         reading_writing_score = scores['verbal_score']
         math_score = scores['math_score']
@@ -161,25 +386,14 @@ class SATExamViewSet(BaseExamViewSet):
 class GREExamViewSet(BaseExamViewSet):
     queryset = GREExam.objects.all()
     serializer_class = GREExamSerializer
+    section_model = GRESection
+    module_model = GREModule
+    question_model = GREQuestion
     submission_model = GREExamSubmission
     submission_serializer = GREExamSubmissionSerializer
     required_scores = ['verbal_score', 'math_score']
     activity_model_name = "GRE Exam"
 
-    @action(detail=True, methods=['post'])
-    def create_structure(self, request, pk=None):
-        exam = self.get_object()
-        
-        verbal_section = GRESection.objects.create(exam=exam, name='verbal', order=1)
-        GREModule.objects.create(section=verbal_section, name='verbal1_standard', duration=18, question_count=12, order=1, difficulty='standard')
-        GREModule.objects.create(section=verbal_section, name='verbal2_standard', duration=23, question_count=15, order=2, difficulty='standard')
-        
-        math_section = GRESection.objects.create(exam=exam, name='math', order=2)
-        GREModule.objects.create(section=math_section, name='math1_standard', duration=21, question_count=22, order=1, difficulty='standard')
-        GREModule.objects.create(section=math_section, name='math2_standard', duration=26, question_count=22, order=2, difficulty='standard')
-        
-        return Response({"message": "GRE exam structure created successfully"}, status=status.HTTP_201_CREATED)
-
     def calculate_total_score(self, scores):
         total_scaled_score = scores['verbal_score'] + scores['math_score']
         return round(260 + ((total_scaled_score - 260) / 80) * 80)
@@ -190,34 +404,14 @@ class GREExamViewSet(BaseExamViewSet):
 class GMATExamViewSet(BaseExamViewSet):
     queryset = GMATExam.objects.all()
     serializer_class = GMATExamSerializer
+    section_model = GMATSection
+    module_model = GMATModule
+    question_model = GMATQuestion
     submission_model = GMATExamSubmission
     submission_serializer = GMATExamSubmissionSerializer
     required_scores = ['verbal_score', 'quant_score', 'di_score']
     activity_model_name = "GMAT Exam"
 
-    @action(detail=True, methods=['post'])
-    def create_structure(self, request, pk=None):
-        exam = self.get_object()
-    
-        sections = [
-            ('verbal', 'Verbal', 23, 45),
-            ('quant', 'Quantitative', 21, 45),
-            ('di', 'Data Interpretation', 20, 45)
-        ]
-    
-        for order, (name, display_name, question_count, duration) in enumerate(sections, start=1):
-            section = GMATSection.objects.create(exam=exam, name=name, order=order)
-            GMATModule.objects.create(
-                section=section,
-                name=f"{display_name}",
-                duration=duration,
-                question_count=question_count,
-                order=1,
-                difficulty='standard'
-            )
-    
-        return Response({"message": "GMAT exam structure created successfully"}, status=status.HTTP_201_CREATED)
-
     def calculate_total_score(self, scores):
         total_scaled_score = scores['verbal_score'] + scores['quant_score'] + scores['di_score']
         return round(205 + ((total_scaled_score - 60) / 30) * 600)
@@ -231,20 +425,25 @@ class GMATExamViewSet(BaseExamViewSet):
         
         if not question_id or not answer:
             return Response({"error": "Question ID and answer are required"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        question = GMATQuestion.objects.get(id=question_id)
-        is_correct = answer == question.correct_answer
-        
-        # Update question weight based on correctness
-        if is_correct:
-            question.weight *= 1.2
-        else:
-            question.weight *= 0.8
-        question.save()
-        
-        # Get next question based on updated weights
-        next_question = GMATQuestion.objects.filter(module__section__exam=exam).order_by('-weight').first()
-        
+
+        pool = adaptive.get_pool(exam.id)
+        try:
+            question_id = int(question_id)
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid question ID"}, status=status.HTTP_400_BAD_REQUEST)
+        if question_id not in pool:
+            return Response({"error": "Question does not belong to this exam"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Ability lives in the candidate's session state; shared question rows are never written
+        session = adaptive.AdaptiveSession.load(exam.id, user.pk)
+        session.record(pool, question_id, answer)
+        session.save()
+
+        next_question_id = session.next_question_id(pool)
+        if next_question_id is None:
+            return Response({"message": "No more questions available", "ability": session.ability})
+
+        next_question = GMATQuestion.objects.get(id=next_question_id)
         serializer = GMATQuestionSerializer(next_question)
         return Response(serializer.data)
 
@@ -257,28 +456,25 @@ class GMATExamViewSet(BaseExamViewSet):
         
         if not question_id or not new_answer:
             return Response({"error": "Question ID and new answer are required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        pool = adaptive.get_pool(exam.id)
+        session = adaptive.AdaptiveSession.load(exam.id, user.pk)
+        try:
+            question_id = int(question_id)
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid question ID"}, status=status.HTTP_400_BAD_REQUEST)
+        # The exam may have been edited since the question was answered
+        if question_id not in pool:
+            return Response({"error": "Question does not belong to this exam"}, status=status.HTTP_400_BAD_REQUEST)
+        if question_id not in session.responses:
+            return Response({"error": "Question has not been answered"}, status=status.HTTP_400_BAD_REQUEST)
         
-        submission = GMATExamSubmission.objects.get(exam=exam, user=user)
-        
-        if submission.changes_made >= 3:
+        if session.changes_made >= 3:
             return Response({"error": "Maximum number of answer changes reached"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Logic to change the answer
-        question = GMATQuestion.objects.get(id=question_id)
-        old_answer = submission.answers.get(question_id, None)
-        submission.answers[question_id] = new_answer
-        submission.save()
-        
-        # Update question weight if the answer was changed from incorrect to correct or vice versa
-        if old_answer != new_answer:
-            if new_answer == question.correct_answer:
-                question.weight *= 1.2
-            else:
-                question.weight *= 0.8
-            question.save()
-        
-        submission.changes_made += 1
-        submission.save()
+
+        session.record(pool, question_id, new_answer)
+        session.changes_made += 1
+        session.save()
         
         return Response({"message": "Answer changed successfully"}, status=status.HTTP_200_OK)
 
@@ -288,28 +484,14 @@ class GMATExamViewSet(BaseExamViewSet):
 class IELTSExamViewSet(BaseExamViewSet):
     queryset = IELTSExam.objects.all()
     serializer_class = IELTSExamSerializer
+    section_model = IELTSSection
+    module_model = IELTSModule
+    question_model = IELTSQuestion
     submission_model = IELTSExamSubmission
     submission_serializer = IELTSExamSubmissionSerializer
     required_scores = ['listening_score', 'reading_score', 'writing_score', 'speaking_score']
     activity_model_name = "IELTS Exam"
 
-    @action(detail=True, methods=['post'])
-    def create_structure(self, request, pk=None):
-        exam = self.get_object()
-        
-        sections = [
-            ('listening', 'Listening'),
-            ('reading', 'Reading'),
-            ('writing', 'Writing'),
-            ('speaking', 'Speaking')
-        ]
-        
-        for order, (name, display_name) in enumerate(sections, start=1):
-            section = IELTSSection.objects.create(exam=exam, name=name, order=order)
-            IELTSModule.objects.create(section=section, name=f"{display_name}_standard", duration=60, question_count=40, order=1, difficulty='standard')
-        
-        return Response({"message": "IELTS exam structure created successfully"}, status=status.HTTP_201_CREATED)
-
     def calculate_total_score(self, scores):
         total_score = sum(scores.values()) / len(scores)
         return round(total_score * 2) / 2  # Round to nearest 0.5
@@ -317,12 +499,12 @@ class IELTSExamViewSet(BaseExamViewSet):
     def get_module_serializer(self):
         return IELTSModuleSerializer
 
-class SATSectionViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
+class SATSectionViewSet(BankViewSet):
     queryset = SATSection.objects.all()
     serializer_class = SATSectionSerializer
     activity_model_name = "SAT Section"
 
-class SATModuleViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
+class SATModuleViewSet(BankViewSet):
     queryset = SATModule.objects.all()
     serializer_class = SATModuleSerializer
     activity_model_name = "SAT Module"
@@ -335,12 +517,12 @@ class SATQuestionViewSet(BaseQuestionViewSet):
     def get_module_model(self):
         return SATModule
 
-class GRESectionViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
+class GRESectionViewSet(BankViewSet):
     queryset = GRESection.objects.all()
     serializer_class = GRESectionSerializer
     activity_model_name = "GRE Section"
 
-class GREModuleViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
+class GREModuleViewSet(BankViewSet):
     queryset = GREModule.objects.all()
     serializer_class = GREModuleSerializer
     activity_model_name = "GRE Module"
@@ -353,12 +535,12 @@ class GREQuestionViewSet(BaseQuestionViewSet):
     def get_module_model(self):
         return GREModule
 
-class GMATSectionViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
+class GMATSectionViewSet(BankViewSet):
     queryset = GMATSection.objects.all()
     serializer_class = GMATSectionSerializer
     activity_model_name = "GMAT Section"
 
-class GMATModuleViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
+class GMATModuleViewSet(BankViewSet):
     queryset = GMATModule.objects.all()
     serializer_class = GMATModuleSerializer
     activity_model_name = "GMAT Module"
@@ -371,12 +553,12 @@ class GMATQuestionViewSet(BaseQuestionViewSet):
     def get_module_model(self):
         return GMATModule
 
-class IELTSSectionViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
+class IELTSSectionViewSet(BankViewSet):
     queryset = IELTSSection.objects.all()
     serializer_class = IELTSSectionSerializer
     activity_model_name = "IELTS Section"
 
-class IELTSModuleViewSet(ActivityLoggingMixin, viewsets.ModelViewSet):
+class IELTSModuleViewSet(BankViewSet):
     queryset = IELTSModule.objects.all()
     serializer_class = IELTSModuleSerializer
     activity_model_name = "IELTS Module"
@@ -389,31 +571,126 @@ class IELTSQuestionViewSet(BaseQuestionViewSet):
     def get_module_model(self):
         return IELTSModule
 
+EXAM_VIEWSETS = {'sat': SATExamViewSet, 'gre': GREExamViewSet, 'gmat': GMATExamViewSet, 'ielts': IELTSExamViewSet}
+
+@async_api_view(['GET'], login_required=False)
+async def async_get_next_module(request, exam_type, pk):
+    viewset = EXAM_VIEWSETS[exam_type]()
+    routes = await sync_to_async(viewset.get_routes)(pk)
+    data, status_code = viewset.next_module(routes, request.GET)
+    return JsonResponse(data, status=status_code)
+
 @api_view(['GET'])
 def exam_stats(request):
-    exam_counts = {
-        'SAT': SATExam.objects.count(),
-        'GRE': GREExam.objects.count(),
-        'GMAT': GMATExam.objects.count(),
-        'IELTS': IELTSExam.objects.count()
-    }
-    total_questions = (
-        SATQuestion.objects.count() +
-        GREQuestion.objects.count() +
-        GMATQuestion.objects.count() +
-        IELTSQuestion.objects.count()
-    )
-    
-    stats = {
-        'exam_counts': exam_counts,
-        'total_questions': total_questions
-    }
+    stats = counters.read()
+
+    exam_type = request.query_params.get('exam_type', '').upper()
+    exam_id = request.query_params.get('exam_id')
+    if exam_type and exam_id:
+        if exam_type not in counters.EXAM_MODELS or not exam_id.isdigit():
+            return Response({"error": "Unknown exam"}, status=status.HTTP_400_BAD_REQUEST)
+        stats['breakdown'] = snapshots.get_cached(
+            'breakdown', counters.EXAM_MODELS[exam_type], int(exam_id),
+            lambda: counters.exam_breakdown(exam_type, int(exam_id)),
+        )
     
     return Response(stats)
 
+class ActivityFeedPagination(CursorPagination):
+    # Keyset pagination on (timestamp, id), served by exam_activity_feed_idx
+    ordering = ('-timestamp', '-id')
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
+
+class ActivityViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    serializer_class = ActivitySerializer
+    pagination_class = ActivityFeedPagination
+
+    def get_queryset(self):
+        queryset = Activity.objects.all()
+        action_name = self.request.query_params.get('action')
+        if action_name:
+            queryset = queryset.filter(action=action_name)
+        model_name = self.request.query_params.get('model')
+        if model_name:
+            queryset = queryset.filter(model_name=model_name)
+        return queryset
+
+class QuestionPagination(KeysetPagination):
+    # exam_type is a constant in each branch of the view and question_id that table's primary key,
+    # so a page only scans the primary key range of the branches past the cursor; uid is computed
+    # text, unindexed and ordered "sat:10" before "sat:9"
+    ordering = ('exam_type', 'question_id')
+    page_size = 100
+
+class QuestionViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Questions of every exam type from the unified store, for cross-exam reporting."""
+    serializer_class = QuestionSerializer
+    pagination_class = QuestionPagination
+    filter_params = {
+        'exam_type': 'exam_type',
+        'exam_id': 'exam_id',
+        'section': 'section_name',
+        'difficulty': 'module_difficulty',
+        'question_type': 'question_type',
+        'unit': 'unit',
+    }
+    max_search_results = 100
+
+    def get_queryset(self):
+        filters = {}
+        for param, field in self.filter_params.items():
+            value = self.request.query_params.get(param)
+            if value:
+                filters[field] = value.lower() if param == 'exam_type' else value
+        if 'exam_id' in filters and not filters['exam_id'].isdigit():
+            return Question.objects.none()
+        return Question.objects.filter(**filters)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search, e.g. ?q=quadratic+equations&exam_type=sat&fuzzy=1; takes the list filters too."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "A search query (q) is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), self.max_search_results)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({"error": "limit and offset must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        fuzzy = request.query_params.get('fuzzy', '').lower() in ('1', 'true')
+        results = search.search(self.get_queryset(), query, fuzzy)[offset:offset + limit]
+        return Response({"results": QuestionSearchResultSerializer(results, many=True).data})
+
+    @action(detail=False, methods=['get'])
+    def duplicates(self, request):
+        """Near-duplicate clusters, e.g. ?exam_type=sat&min_similarity=0.9."""
+        try:
+            min_similarity = float(request.query_params.get('min_similarity', duplicates.SIMILARITY_THRESHOLD))
+        except ValueError:
+            return Response({"error": "min_similarity must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        exam_type = request.query_params.get('exam_type', '').lower() or None
+        return Response({"results": duplicates.clusters(exam_type, min_similarity)})
+
+    @action(detail=False, methods=['post'])
+    def similar(self, request):
+        """Indexed questions resembling a draft {text, passage}, checked before it is saved."""
+        text = request.data.get('text', '')
+        if not isinstance(text, str) or not text.strip():
+            return Response({"error": "Question text is required"}, status=status.HTTP_400_BAD_REQUEST)
+        matches = dict(duplicates.similar(text, request.data.get('passage') or ''))
+        questions = Question.objects.filter(duplicates.uid_filter(matches))
+        results = [
+            {**QuestionSerializer(question).data, 'similarity': matches[question.uid]}
+            for question in questions
+        ]
+        return Response({"results": sorted(results, key=lambda result: (-result['similarity'], result['uid']))})
+
 @api_view(['GET'])
 def recent_activities(request):
-    activities = Activity.objects.order_by('-timestamp')[:10]  # Get last 10 activities
+    activities = Activity.objects.order_by('-timestamp', '-id')[:10]  # Get last 10 activities
     
     activity_list = [
         {
@@ -0,0 +1,184 @@
+import glob
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import (
+    EXAM_TYPES, QUESTION_MODELS, ExamSession, UserAnswer, delete_long_texts, save_long_texts, session_answers,
+)
+
+SHEET_TIMEOUT = 6 * 60 * 60
+
+
+def persist(session_id, exam_type, answers, question_types=None):
+    """Upsert ``{question id: answer}`` into UserAnswer for one session.
+
+    ``question_types`` maps question ids to their type and is looked up when not given.
+    """
+    if question_types is None:
+        question_types = dict(
+            QUESTION_MODELS[EXAM_TYPES[exam_type - 1]].objects.filter(id__in=answers).values_list('id', 'question_type')
+        )
+    user_answers, long_texts = [], {}
+    for question_id, answer in answers.items():
+        user_answer = UserAnswer(exam_session_id=session_id, exam_type=exam_type, question_id=question_id)
+        long_text = user_answer.set_answer(answer, question_types.get(question_id))
+        if long_text is not None:
+            long_texts[question_id] = long_text
+        user_answers.append(user_answer)
+    UserAnswer.objects.bulk_create(
+        user_answers,
+        update_conflicts=True,
+        unique_fields=['exam_session', 'exam_type', 'question_id'],
+        update_fields=['choice', 'text', 'has_long_text', 'is_correct'],
+    )
+    save_long_texts(session_id, exam_type, long_texts)
+    delete_long_texts(session_id, exam_type, [question_id for question_id in answers if question_id not in long_texts])
+
+
+def _cache_key(session_id):
+    return f"answer-sheet:{session_id}"
+
+
+def _journal_path(session_id):
+    return os.path.join(settings.ANSWER_JOURNAL_DIR, f"{session_id}.log")
+
+
+def _append_journal(session_id, exam_type, answers):
+    os.makedirs(settings.ANSWER_JOURNAL_DIR, exist_ok=True)
+    line = json.dumps({'exam_type': exam_type, 'answers': answers}) + '\n'
+    with open(_journal_path(session_id), 'a', encoding='utf-8') as journal:
+        journal.write(line)
+        journal.flush()
+        os.fsync(journal.fileno())
+
+
+def _read_journal(paths):
+    """Replay journal files in order; returns (exam_type, {question id: answer})."""
+    exam_type, answers = None, {}
+    for path in paths:
+        try:
+            journal = open(path, encoding='utf-8')
+        except FileNotFoundError:
+            # Retired by a flush or discard since it was listed
+            continue
+        with journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write; its request never got a response
+                    continue
+                exam_type = entry['exam_type']
+                answers.update({int(question_id): answer for question_id, answer in entry['answers'].items()})
+    return exam_type, answers
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _journal_files(session_id):
+    # Files left by an interrupted flush come first, then the live journal
+    pending = sorted(glob.glob(os.path.join(settings.ANSWER_JOURNAL_DIR, f"{session_id}.*.flushing")))
+    live = _journal_path(session_id)
+    return pending + ([live] if os.path.exists(live) else [])
+
+
+def journaled_sessions():
+    """Ids of the sessions that have answers not yet persisted to UserAnswer."""
+    names = glob.glob(os.path.join(settings.ANSWER_JOURNAL_DIR, '*.log'))
+    names += glob.glob(os.path.join(settings.ANSWER_JOURNAL_DIR, '*.flushing'))
+    return sorted({int(os.path.basename(name).split('.')[0]) for name in names})
+
+
+def load(session_id, exam_type):
+    """Return the cached sheet for a session, rebuilding it from UserAnswer and the journal if needed."""
+    state = cache.get(_cache_key(session_id))
+    if state is None:
+        _, journaled = _read_journal(_journal_files(session_id))
+        answers = session_answers(session_id)
+        answers.update(journaled)
+        state = {'exam_type': exam_type, 'answers': answers, 'dirty': set(journaled), 'flushed_at': time.time()}
+        cache.set(_cache_key(session_id), state, SHEET_TIMEOUT)
+    return state
+
+
+def answers(session_id, exam_type):
+    return load(session_id, exam_type)['answers']
+
+
+def record(session_id, exam_type, new_answers):
+    """Put answers on the session's sheet; they reach UserAnswer on the next flush.
+
+    The journal is appended (and fsynced) before returning, so a lost cache or crashed worker
+    never loses an acknowledged answer.
+    """
+    state = load(session_id, exam_type)
+    state['answers'].update(new_answers)
+    state['dirty'].update(new_answers)
+    cache.set(_cache_key(session_id), state, SHEET_TIMEOUT)
+    _append_journal(session_id, exam_type, {str(question_id): answer for question_id, answer in new_answers.items()})
+
+    if len(state['dirty']) >= settings.ANSWER_FLUSH_SIZE or time.time() - state['flushed_at'] >= settings.ANSWER_FLUSH_INTERVAL:
+        flush(session_id)
+
+
+def flush(session_id):
+    """Write a session's unsaved answers to UserAnswer and retire the journal entries they came from.
+
+    The live journal is renamed before the sheet is read, so answers recorded while the flush is
+    running land in a fresh journal and are never deleted unsaved. Flushes of one session are
+    serialised on its ExamSession row, and the journal directory must be on a single host or a
+    volume shared by every worker, since whichever worker flushes replays the files of the others.
+    """
+    with transaction.atomic():
+        ExamSession.objects.select_for_update().filter(id=session_id).exists()
+        live = _journal_path(session_id)
+        try:
+            os.replace(live, os.path.join(settings.ANSWER_JOURNAL_DIR, f"{session_id}.{time.time_ns()}.flushing"))
+        except FileNotFoundError:
+            pass
+        paths = [path for path in _journal_files(session_id) if path != live]
+
+        exam_type, pending = _read_journal(paths)
+        state = cache.get(_cache_key(session_id))
+        if state is not None:
+            exam_type = state['exam_type']
+            pending.update({question_id: state['answers'][question_id] for question_id in state['dirty']})
+        if pending:
+            persist(session_id, exam_type, pending)
+
+    # Re-read the sheet: answers recorded during the flush stay dirty unless they were the ones saved
+    state = cache.get(_cache_key(session_id))
+    if state is not None:
+        state['dirty'] = {
+            question_id for question_id in state['dirty']
+            if question_id not in pending or state['answers'][question_id] != pending[question_id]
+        }
+        state['flushed_at'] = time.time()
+        cache.set(_cache_key(session_id), state, SHEET_TIMEOUT)
+    for path in paths:
+        _remove(path)
+    return len(pending)
+
+
+def discard(session_id):
+    """Drop a sheet and its journal without saving, e.g. once its session has been deleted."""
+    cache.delete(_cache_key(session_id))
+    for path in _journal_files(session_id):
+        _remove(path)
+
+
+def close(session_id):
+    """Flush and drop the sheet when a session ends."""
+    saved = flush(session_id)
+    cache.delete(_cache_key(session_id))
+    return saved
@@ -0,0 +1,273 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+import weakref
+
+from django.db.models import Max
+from django.utils import timezone
+
+from exam import snapshots
+from .models import QUESTION_MODELS, ExamDisplay, ExamSession
+
+TICK_INTERVAL = 5.0
+END_CHECK_INTERVAL = 5.0
+QUEUE_SIZE = 32
+
+
+def build_timeline(exam_type, exam_id):
+    """Consecutive stages of an exam as [{section, module_order, starts_at, ends_at}] in seconds.
+
+    Adaptive variants of a stage share one slot, timed by the longest of them. The offsets lay the
+    stages end to end from the start of the session, which is when each one starts at the latest;
+    a candidate who answers a later module's question moves on to it early (see advance), and its
+    timer then runs from that moment. The session deadline stays the sum of all the stages.
+    """
+    module_model = QUESTION_MODELS[exam_type]._meta.get_field('module').related_model
+    rows = (
+        module_model.objects.filter(section__exam_id=exam_id)
+        .values('section__order', 'section__name', 'order')
+        .annotate(duration=Max('duration'))
+        .order_by('section__order', 'section__name', 'order')
+    )
+    stages = []
+    offset = 0
+    for row in rows:
+        stages.append({
+            'section': row['section__name'],
+            'module_order': row['order'],
+            'starts_at': offset,
+            'ends_at': offset + row['duration'] * 60,
+        })
+        offset += row['duration'] * 60
+    return stages
+
+
+def exam_timeline(exam_display):
+    exam_type = exam_display.exam_type
+    exam_model = ExamDisplay._meta.get_field(f'{exam_type}_exam').related_model
+    return snapshots.get_cached(
+        'timeline', exam_model, exam_display.exam_id, lambda: build_timeline(exam_type, exam_display.exam_id)
+    )
+
+
+def session_timeline(session):
+    return exam_timeline(session.exam_display)
+
+
+def duration(stage):
+    return stage['ends_at'] - stage['starts_at']
+
+
+def running_stage(stages, stage, started_at, now):
+    """(index, started at) of the stage running at ``now``, given that ``stage`` began at ``started_at``.
+
+    Stages whose time ran out roll over to the next one; the index is None once the last has ended.
+    """
+    while stage < len(stages):
+        ends_at = started_at + duration(stages[stage])
+        if now < ends_at:
+            return stage, started_at
+        stage, started_at = stage + 1, ends_at
+    return None, started_at
+
+
+def stage_index(stages, section, module_order):
+    for index, stage in enumerate(stages):
+        if stage['section'] == section and stage['module_order'] == module_order:
+            return index
+    return None
+
+
+def advance(session, exam_display, modules):
+    """Move ``session`` on to the latest of the answered ``modules`` [(section name, module order)].
+
+    Only moves forward: answering a question of the running stage or an earlier one changes
+    nothing, so its timer can't be restarted by going back.
+    """
+    stages = exam_timeline(exam_display)
+    target = max(
+        (index for index in (stage_index(stages, *module) for module in modules) if index is not None), default=None
+    )
+    if target is None:
+        return
+    now = timezone.now()
+    started_at = session.stage_started_at or session.start_time
+    current, _ = running_stage(stages, session.stage, started_at.timestamp(), now.timestamp())
+    if current is None or target <= current:
+        return
+    ExamSession.objects.filter(id=session.id, stage__lt=target).update(stage=target, stage_started_at=now)
+    session.stage, session.stage_started_at = target, now
+
+
+def format_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    def __init__(self, session_id, started_at, stages, stage=0, stage_started_at=None):
+        self.session_id = session_id
+        self.started_at = started_at
+        self.stages = stages
+        self.deadline = started_at + (stages[-1]['ends_at'] if stages else 0)
+        self.stage = stage
+        self.stage_started_at = started_at if stage_started_at is None else stage_started_at
+        # Bumped when the candidate moves on early, so the module expiry scheduled before is skipped
+        self.generation = 0
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.closed = False
+
+    def stage_at(self, now):
+        return running_stage(self.stages, self.stage, self.stage_started_at, now)
+
+    def move_to(self, stage, stage_started_at):
+        self.stage, self.stage_started_at = stage, stage_started_at
+        self.generation += 1
+
+    def state(self, now):
+        stage, stage_started_at = self.stage_at(now)
+        return {
+            'session': self.session_id,
+            'remaining': max(0, round(self.deadline - now)),
+            'stage': stage,
+            'stage_remaining': None if stage is None else max(0, round(min(
+                stage_started_at + duration(self.stages[stage]), self.deadline
+            ) - now)),
+        }
+
+    def push(self, name, data):
+        if self.closed:
+            return
+        if self.queue.full():
+            # A slow client only ever misses ticks; drop the oldest queued event to make room
+            self.queue.get_nowait()
+        self.queue.put_nowait((name, data))
+
+
+class SessionScheduler:
+    """Drives timer events for every open stream in the process from one asyncio task.
+
+    Ticks are fanned out on a shared interval, module and session expiries sit in a single heap,
+    and sessions ended or moved on to a later stage elsewhere are detected with one query per
+    check for all streams. Only the running stage's expiry is scheduled; when it fires, the next
+    stage's is.
+    """
+
+    def __init__(self, tick_interval=TICK_INTERVAL, end_check_interval=END_CHECK_INTERVAL):
+        self.tick_interval = tick_interval
+        self.end_check_interval = end_check_interval
+        self.subscriptions = set()
+        self.timers = []
+        self.sequence = itertools.count()
+        self.changed = asyncio.Event()
+        self.task = None
+
+    def subscribe(self, session_id, started_at, stages, stage=0, stage_started_at=None):
+        subscription = Subscription(session_id, started_at, stages, stage, stage_started_at)
+        self.subscriptions.add(subscription)
+        self.schedule_module_expiry(subscription, time.time())
+        self.schedule(subscription.deadline, subscription, 'end_session', {'reason': 'time_expired'})
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+        self.changed.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.closed = True
+        self.subscriptions.discard(subscription)
+
+    def schedule(self, when, subscription, name, data):
+        heapq.heappush(self.timers, (when, next(self.sequence), subscription, subscription.generation, name, data))
+
+    def schedule_module_expiry(self, subscription, now):
+        stage, stage_started_at = subscription.stage_at(now)
+        if stage is not None and stage < len(subscription.stages) - 1:
+            when = stage_started_at + duration(subscription.stages[stage])
+            self.schedule(when, subscription, 'module_expired', {'stage': stage, 'next_stage': stage + 1})
+
+    def close(self, subscription, reason):
+        subscription.push('end_session', {'reason': reason})
+        self.unsubscribe(subscription)
+
+    async def session_states(self):
+        """``{session id: (ended, stage, stage started at)}`` for every subscribed session."""
+        session_ids = {subscription.session_id for subscription in self.subscriptions}
+        if not session_ids:
+            return {}
+        return {
+            session_id: (end_time is not None, stage, stage_started_at and stage_started_at.timestamp())
+            async for session_id, end_time, stage, stage_started_at in ExamSession.objects.filter(
+                id__in=session_ids
+            ).values_list('id', 'end_time', 'stage', 'stage_started_at')
+        }
+
+    def check(self, subscription, state, now):
+        ended, stage, stage_started_at = state
+        if ended:
+            self.close(subscription, 'ended')
+        elif stage > subscription.stage:
+            subscription.move_to(stage, stage_started_at)
+            self.schedule_module_expiry(subscription, now)
+            subscription.push('tick', subscription.state(now))
+
+    async def run(self):
+        next_tick = next_end_check = time.time()
+        while self.subscriptions:
+            now = time.time()
+
+            while self.timers and self.timers[0][0] <= now:
+                when, _, subscription, generation, name, data = heapq.heappop(self.timers)
+                if subscription.closed:
+                    continue
+                if name == 'end_session':
+                    self.close(subscription, data['reason'])
+                elif generation == subscription.generation:
+                    subscription.push(name, data)
+                    self.schedule_module_expiry(subscription, when)
+
+            if now >= next_tick:
+                for subscription in self.subscriptions:
+                    subscription.push('tick', subscription.state(now))
+                next_tick = now + self.tick_interval
+
+            if now >= next_end_check:
+                states = await self.session_states()
+                for subscription in list(self.subscriptions):
+                    if subscription.session_id in states:
+                        self.check(subscription, states[subscription.session_id], now)
+                next_end_check = now + self.end_check_interval
+
+            wake_at = min(next_tick, next_end_check, self.timers[0][0] if self.timers else next_tick)
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout=max(0, wake_at - time.time()))
+            except asyncio.TimeoutError:
+                pass
+        self.timers.clear()
+
+
+_schedulers = weakref.WeakKeyDictionary()
+
+
+def get_scheduler():
+    """The scheduler of the running event loop; an ASGI server process runs one loop."""
+    loop = asyncio.get_running_loop()
+    scheduler = _schedulers.get(loop)
+    if scheduler is None:
+        scheduler = _schedulers[loop] = SessionScheduler()
+    return scheduler
+
+
+async def stream(session_id, started_at, stages, scheduler=None, stage=0, stage_started_at=None):
+    scheduler = scheduler or get_scheduler()
+    subscription = scheduler.subscribe(session_id, started_at, stages, stage, stage_started_at)
+    try:
+        yield format_event('state', {**subscription.state(time.time()), 'stages': stages})
+        while True:
+            name, data = await subscription.queue.get()
+            yield format_event(name, data)
+            if name == 'end_session':
+                break
+    finally:
+        scheduler.unsubscribe(subscription)
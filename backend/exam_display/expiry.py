@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ExamSession, GradingJob
+from . import answer_sheet, events, grading
+
+
+def grace_period():
+    return timedelta(seconds=settings.SESSION_GRACE_PERIOD)
+
+
+def deadline_for(exam_display, start_time):
+    """When a session of ``exam_display`` started at ``start_time`` runs out; None for an untimed exam."""
+    if not exam_display or not exam_display.exam_type:
+        return None
+    stages = events.exam_timeline(exam_display)
+    if not stages:
+        return None
+    return start_time + timedelta(seconds=stages[-1]['ends_at'])
+
+
+def is_expired(session, now=None):
+    return session.deadline is not None and (now or timezone.now()) > session.deadline + grace_period()
+
+
+def end_time(session, now=None):
+    """A session ended by the candidate ends now, but never later than its deadline."""
+    now = now or timezone.now()
+    return min(now, session.deadline) if session.deadline else now
+
+
+def expire(session):
+    """Close and grade a session whose time ran out, as of its deadline."""
+    return grading.close_session(session, session.deadline)
+
+
+def expired_sessions(now=None):
+    return ExamSession.objects.filter(end_time__isnull=True, deadline__lt=(now or timezone.now()) - grace_period())
+
+
+def sweep(limit=100, now=None, **filters):
+    """Close up to ``limit`` expired sessions, oldest deadline first, and grade them; returns how many were closed.
+
+    With deferred grading the whole batch is closed with one UPDATE and queued with one INSERT.
+    """
+    sessions = list(expired_sessions(now).filter(**filters).select_related('exam_display').order_by('deadline')[:limit])
+    if not settings.DEFERRED_GRADING:
+        return sum(expire(session) is not None for session in sessions)
+
+    session_ids = [session.id for session in sessions]
+    if settings.ANSWER_WRITE_BEHIND:
+        for session_id in session_ids:
+            answer_sheet.close(session_id)
+    with transaction.atomic():
+        # Sessions ended or locked by a concurrent end_session or sweeper are left to it
+        session_ids = list(
+            ExamSession.objects.select_for_update(skip_locked=True)
+            .filter(id__in=session_ids, end_time__isnull=True).values_list('id', flat=True)
+        )
+        ExamSession.objects.filter(id__in=session_ids).update(end_time=F('deadline'))
+        GradingJob.objects.bulk_create(GradingJob(session_id=session_id) for session_id in session_ids)
+    return len(session_ids)
+
+
+def assign_deadlines(batch_size=1000):
+    """Give open sessions started before deadlines existed a deadline, so the sweeper can close them."""
+    sessions = (
+        ExamSession.objects.select_related('exam_display')
+        .filter(end_time__isnull=True, deadline__isnull=True, exam_display__isnull=False)
+    )
+    batch, assigned = [], 0
+    for session in sessions.iterator(chunk_size=batch_size):
+        session.deadline = deadline_for(session.exam_display, session.start_time)
+        if session.deadline:
+            batch.append(session)
+        if len(batch) >= batch_size:
+            assigned += ExamSession.objects.bulk_update(batch, ['deadline'])
+            batch = []
+    return assigned + ExamSession.objects.bulk_update(batch, ['deadline'])
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from exam.models import SATExamSubmission, GREExamSubmission, GMATExamSubmission, IELTSExamSubmission
+from student_dashboard import analytics, read_model
+from .models import ExamSession, GradingJob
+from . import answer_sheet, scoring
+
+SUBMISSION_MODELS = {
+    'sat': SATExamSubmission,
+    'gre': GREExamSubmission,
+    'gmat': GMATExamSubmission,
+    'ielts': IELTSExamSubmission,
+}
+
+MAX_ATTEMPTS = 3
+
+
+def create_submission(session):
+    exam_display = session.exam_display
+    scores = scoring.grade_session(session, exam_display)
+    submission = SUBMISSION_MODELS[exam_display.exam_type].objects.create(
+        user_id=session.user_id,
+        exam_id=exam_display.exam_id,
+        **scores
+    )
+    read_model.submission_created(submission)
+    analytics.record_submission(submission, session)
+    return submission
+
+
+def get_submission(job):
+    if job.submission_id is None:
+        return None
+    exam_type = job.session.exam_display.exam_type
+    return SUBMISSION_MODELS[exam_type].objects.filter(id=job.submission_id).first()
+
+
+def enqueue(session):
+    return GradingJob.objects.create(session=session)
+
+
+def close_session(session, end_time):
+    """End ``session`` at ``end_time`` and grade it, or queue it; returns the submission or the job.
+
+    Returns None when the session was already ended elsewhere, e.g. by the expiry sweeper.
+    """
+    if settings.ANSWER_WRITE_BEHIND:
+        answer_sheet.close(session.id)
+    with transaction.atomic():
+        if not ExamSession.objects.filter(id=session.id, end_time__isnull=True).update(end_time=end_time):
+            return None
+        session.end_time = end_time
+        if settings.DEFERRED_GRADING:
+            return enqueue(session)
+        return create_submission(session)
+
+
+def claim_jobs(limit):
+    """Mark up to ``limit`` pending jobs as running and return their ids; safe across workers."""
+    with transaction.atomic():
+        job_ids = list(
+            GradingJob.objects.select_for_update(skip_locked=True)
+            .filter(status='pending').order_by('id').values_list('id', flat=True)[:limit]
+        )
+        GradingJob.objects.filter(id__in=job_ids).update(
+            status='running', started_at=timezone.now(), attempts=F('attempts') + 1
+        )
+    return job_ids
+
+
+def release(jobs, error):
+    """Return running ``jobs`` to the queue, failing those that used up their attempts; returns how many were requeued."""
+    jobs = jobs.filter(status='running')
+    jobs.filter(attempts__gte=MAX_ATTEMPTS).update(status='failed', error=error, finished_at=timezone.now())
+    return jobs.update(status='pending', error=error)
+
+
+def requeue_stale(older_than):
+    """Return jobs left running by a crashed worker to the queue."""
+    stale = GradingJob.objects.filter(started_at__lt=timezone.now() - timedelta(seconds=older_than))
+    return release(stale, 'Abandoned by a stopped worker')
+
+
+def run_job(job_id):
+    """Grade a claimed job; returns its status, or None when it was requeued and claimed again meanwhile."""
+    job = GradingJob.objects.select_related('session__exam_display').get(id=job_id)
+    # A job outliving requeue_stale can be claimed by another worker; only the latest claim may grade it
+    claim = GradingJob.objects.filter(id=job.id, status='running', started_at=job.started_at)
+    try:
+        with transaction.atomic():
+            if not claim.select_for_update().exists():
+                return None
+            submission = create_submission(job.session)
+            job.status = 'done'
+            job.submission_id = submission.id
+            job.error = ''
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'submission_id', 'error', 'finished_at'])
+    except Exception as exc:
+        job.status = 'pending' if job.attempts < MAX_ATTEMPTS else 'failed'
+        job.error = str(exc)
+        if not claim.update(status=job.status, error=job.error):
+            return None
+    return job.status
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exam_display import expiry
+
+
+class Command(BaseCommand):
+    help = "Close and grade exam sessions that ran past their deadline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=60.0)
+        parser.add_argument('--once', action='store_true', help="Sweep every expired session once and exit")
+
+    def handle(self, *args, batch_size, interval, once, **options):
+        expired = 0
+        try:
+            while True:
+                expiry.assign_deadlines()
+                while True:
+                    try:
+                        closed = expiry.sweep(batch_size)
+                    except Exception as exc:
+                        self.stderr.write(f"Sweep failed: {exc}")
+                        break
+                    expired += closed
+                    if closed < batch_size:
+                        break
+                if once:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} sessions"))
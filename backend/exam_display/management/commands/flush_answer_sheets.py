@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exam_display import answer_sheet
+from exam_display.models import ExamSession
+
+
+class Command(BaseCommand):
+    help = "Persist journaled answer sheets to UserAnswer; also recovers answers after a crash or cache loss"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=30.0)
+        parser.add_argument('--once', action='store_true', help="Flush every journaled session once and exit")
+
+    def handle(self, *args, interval, once, **options):
+        saved = 0
+        try:
+            while True:
+                session_ids = answer_sheet.journaled_sessions()
+                existing = set(ExamSession.objects.filter(id__in=session_ids).values_list('id', flat=True))
+                for session_id in session_ids:
+                    if session_id not in existing:
+                        answer_sheet.discard(session_id)
+                        continue
+                    try:
+                        saved += answer_sheet.flush(session_id)
+                    except Exception as exc:
+                        self.stderr.write(f"Session {session_id}: {exc}")
+                if once:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Saved {saved} answers"))
@@ -0,0 +1,85 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent requests at a running server and report throughput and latency, e.g. to compare "
+        "'gunicorn exam_portal.wsgi' with 'uvicorn exam_portal.asgi:application' on the /api/ and /api/async/ routes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--data', default=None, help="JSON request body")
+        parser.add_argument('--token', default=None, help="JWT access token")
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, url, method, data, token, concurrency, requests, timeout, **options):
+        target = urlsplit(url)
+        if target.scheme not in ('http', 'https'):
+            raise CommandError("Only http:// and https:// URLs are supported")
+        path = target.path + (f'?{target.query}' if target.query else '')
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = json.dumps(json.loads(data)).encode() if data else None
+        connection_class = http.client.HTTPSConnection if target.scheme == 'https' else http.client.HTTPConnection
+
+        local = threading.local()
+        counter = iter(range(requests))
+        counter_lock = threading.Lock()
+
+        def next_request():
+            with counter_lock:
+                return next(counter, None)
+
+        def worker():
+            # One keep-alive connection per worker, reopened after errors
+            latencies, statuses = [], Counter()
+            while next_request() is not None:
+                if getattr(local, 'connection', None) is None:
+                    local.connection = connection_class(target.netloc, timeout=timeout)
+                started = time.perf_counter()
+                try:
+                    local.connection.request(method, path, body=body, headers=headers)
+                    response = local.connection.getresponse()
+                    response.read()
+                    statuses[response.status] += 1
+                except (OSError, http.client.HTTPException) as exc:
+                    statuses[type(exc).__name__] += 1
+                    local.connection.close()
+                    local.connection = None
+                latencies.append(time.perf_counter() - started)
+            return latencies, statuses
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: worker(), range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+        statuses = sum((worker_statuses for _, worker_statuses in results), Counter())
+        if not latencies:
+            raise CommandError("No requests were sent")
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000
+
+        self.stdout.write(f"{len(latencies)} requests, concurrency {concurrency}, {elapsed:.2f}s")
+        self.stdout.write(f"Throughput: {len(latencies) / elapsed:.1f} requests/s")
+        self.stdout.write(
+            f"Latency ms: mean {statistics.mean(latencies) * 1000:.1f}, p50 {percentile(.5):.1f}, "
+            f"p95 {percentile(.95):.1f}, p99 {percentile(.99):.1f}"
+        )
+        self.stdout.write("Statuses: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)))
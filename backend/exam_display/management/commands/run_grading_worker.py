@@ -0,0 +1,80 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from exam_display import grading
+from exam_display.models import GradingJob
+
+
+def _init_worker():
+    django.setup()
+    # Never share the parent's database connections with a child process
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Drain the deferred grading queue, optionally across a pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--poll-interval', type=float, default=2.0)
+        parser.add_argument('--requeue-after', type=int, default=300,
+                            help="Seconds after which a running job is assumed abandoned")
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty")
+
+    def start_pool(self, processes):
+        if processes <= 1:
+            return None
+        connections.close_all()
+        return ProcessPoolExecutor(max_workers=processes, initializer=_init_worker)
+
+    def run_jobs(self, pool, job_ids):
+        """Grade claimed jobs; returns their statuses and whether the pool died and must be replaced.
+
+        A job deleted along with its session since it was claimed is skipped. A job whose process
+        died is released now rather than after --requeue-after, and fails once out of attempts.
+        """
+        futures = {job_id: pool.submit(grading.run_job, job_id) for job_id in job_ids} if pool else {}
+        statuses, broken = [], False
+        for job_id in job_ids:
+            try:
+                statuses.append(futures[job_id].result() if pool else grading.run_job(job_id))
+            except GradingJob.DoesNotExist:
+                continue
+            except BrokenProcessPool:
+                broken = True
+                grading.release(GradingJob.objects.filter(id=job_id), 'Grading process died')
+        return statuses, broken
+
+    def handle(self, *args, processes, batch_size, poll_interval, requeue_after, once, **options):
+        pool = self.start_pool(processes)
+
+        graded = 0
+        try:
+            while True:
+                grading.requeue_stale(requeue_after)
+                job_ids = grading.claim_jobs(batch_size)
+                if not job_ids:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                statuses, broken = self.run_jobs(pool, job_ids)
+                graded += statuses.count('done')
+                if broken:
+                    self.stderr.write("A grading process died; starting a new pool")
+                    pool.shutdown(wait=False)
+                    pool = self.start_pool(processes)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool:
+                pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f"Graded {graded} sessions"))
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:24
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+QUESTION_FIELDS = ['sat_question', 'gmat_question', 'gre_question', 'ielts_question']
+
+
+def drop_resubmitted_answers(apps, schema_editor):
+    # Every resubmission used to insert another row; keep the latest (highest id) per session and question
+    UserAnswer = apps.get_model('exam_display', 'UserAnswer')
+    for field in QUESTION_FIELDS:
+        newer = UserAnswer.objects.filter(
+            exam_session=OuterRef('exam_session'), **{field: OuterRef(field)}, id__gt=OuterRef('id')
+        )
+        UserAnswer.objects.filter(**{f'{field}__isnull': False}).filter(Exists(newer)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0008_alter_ieltsexamsubmission_listening_score_and_more'),
+        ('exam_display', '0002_remove_examsession_content_type_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_resubmitted_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='useranswer',
+            constraint=models.UniqueConstraint(fields=('exam_session', 'sat_question'), name='unique_sat_answer_per_session'),
+        ),
+        migrations.AddConstraint(
+            model_name='useranswer',
+            constraint=models.UniqueConstraint(fields=('exam_session', 'gmat_question'), name='unique_gmat_answer_per_session'),
+        ),
+        migrations.AddConstraint(
+            model_name='useranswer',
+            constraint=models.UniqueConstraint(fields=('exam_session', 'gre_question'), name='unique_gre_answer_per_session'),
+        ),
+        migrations.AddConstraint(
+            model_name='useranswer',
+            constraint=models.UniqueConstraint(fields=('exam_session', 'ielts_question'), name='unique_ielts_answer_per_session'),
+        ),
+    ]
@@ -0,0 +1,159 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Length, Trim, Upper
+
+
+EXAM_TYPES = ('sat', 'gmat', 'gre', 'ielts')
+CHOICES = ('A', 'B', 'C', 'D')
+# UserAnswer.CHOICE_TYPES: only answers to letter-keyed questions become choices
+CHOICE_TYPES = ('multiple-choice', 'math', 'fill-in-the-blank')
+INLINE_TEXT_LENGTH = 64
+BATCH_SIZE = 2000
+
+
+def compact_answers(apps, schema_editor):
+    UserAnswer = apps.get_model('exam_display', 'UserAnswer')
+    AnswerText = apps.get_model('exam_display', 'AnswerText')
+
+    for code, exam_type in enumerate(EXAM_TYPES, 1):
+        UserAnswer.objects.filter(**{f'{exam_type}_question__isnull': False}).update(
+            exam_type=code, question_id=F(f'{exam_type}_question_id')
+        )
+    # Answers without any question reference cannot be graded or shown
+    UserAnswer.objects.filter(exam_type__isnull=True).delete()
+
+    for code, exam_type in enumerate(EXAM_TYPES, 1):
+        keyed = apps.get_model('exam', f'{exam_type}question').objects.filter(question_type__in=CHOICE_TYPES)
+        UserAnswer.objects.filter(exam_type=code, question_id__in=keyed.values('id')).annotate(
+            normalized=Upper(Trim('answer'))
+        ).update(
+            choice=Case(*[When(normalized=choice, then=Value(code)) for code, choice in enumerate(CHOICES, 1)], default=None)
+        )
+    free_text = UserAnswer.objects.filter(choice__isnull=True).annotate(length=Length('answer'))
+    free_text.filter(length__lte=INLINE_TEXT_LENGTH).update(text=F('answer'))
+    free_text.filter(length__gt=INLINE_TEXT_LENGTH).update(has_long_text=True)
+
+    batch = []
+    for answer_id, answer in UserAnswer.objects.filter(has_long_text=True).values_list('id', 'answer').iterator(chunk_size=BATCH_SIZE):
+        batch.append(AnswerText(user_answer_id=answer_id, text=answer))
+        if len(batch) >= BATCH_SIZE:
+            AnswerText.objects.bulk_create(batch)
+            batch = []
+    AnswerText.objects.bulk_create(batch)
+
+
+def expand_answers(apps, schema_editor):
+    UserAnswer = apps.get_model('exam_display', 'UserAnswer')
+    AnswerText = apps.get_model('exam_display', 'AnswerText')
+
+    for code, exam_type in enumerate(EXAM_TYPES, 1):
+        UserAnswer.objects.filter(exam_type=code).update(**{f'{exam_type}_question_id': F('question_id')})
+
+    long_text = AnswerText.objects.filter(user_answer_id=OuterRef('id')).values('text')[:1]
+    UserAnswer.objects.update(answer=Case(
+        *[When(choice=code, then=Value(choice)) for code, choice in enumerate(CHOICES, 1)],
+        When(has_long_text=True, then=Subquery(long_text)),
+        default=F('text'),
+        output_field=models.TextField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_display', '0004_gradingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useranswer',
+            name='exam_type',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'SAT'), (2, 'GMAT'), (3, 'GRE'), (4, 'IELTS')], null=True),
+        ),
+        migrations.AddField(
+            model_name='useranswer',
+            name='question_id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='useranswer',
+            name='choice',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='useranswer',
+            name='text',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='useranswer',
+            name='has_long_text',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='AnswerText',
+            fields=[
+                ('user_answer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='long_text', serialize=False, to='exam_display.useranswer')),
+                ('text', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(compact_answers, expand_answers),
+        migrations.RemoveConstraint(
+            model_name='useranswer',
+            name='unique_sat_answer_per_session',
+        ),
+        migrations.RemoveConstraint(
+            model_name='useranswer',
+            name='unique_gmat_answer_per_session',
+        ),
+        migrations.RemoveConstraint(
+            model_name='useranswer',
+            name='unique_gre_answer_per_session',
+        ),
+        migrations.RemoveConstraint(
+            model_name='useranswer',
+            name='unique_ielts_answer_per_session',
+        ),
+        migrations.RemoveField(
+            model_name='useranswer',
+            name='sat_question',
+        ),
+        migrations.RemoveField(
+            model_name='useranswer',
+            name='gmat_question',
+        ),
+        migrations.RemoveField(
+            model_name='useranswer',
+            name='gre_question',
+        ),
+        migrations.RemoveField(
+            model_name='useranswer',
+            name='ielts_question',
+        ),
+        migrations.AlterField(
+            model_name='useranswer',
+            name='answer',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RemoveField(
+            model_name='useranswer',
+            name='answer',
+        ),
+        migrations.AlterField(
+            model_name='useranswer',
+            name='exam_type',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'SAT'), (2, 'GMAT'), (3, 'GRE'), (4, 'IELTS')]),
+        ),
+        migrations.AlterField(
+            model_name='useranswer',
+            name='question_id',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name='useranswer',
+            constraint=models.UniqueConstraint(fields=('exam_session', 'exam_type', 'question_id'), name='unique_answer_per_session'),
+        ),
+    ]
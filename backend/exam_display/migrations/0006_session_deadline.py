@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_display', '0005_compact_user_answers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examsession',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='examsession',
+            index=models.Index(condition=models.Q(('end_time__isnull', True)), fields=['user', 'exam_display'], name='examsession_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examsession',
+            index=models.Index(condition=models.Q(('end_time__isnull', True)), fields=['deadline'], name='examsession_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_display', '0006_session_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examsession',
+            name='stage',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='examsession',
+            name='stage_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -9,6 +9,12 @@ from exam.models import (
 
 User = get_user_model()
 
+EXAM_TYPES = ('sat', 'gmat', 'gre', 'ielts')
+# Stored on answers as a small integer instead of one nullable FK column per exam type
+EXAM_TYPE_CODES = {exam_type: code for code, exam_type in enumerate(EXAM_TYPES, 1)}
+EXAM_TYPE_CHOICES = [(code, exam_type.upper()) for exam_type, code in EXAM_TYPE_CODES.items()]
+QUESTION_MODELS = {'sat': SATQuestion, 'gmat': GMATQuestion, 'gre': GREQuestion, 'ielts': IELTSQuestion}
+
 class ExamDisplay(models.Model):
     sat_exam = models.ForeignKey(SATExam, on_delete=models.CASCADE, null=True, blank=True)
     gmat_exam = models.ForeignKey(GMATExam, on_delete=models.CASCADE, null=True, blank=True)
@@ -26,6 +32,18 @@ class ExamDisplay(models.Model):
             return IELTSQuestion.objects.filter(module__section__exam=self.ielts_exam)
         return None
 
+    @property
+    def exam_type(self):
+        for exam_type in EXAM_TYPES:
+            if getattr(self, f'{exam_type}_exam_id'):
+                return exam_type
+        return None
+
+    @property
+    def exam_id(self):
+        exam_type = self.exam_type
+        return getattr(self, f'{exam_type}_exam_id') if exam_type else None
+
     def __str__(self):
         if self.sat_exam:
             return f"SAT Exam Display: {self.sat_exam.name}"
@@ -43,21 +61,154 @@ class ExamSession(models.Model):
 
     start_time = models.DateTimeField(auto_now_add=True)
     end_time = models.DateTimeField(null=True, blank=True)
+    deadline = models.DateTimeField(null=True, blank=True)
+    # The timeline stage the candidate moved on to and when (start_time while NULL); see exam_display.events
+    stage = models.PositiveSmallIntegerField(default=0)
+    stage_started_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Only open sessions are ever looked up by user and display or swept by deadline
+        indexes = [
+            models.Index(
+                fields=['user', 'exam_display'], condition=models.Q(end_time__isnull=True), name='examsession_open_idx'
+            ),
+            models.Index(
+                fields=['deadline'], condition=models.Q(end_time__isnull=True), name='examsession_expiry_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"Exam Session for {self.user.username} - {self.exam_display}"
 
 class UserAnswer(models.Model):
+    CHOICES = ('A', 'B', 'C', 'D')
+    # Question types keyed by a letter in correct_answer; grading compares their answers' choice codes
+    CHOICE_TYPES = ('multiple-choice', 'math', 'fill-in-the-blank')
+    # Free-text answers up to this length stay inline; longer ones go to AnswerText
+    INLINE_TEXT_LENGTH = 64
+
     exam_session = models.ForeignKey(ExamSession, on_delete=models.CASCADE, related_name='user_answers')
-    sat_question = models.ForeignKey(SATQuestion, on_delete=models.CASCADE, null=True, blank=True)
-    gmat_question = models.ForeignKey(GMATQuestion, on_delete=models.CASCADE, null=True, blank=True)
-    gre_question = models.ForeignKey(GREQuestion, on_delete=models.CASCADE, null=True, blank=True)
-    ielts_question = models.ForeignKey(IELTSQuestion, on_delete=models.CASCADE, null=True, blank=True)
-    answer = models.TextField()
+    exam_type = models.PositiveSmallIntegerField(choices=EXAM_TYPE_CHOICES)
+    question_id = models.BigIntegerField()
+    choice = models.PositiveSmallIntegerField(null=True, blank=True)  # 1-4 for A-D
+    text = models.CharField(max_length=INLINE_TEXT_LENGTH, blank=True)
+    has_long_text = models.BooleanField(default=False)
     is_correct = models.BooleanField(null=True)
 
+    class Meta:
+        # One answer per question per session; lets answer batches upsert with ON CONFLICT
+        constraints = [
+            models.UniqueConstraint(fields=['exam_session', 'exam_type', 'question_id'], name='unique_answer_per_session'),
+        ]
+
     def __str__(self):
         return f"Answer by {self.exam_session.user.username} for question"
 
+    def set_answer(self, answer, question_type=None):
+        """Encode ``answer`` into the compact columns; returns the text that belongs in AnswerText, if any.
+
+        Only answers to letter-keyed questions are normalised to a choice; anything else is kept as written.
+        """
+        normalized = answer.strip().upper()
+        self.choice, self.text, self.has_long_text = None, '', False
+        if question_type in self.CHOICE_TYPES and normalized in self.CHOICES:
+            self.choice = self.CHOICES.index(normalized) + 1
+        elif len(answer) <= self.INLINE_TEXT_LENGTH:
+            self.text = answer
+        else:
+            self.has_long_text = True
+            return answer
+        return None
+
+    @property
+    def exam_type_name(self):
+        return EXAM_TYPES[self.exam_type - 1]
+
+    @property
+    def answer(self):
+        # Reads AnswerText lazily; use session_answers() for more than one answer
+        return decode_answer(self.choice, self.text, self.long_text.text if self.has_long_text else None)
+
     def get_question(self):
-        return self.sat_question or self.gmat_question or self.gre_question or self.ielts_question
+        if not hasattr(self, '_question'):
+            resolve_questions([self])
+        return self._question
+
+class AnswerText(models.Model):
+    """Overflow storage for long writing and speaking responses."""
+    user_answer = models.OneToOneField(UserAnswer, on_delete=models.CASCADE, primary_key=True, related_name='long_text')
+    text = models.TextField()
+
+    def __str__(self):
+        return f"Long answer {self.user_answer_id}"
+
+def decode_answer(choice, text, long_text):
+    if choice:
+        return UserAnswer.CHOICES[choice - 1]
+    return long_text if long_text is not None else text
+
+def session_answers(exam_session):
+    """``{question id: answer}`` of a session in one query, long answers joined in."""
+    rows = UserAnswer.objects.filter(exam_session=exam_session).values_list(
+        'question_id', 'choice', 'text', 'has_long_text', 'long_text__text'
+    )
+    return {
+        question_id: decode_answer(choice, text, long_text if has_long_text else None)
+        for question_id, choice, text, has_long_text, long_text in rows
+    }
+
+def save_long_texts(exam_session, exam_type, long_texts):
+    """Upsert the AnswerText rows for ``{question id: text}`` answers already saved in ``exam_session``."""
+    if not long_texts:
+        return
+    answer_ids = UserAnswer.objects.filter(
+        exam_session=exam_session, exam_type=exam_type, question_id__in=long_texts
+    ).values_list('question_id', 'id')
+    AnswerText.objects.bulk_create(
+        [AnswerText(user_answer_id=answer_id, text=long_texts[question_id]) for question_id, answer_id in answer_ids],
+        update_conflicts=True,
+        unique_fields=['user_answer'],
+        update_fields=['text'],
+    )
+
+def delete_long_texts(exam_session, exam_type, question_ids):
+    """Drop the AnswerText rows of answers in ``exam_session`` that were replaced by short ones."""
+    if question_ids:
+        AnswerText.objects.filter(
+            user_answer__exam_session=exam_session, user_answer__exam_type=exam_type, user_answer__question_id__in=question_ids
+        ).delete()
+
+def resolve_questions(answers):
+    """Attach each answer's question with one ``in_bulk`` query per exam type present."""
+    by_type = {}
+    for answer in answers:
+        by_type.setdefault(answer.exam_type, set()).add(answer.question_id)
+    questions = {
+        exam_type: QUESTION_MODELS[EXAM_TYPES[exam_type - 1]].objects.in_bulk(ids)
+        for exam_type, ids in by_type.items()
+    }
+    for answer in answers:
+        answer._question = questions[answer.exam_type].get(answer.question_id)
+    return answers
+
+class GradingJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    session = models.OneToOneField(ExamSession, on_delete=models.CASCADE, related_name='grading_job')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    submission_id = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'], name='gradingjob_status_id_idx')]
+
+    def __str__(self):
+        return f"Grading job {self.id} for session {self.session_id} ({self.status})"
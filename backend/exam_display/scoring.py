@@ -0,0 +1,131 @@
+import numpy as np
+
+from exam.models import Question
+
+from .models import EXAM_TYPE_CODES, UserAnswer
+
+CHOICE_CODES = {choice: code for code, choice in enumerate(UserAnswer.CHOICES, 1)}
+
+# Percent-correct breakpoints -> scaled section score, interpolated linearly between points
+SCALE_TABLES = {
+    'sat': ([0, .1, .25, .5, .75, .9, 1], [200, 250, 350, 500, 640, 730, 800]),
+    'gre': ([0, .25, .5, .75, .9, 1], [130, 138, 148, 157, 164, 170]),
+    'gmat': ([0, .25, .5, .75, .9, 1], [60, 67, 75, 82, 87, 90]),
+    'ielts': ([0, .1, .25, .4, .55, .7, .85, .95, 1], [0, 2.5, 4, 5, 6, 7, 8, 8.5, 9]),
+}
+
+# Section name -> submission field, per exam type
+SECTION_FIELDS = {
+    'sat': {'verbal': 'verbal_score', 'math': 'math_score'},
+    'gre': {'verbal': 'verbal_score', 'math': 'math_score'},
+    'gmat': {'verbal': 'verbal_score', 'quant': 'quant_score', 'dl': 'dl_score', 'di': 'dl_score'},
+    'ielts': {
+        'listening': 'listening_score',
+        'reading': 'reading_score',
+        'writing': 'writing_score',
+        'speaking': 'speaking_score',
+    },
+}
+
+
+def encode_choices(values):
+    return np.fromiter((CHOICE_CODES.get((value or '').strip().upper(), 0) for value in values), dtype=np.int8, count=len(values))
+
+
+def grade(question_ids, correct_codes, section_index, answer_question_ids, answer_codes, section_count):
+    """Vectorized grading of one session.
+
+    ``question_ids`` must be sorted. Returns, per answer, 1/0 for correct/incorrect and -1 where
+    the question has no key, plus correct and gradable question counts per section.
+    """
+    position = np.searchsorted(question_ids, answer_question_ids)
+    position = np.minimum(position, len(question_ids) - 1)
+    known = question_ids[position] == answer_question_ids
+
+    key = np.where(known, correct_codes[position], 0)
+    gradable = key > 0
+    correct = gradable & (answer_codes == key)
+    outcome = np.where(gradable, correct.astype(np.int8), -1)
+
+    correct_per_section = np.bincount(section_index[position[correct]], minlength=section_count)
+    gradable_per_section = np.bincount(section_index[correct_codes > 0], minlength=section_count)
+    return outcome, correct_per_section, gradable_per_section
+
+
+def scale(exam_type, correct_per_section, gradable_per_section):
+    xp, fp = SCALE_TABLES[exam_type]
+    fraction = np.divide(
+        correct_per_section, gradable_per_section,
+        out=np.zeros(len(correct_per_section)), where=gradable_per_section > 0,
+    )
+    return np.interp(fraction, xp, fp)
+
+
+def total_score(exam_type, scores):
+    if exam_type == 'sat':
+        return scores['verbal_score'] + scores['math_score']
+    if exam_type == 'gre':
+        return scores['verbal_score'] + scores['math_score']
+    if exam_type == 'gmat':
+        section_total = scores['verbal_score'] + scores['quant_score'] + scores['dl_score']
+        return round(205 + (section_total - 180) / 90 * 600)
+    overall = sum(scores.values()) / len(scores)
+    return round(overall * 2) / 2
+
+
+def grade_session(session, exam_display):
+    """Grade every answer in ``session`` and return the submission score fields.
+
+    Loads answers and answer keys in two queries, marks ``is_correct`` with at most two UPDATEs.
+    """
+    exam_type = exam_display.exam_type
+    section_fields = SECTION_FIELDS[exam_type]
+
+    questions = list(
+        Question.objects.filter(exam_type=exam_type, exam_id=exam_display.exam_id)
+        .order_by('question_id').values_list('question_id', 'correct_answer', 'section_name')
+    )
+    answers = list(
+        UserAnswer.objects.filter(exam_session=session, exam_type=EXAM_TYPE_CODES[exam_type])
+        .values_list('id', 'question_id', 'choice')
+    )
+
+    section_names = sorted(set(section_fields) | {name for _, _, name in questions})
+    section_lookup = {name: index for index, name in enumerate(section_names)}
+
+    correct_per_section = np.zeros(len(section_names), dtype=np.int64)
+    gradable_per_section = np.zeros(len(section_names), dtype=np.int64)
+    if questions:
+        question_ids = np.fromiter((row[0] for row in questions), dtype=np.int64, count=len(questions))
+        correct_codes = encode_choices([row[1] for row in questions])
+        section_index = np.fromiter((section_lookup[row[2]] for row in questions), dtype=np.int64, count=len(questions))
+        answer_question_ids = np.fromiter((row[1] for row in answers), dtype=np.int64, count=len(answers))
+        # Choices are stored as their codes already; free-text answers have none and never match a key
+        answer_codes = np.fromiter((row[2] or 0 for row in answers), dtype=np.int8, count=len(answers))
+
+        outcome, correct_per_section, gradable_per_section = grade(
+            question_ids, correct_codes, section_index, answer_question_ids, answer_codes, len(section_names)
+        )
+
+        answer_ids = np.fromiter((row[0] for row in answers), dtype=np.int64, count=len(answers))
+        for value, flag in ((1, True), (0, False)):
+            ids = answer_ids[outcome == value].tolist()
+            if ids:
+                UserAnswer.objects.filter(id__in=ids).update(is_correct=flag)
+
+    scaled = scale(exam_type, correct_per_section, gradable_per_section)
+    scores = {}
+    for name, field in section_fields.items():
+        index = section_lookup[name]
+        # A section without keyed questions (e.g. IELTS writing) keeps the table's floor until marked
+        value = float(scaled[index]) if gradable_per_section[index] else float(SCALE_TABLES[exam_type][1][0])
+        scores[field] = max(scores.get(field, 0), value)
+
+    if exam_type == 'ielts':
+        scores = {field: round(value * 2) / 2 for field, value in scores.items()}
+        scores['overall_score'] = total_score(exam_type, scores)
+    else:
+        rounding = 10 if exam_type == 'sat' else 1
+        scores = {field: int(round(value / rounding) * rounding) for field, value in scores.items()}
+        scores['total_score'] = total_score(exam_type, scores)
+    return scores
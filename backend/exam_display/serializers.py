@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import ExamDisplay, ExamSession, UserAnswer
+from .models import EXAM_TYPES, ExamDisplay, ExamSession, UserAnswer, AnswerText, GradingJob
+from .grading import get_submission
+from exam.serializers import PassageField
 from exam.models import (
     SATExam, SATQuestion, SATExamSubmission,
     GREExam, GREQuestion, GREExamSubmission,
@@ -18,29 +20,74 @@ class ExamSessionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class UserAnswerSerializer(serializers.ModelSerializer):
+    question = serializers.IntegerField(source='question_id', min_value=1)
+    exam_type = serializers.CharField(source='exam_type_name', read_only=True)
+    answer = serializers.CharField(allow_blank=True, trim_whitespace=False)
+
     class Meta:
         model = UserAnswer
-        fields = '__all__'
+        fields = ['id', 'exam_session', 'exam_type', 'question', 'answer', 'is_correct']
+        read_only_fields = ['exam_session', 'is_correct']
+
+    def to_internal_value(self, data):
+        # Accept the per-exam keys (sat_question, ...) that clients sent before answers were unified
+        if 'question' not in data:
+            for exam_type in EXAM_TYPES:
+                if data.get(f'{exam_type}_question'):
+                    data = {**data, 'question': data[f'{exam_type}_question']}
+                    break
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        # Resubmitting a question replaces the earlier answer instead of being rejected
+        key = {
+            'exam_session': validated_data['exam_session'],
+            'exam_type': validated_data['exam_type'],
+            'question_id': validated_data['question_id'],
+        }
+        user_answer = UserAnswer.objects.filter(**key).first() or UserAnswer(**key)
+        had_long_text = user_answer.has_long_text
+        long_text = user_answer.set_answer(validated_data['answer'], validated_data.get('question_type'))
+        user_answer.is_correct = None
+        user_answer.save()
+        if long_text is not None:
+            AnswerText.objects.update_or_create(user_answer=user_answer, defaults={'text': long_text})
+        elif had_long_text:
+            AnswerText.objects.filter(user_answer=user_answer).delete()
+        return user_answer
+
+
+class AnswerBatchItemSerializer(serializers.Serializer):
+    question = serializers.IntegerField(min_value=1)
+    answer = serializers.CharField(allow_blank=True)
 
 class SATQuestionSerializer(serializers.ModelSerializer):
+    passage = PassageField(read_only=True)
+
     class Meta:
         model = SATQuestion
-        fields = ['id', 'text', 'question_type', 'options']
+        fields = ['id', 'text', 'passage', 'question_type', 'options']
 
 class GREQuestionSerializer(serializers.ModelSerializer):
+    passage = PassageField(read_only=True)
+
     class Meta:
         model = GREQuestion
-        fields = ['id', 'text', 'question_type', 'options']
+        fields = ['id', 'text', 'passage', 'question_type', 'options']
 
 class GMATQuestionSerializer(serializers.ModelSerializer):
+    passage = PassageField(read_only=True)
+
     class Meta:
         model = GMATQuestion
-        fields = ['id', 'text', 'question_type', 'options']
+        fields = ['id', 'text', 'passage', 'question_type', 'options']
 
 class IELTSQuestionSerializer(serializers.ModelSerializer):
+    passage = PassageField(read_only=True)
+
     class Meta:
         model = IELTSQuestion
-        fields = ['id', 'text', 'question_type', 'options']
+        fields = ['id', 'text', 'passage', 'question_type', 'options']
 
 class SATExamSubmissionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -60,4 +107,24 @@ class GMATExamSubmissionSerializer(serializers.ModelSerializer):
 class IELTSExamSubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = IELTSExamSubmission
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+SUBMISSION_SERIALIZERS = {
+    'sat': SATExamSubmissionSerializer,
+    'gre': GREExamSubmissionSerializer,
+    'gmat': GMATExamSubmissionSerializer,
+    'ielts': IELTSExamSubmissionSerializer,
+}
+
+class GradingJobSerializer(serializers.ModelSerializer):
+    submission = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GradingJob
+        fields = ['id', 'session', 'status', 'attempts', 'error', 'created_at', 'started_at', 'finished_at', 'submission']
+
+    def get_submission(self, job):
+        submission = get_submission(job)
+        if submission is None:
+            return None
+        return SUBMISSION_SERIALIZERS[job.session.exam_display.exam_type](submission).data
@@ -1,3 +1,638 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from exam.blueprints import build_structure
+from exam import passages
+from exam.models import SATExam, SATModule, SATQuestion, SATExamSubmission
+from . import answer_sheet, events, expiry, grading, scoring
+from .management.commands import run_grading_worker
+from .models import EXAM_TYPE_CODES, ExamDisplay, ExamSession, UserAnswer, AnswerText, GradingJob, resolve_questions
+
+User = get_user_model()
+
+
+def make_answers(session, questions, answer):
+    answers = []
+    for question in questions:
+        user_answer = UserAnswer(exam_session=session, exam_type=EXAM_TYPE_CODES['sat'], question_id=question.id)
+        user_answer.set_answer(answer, question.question_type)
+        answers.append(user_answer)
+    return UserAnswer.objects.bulk_create(answers)
+
+
+def build_sat_display(questions_per_module=5):
+    exam = SATExam.objects.create(name='Display SAT')
+    build_structure(exam)
+    SATQuestion.objects.bulk_create(
+        SATQuestion(module=module, text=f'{module.name} {order}', question_type='multiple-choice', correct_answer='A', order=order)
+        for module in SATModule.objects.filter(section__exam=exam)
+        for order in range(1, questions_per_module + 1)
+    )
+    return ExamDisplay.objects.create(sat_exam=exam)
+
+
+class ExamDisplayTestCase(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = User.objects.create_user(username='candidate', email='candidate@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.display = build_sat_display()
+        self.questions = list(SATQuestion.objects.filter(module__section__exam=self.display.sat_exam).order_by('id'))
+
+
+class QuestionTests(ExamDisplayTestCase):
+    def test_shared_passage_is_sent_once(self):
+        passage = passages.build('A passage about the history of railways.')
+        passages.store([passage])
+        SATQuestion.objects.filter(id__in=[question.id for question in self.questions[:3]]).update(passage=passage)
+
+        response = self.client.get(f'/api/exam-displays/{self.display.id}/questions/')
+
+        data = json.loads(response.content)
+        self.assertEqual(data['passages'], {passage.digest: passage.text})
+        self.assertEqual([question['passage'] for question in data['questions'][:4]], [passage.digest] * 3 + [None])
+
+
+class SubmitAnswersTests(ExamDisplayTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = ExamSession.objects.create(user=self.user, exam_display=self.display)
+        self.url = f'/api/exam-displays/{self.display.id}/submit_answers/'
+
+    def test_batch_is_saved_in_constant_queries(self):
+        answers = [{'question': question.id, 'answer': 'A'} for question in self.questions]
+
+        events.exam_timeline(self.display)
+
+        # display, session, question check, stage move, upsert, replaced long answers
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, {'answers': answers}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['saved'], len(self.questions))
+        self.assertEqual(self.session.user_answers.count(), len(self.questions))
+
+    def test_resubmitting_replaces_previous_answer(self):
+        question = self.questions[0]
+        self.client.post(self.url, {'answers': [{'question': question.id, 'answer': 'A'}]}, format='json')
+
+        self.client.post(self.url, {'answers': [{'question': question.id, 'answer': 'C'}]}, format='json')
+
+        self.assertEqual([answer.answer for answer in UserAnswer.objects.filter(exam_session=self.session)], ['C'])
+
+    def test_invalid_items_are_reported_per_answer(self):
+        other_exam_question = SATQuestion.objects.create(
+            module=build_sat_display().sat_exam.sections.first().modules.first(), text='Other', question_type='math'
+        )
+        answers = [
+            {'question': self.questions[0].id, 'answer': 'B'},
+            {'question': other_exam_question.id, 'answer': 'B'},
+            {'answer': 'B'},
+        ]
+
+        response = self.client.post(self.url, {'answers': answers}, format='json')
+
+        self.assertEqual([result['status'] for result in response.data['results']], ['saved', 'invalid', 'invalid'])
+        self.assertEqual(self.session.user_answers.count(), 1)
+
+    def test_single_submit_answer_is_idempotent(self):
+        url = f'/api/exam-displays/{self.display.id}/submit_answer/'
+        data = {'exam_session': self.session.id, 'sat_question': self.questions[0].id}
+
+        self.client.post(url, {**data, 'answer': 'A'}, format='json')
+        response = self.client.post(url, {**data, 'answer': 'D'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['answer'], 'D')
+        self.assertEqual([answer.answer for answer in self.session.user_answers.all()], ['D'])
+
+    def test_answers_are_stored_compactly(self):
+        essay = ' '.join(['An essay answer.'] * 20)
+        answers = [
+            {'question': self.questions[0].id, 'answer': ' b '},
+            {'question': self.questions[1].id, 'answer': '3/4'},
+            {'question': self.questions[2].id, 'answer': essay},
+        ]
+
+        self.client.post(self.url, {'answers': answers}, format='json')
+
+        stored = {answer.question_id: answer for answer in self.session.user_answers.all()}
+        self.assertEqual((stored[self.questions[0].id].choice, stored[self.questions[0].id].text), (2, ''))
+        self.assertEqual((stored[self.questions[1].id].choice, stored[self.questions[1].id].text), (None, '3/4'))
+        self.assertEqual(stored[self.questions[2].id].answer, essay)
+        self.assertEqual(AnswerText.objects.get().text, essay)
+
+    @override_settings(ANSWER_WRITE_BEHIND=True)
+    def test_display_without_an_exam_is_rejected(self):
+        url = f'/api/exam-displays/{ExamDisplay.objects.create().id}/'
+
+        response = self.client.post(f'{url}submit_answer/', {'question': self.questions[0].id, 'answer': 'A'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(f'{url}my_answers/').status_code, 400)
+
+    def test_only_choice_questions_store_a_choice(self):
+        SATQuestion.objects.filter(id=self.questions[1].id).update(question_type='writing')
+
+        self.client.post(self.url, {'answers': [
+            {'question': self.questions[0].id, 'answer': 'c'}, {'question': self.questions[1].id, 'answer': 'c'},
+        ]}, format='json')
+
+        stored = {answer.question_id: (answer.choice, answer.text) for answer in self.session.user_answers.all()}
+        self.assertEqual(stored, {self.questions[0].id: (3, ''), self.questions[1].id: (None, 'c')})
+
+    def test_replacing_a_long_answer_drops_its_text(self):
+        essay = ' '.join(['An essay answer.'] * 20)
+        batched, single = self.questions[0], self.questions[1]
+        self.client.post(self.url, {'answers': [{'question': batched.id, 'answer': essay}, {'question': single.id, 'answer': essay}]}, format='json')
+        self.assertEqual(AnswerText.objects.count(), 2)
+
+        self.client.post(self.url, {'answers': [{'question': batched.id, 'answer': 'B'}]}, format='json')
+        self.client.post(f'/api/exam-displays/{self.display.id}/submit_answer/', {'question': single.id, 'answer': 'short'}, format='json')
+
+        self.assertFalse(AnswerText.objects.exists())
+        self.assertEqual(
+            self.client.get(f'/api/exam-displays/{self.display.id}/my_answers/').data['answers'],
+            {batched.id: 'B', single.id: 'short'},
+        )
+
+    def test_questions_resolve_in_one_query_per_exam_type(self):
+        answers = make_answers(self.session, self.questions, 'A')
+
+        with self.assertNumQueries(1):
+            resolve_questions(answers)
+
+        self.assertEqual([answer.get_question() for answer in answers], self.questions)
+
+    def test_requires_open_session(self):
+        self.session.delete()
+
+        response = self.client.post(self.url, {'answers': [{'question': self.questions[0].id, 'answer': 'A'}]}, format='json')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ScoringTests(ExamDisplayTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = ExamSession.objects.create(user=self.user, exam_display=self.display)
+
+    def answer(self, questions, choice):
+        make_answers(self.session, questions, choice)
+
+    def end_session(self):
+        return self.client.post(f'/api/exam-displays/{self.display.id}/end_session/')
+
+    def test_all_correct_scores_maximum(self):
+        self.answer(self.questions, 'a')
+
+        response = self.end_session()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['verbal_score'], response.data['math_score'], response.data['total_score']), (800, 800, 1600))
+        self.assertTrue(all(self.session.user_answers.values_list('is_correct', flat=True)))
+
+    def test_grades_by_section_and_marks_answers(self):
+        verbal = [question for question in self.questions if question.module.section.name == 'verbal']
+        math = [question for question in self.questions if question.module.section.name == 'math']
+        self.answer(verbal, 'A')
+        self.answer(math[:5], 'B')
+
+        response = self.end_session()
+
+        self.assertEqual(response.data['verbal_score'], 800)
+        self.assertEqual(response.data['math_score'], 200)
+        self.assertEqual(self.session.user_answers.filter(is_correct=False).count(), 5)
+        self.assertEqual(self.session.user_answers.filter(is_correct=True).count(), len(verbal))
+
+    def test_math_answers_are_graded_against_their_key(self):
+        verbal = [question for question in self.questions if question.module.section.name == 'verbal']
+        math = [question for question in self.questions if question.module.section.name == 'math']
+        SATQuestion.objects.filter(id__in=[question.id for question in math]).update(question_type='math', correct_answer='B')
+        self.answer(verbal, 'A')
+        self.client.post(
+            f'/api/exam-displays/{self.display.id}/submit_answers/',
+            {'answers': [{'question': question.id, 'answer': 'b'} for question in math]}, format='json',
+        )
+
+        response = self.end_session()
+
+        self.assertEqual((response.data['verbal_score'], response.data['math_score']), (800, 800))
+
+    def test_grading_uses_constant_queries(self):
+        self.answer(self.questions, 'A')
+
+        # questions, answers, one UPDATE per outcome
+        with self.assertNumQueries(3):
+            scoring.grade_session(self.session, self.display)
+
+    def test_unanswered_session_scores_minimum(self):
+        response = self.end_session()
+
+        self.assertEqual(response.data['total_score'], 400)
+
+
+class AnswerSheetTests(ExamDisplayTestCase):
+    def setUp(self):
+        super().setUp()
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        settings = override_settings(
+            ANSWER_WRITE_BEHIND=True, ANSWER_JOURNAL_DIR=journal_dir.name, ANSWER_FLUSH_SIZE=3, ANSWER_FLUSH_INTERVAL=3600
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.journal_dir = journal_dir.name
+        self.session = ExamSession.objects.create(user=self.user, exam_display=self.display)
+        self.url = f'/api/exam-displays/{self.display.id}/'
+
+    def submit(self, question, answer):
+        return self.client.post(f'{self.url}submit_answer/', {'question': question.id, 'answer': answer}, format='json')
+
+    def test_answers_are_written_behind_in_batches(self):
+        self.submit(self.questions[0], 'A')
+        self.submit(self.questions[1], 'B')
+
+        self.assertFalse(UserAnswer.objects.exists())
+        self.assertEqual(
+            self.client.get(f'{self.url}my_answers/').data['answers'],
+            {self.questions[0].id: 'A', self.questions[1].id: 'B'},
+        )
+
+        self.submit(self.questions[2], 'C')
+
+        self.assertEqual(self.session.user_answers.count(), 3)
+        self.assertEqual(os.listdir(self.journal_dir), [])
+
+    def test_end_session_flushes_before_grading(self):
+        for question in self.questions[:2]:
+            self.submit(question, 'A')
+
+        response = self.client.post(f'{self.url}end_session/')
+
+        self.assertEqual(self.session.user_answers.filter(is_correct=True).count(), 2)
+        self.assertGreater(response.data['verbal_score'], 200)
+
+    def test_journal_recovers_answers_after_cache_loss(self):
+        self.submit(self.questions[0], 'D')
+        self.submit(self.questions[1], 'An answer that was only ever journaled')
+        caches['default'].clear()
+
+        call_command('flush_answer_sheets', '--once', stdout=StringIO())
+
+        self.assertEqual(
+            {answer.question_id: answer.answer for answer in self.session.user_answers.all()},
+            {self.questions[0].id: 'D', self.questions[1].id: 'An answer that was only ever journaled'},
+        )
+        self.assertEqual(answer_sheet.journaled_sessions(), [])
+
+    def test_answers_recorded_during_a_flush_stay_unsaved(self):
+        type_code = EXAM_TYPE_CODES['sat']
+        answer_sheet.record(self.session.id, type_code, {self.questions[0].id: 'A'})
+        persist = answer_sheet.persist
+
+        def persist_while_answering(*args):
+            persist(*args)
+            answer_sheet.record(self.session.id, type_code, {self.questions[0].id: 'B', self.questions[1].id: 'C'})
+
+        with mock.patch.object(answer_sheet, 'persist', side_effect=persist_while_answering):
+            answer_sheet.flush(self.session.id)
+
+        self.assertEqual(answer_sheet.load(self.session.id, type_code)['dirty'], {self.questions[0].id, self.questions[1].id})
+        answer_sheet.flush(self.session.id)
+        self.assertEqual(
+            {answer.question_id: answer.answer for answer in self.session.user_answers.all()},
+            {self.questions[0].id: 'B', self.questions[1].id: 'C'},
+        )
+
+    def test_flush_tolerates_journals_retired_concurrently(self):
+        self.submit(self.questions[0], 'A')
+        persist = answer_sheet.persist
+
+        def persist_then_discard_journal(*args):
+            persist(*args)
+            for name in os.listdir(self.journal_dir):
+                os.remove(os.path.join(self.journal_dir, name))
+
+        with mock.patch.object(answer_sheet, 'persist', side_effect=persist_then_discard_journal):
+            self.assertEqual(answer_sheet.flush(self.session.id), 1)
+        answer_sheet.discard(self.session.id)
+
+
+@override_settings(DEFERRED_GRADING=True)
+class DeferredGradingTests(ExamDisplayTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = ExamSession.objects.create(user=self.user, exam_display=self.display)
+        make_answers(self.session, self.questions, 'A')
+
+    def test_end_session_queues_job_and_worker_grades_it(self):
+        response = self.client.post(f'/api/exam-displays/{self.display.id}/end_session/')
+
+        self.assertEqual(response.status_code, 202)
+        self.session.refresh_from_db()
+        self.assertIsNotNone(self.session.end_time)
+        self.assertFalse(SATExamSubmission.objects.exists())
+
+        call_command('run_grading_worker', '--once', stdout=StringIO())
+
+        job = self.client.get(response.data['poll_url']).data
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['submission']['total_score'], 1600)
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        self.client.post(f'/api/exam-displays/{self.display.id}/end_session/')
+        job = GradingJob.objects.get(session=self.session)
+
+        with mock.patch.object(grading, 'create_submission', side_effect=RuntimeError('boom')):
+            for _ in range(grading.MAX_ATTEMPTS):
+                call_command('run_grading_worker', '--once', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), ('failed', grading.MAX_ATTEMPTS, 'boom'))
+
+    def test_stale_jobs_out_of_attempts_are_failed(self):
+        self.client.post(f'/api/exam-displays/{self.display.id}/end_session/')
+        started_at = timezone.now() - timezone.timedelta(hours=1)
+        GradingJob.objects.update(status='running', started_at=started_at, attempts=grading.MAX_ATTEMPTS)
+
+        self.assertEqual(grading.requeue_stale(60), 0)
+
+        job = GradingJob.objects.get(session=self.session)
+        self.assertEqual((job.status, job.error), ('failed', 'Abandoned by a stopped worker'))
+
+    def test_job_claimed_again_is_left_to_the_new_claim(self):
+        self.client.post(f'/api/exam-displays/{self.display.id}/end_session/')
+        grading.claim_jobs(1)
+        # The first worker read its job, then took long enough for the job to be requeued and claimed again
+        first_read = GradingJob.objects.select_related('session__exam_display').get(session=self.session)
+        GradingJob.objects.update(started_at=first_read.started_at - timezone.timedelta(hours=1))
+        grading.requeue_stale(60)
+        grading.claim_jobs(1)
+
+        with mock.patch.object(GradingJob.objects, 'select_related', return_value=mock.Mock(get=lambda **_: first_read)):
+            self.assertIsNone(grading.run_job(first_read.id))
+
+        self.assertFalse(SATExamSubmission.objects.exists())
+        job = GradingJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('running', 2))
+        self.assertEqual(grading.run_job(job.id), 'done')
+
+    def test_worker_survives_deleted_jobs_and_dead_processes(self):
+        self.client.post(f'/api/exam-displays/{self.display.id}/end_session/')
+        job = GradingJob.objects.get(session=self.session)
+        grading.claim_jobs(1)
+        command = run_grading_worker.Command()
+
+        self.assertEqual(command.run_jobs(None, [job.id + 1]), ([], False))
+
+        pool = mock.Mock()
+        pool.submit.return_value.result.side_effect = BrokenProcessPool()
+        self.assertEqual(command.run_jobs(pool, [job.id]), ([], True))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('pending', 'Grading process died'))
+
+    def test_jobs_are_only_visible_to_their_owner(self):
+        response = self.client.post(f'/api/exam-displays/{self.display.id}/end_session/')
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+        self.client.force_authenticate(other)
+
+        self.assertEqual(self.client.get(response.data['poll_url']).status_code, 404)
+
+
+class SessionExpiryTests(ExamDisplayTestCase):
+    def start_session(self, minutes_ago=0):
+        session = ExamSession.objects.create(user=self.user, exam_display=self.display)
+        start_time = session.start_time - timezone.timedelta(minutes=minutes_ago)
+        ExamSession.objects.filter(id=session.id).update(
+            start_time=start_time, deadline=expiry.deadline_for(self.display, start_time)
+        )
+        session.refresh_from_db()
+        return session
+
+    def test_deadline_covers_every_module(self):
+        response = self.client.post(f'/api/exam-displays/{self.display.id}/start_session/')
+
+        session = ExamSession.objects.get(id=response.data['id'])
+        total = events.session_timeline(session)[-1]['ends_at']
+        self.assertAlmostEqual((session.deadline - session.start_time).total_seconds(), total, delta=1)
+
+    def test_starting_a_session_closes_the_expired_one(self):
+        abandoned = self.start_session(minutes_ago=24 * 60)
+
+        self.client.post(f'/api/exam-displays/{self.display.id}/start_session/')
+
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.end_time, abandoned.deadline)
+        self.assertEqual(ExamSession.objects.filter(end_time__isnull=True).count(), 1)
+
+    def test_answers_after_the_deadline_are_rejected_and_the_session_graded(self):
+        session = self.start_session(minutes_ago=24 * 60)
+        make_answers(session, self.questions, 'A')
+
+        response = self.client.post(
+            f'/api/exam-displays/{self.display.id}/submit_answer/', {'question': self.questions[0].id, 'answer': 'B'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 403)
+        session.refresh_from_db()
+        self.assertEqual(session.end_time, session.deadline)
+        self.assertEqual(SATExamSubmission.objects.get(user=self.user).total_score, 1600)
+
+    def test_answers_within_the_grace_period_are_accepted(self):
+        session = self.start_session()
+        ExamSession.objects.filter(id=session.id).update(deadline=timezone.now() - timezone.timedelta(seconds=5))
+
+        response = self.client.post(
+            f'/api/exam-displays/{self.display.id}/submit_answer/', {'question': self.questions[0].id, 'answer': 'B'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_ending_late_records_the_deadline(self):
+        session = self.start_session(minutes_ago=24 * 60)
+
+        self.client.post(f'/api/exam-displays/{self.display.id}/end_session/')
+
+        session.refresh_from_db()
+        self.assertEqual(session.end_time, session.deadline)
+
+    def test_sweeper_closes_expired_sessions_in_batches(self):
+        expired = [self.start_session(minutes_ago=24 * 60) for _ in range(3)]
+        running = self.start_session()
+        legacy = ExamSession.objects.create(user=self.user, exam_display=self.display)
+        ExamSession.objects.filter(id=legacy.id).update(start_time=timezone.now() - timezone.timedelta(days=1))
+
+        out = StringIO()
+        call_command('expire_sessions', '--once', '--batch-size', '2', stdout=out)
+
+        self.assertIn('Expired 4 sessions', out.getvalue())
+        self.assertFalse(ExamSession.objects.filter(id__in=[session.id for session in expired + [legacy]], end_time__isnull=True).exists())
+        self.assertIsNone(ExamSession.objects.get(id=running.id).end_time)
+        self.assertEqual(SATExamSubmission.objects.count(), 4)
+
+    @override_settings(DEFERRED_GRADING=True)
+    def test_sweeper_queues_grading_when_deferred(self):
+        sessions = [self.start_session(minutes_ago=24 * 60) for _ in range(2)]
+
+        self.assertEqual(expiry.sweep(), 2)
+
+        self.assertEqual(set(GradingJob.objects.values_list('session_id', flat=True)), {session.id for session in sessions})
+        self.assertEqual(expiry.sweep(), 0)
+
+
+class SessionEventTests(ExamDisplayTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = ExamSession.objects.create(user=self.user, exam_display=self.display)
+
+    async def collect(self, stream):
+        received = []
+        async for chunk in stream:
+            name, data = chunk.strip().split('\n')
+            received.append((name[len('event: '):], json.loads(data[len('data: '):])))
+        return received
+
+    def test_timeline_has_one_slot_per_stage(self):
+        stages = events.session_timeline(self.session)
+
+        self.assertEqual([stage['section'] for stage in stages], ['verbal', 'verbal', 'math', 'math'])
+        self.assertEqual(stages[0]['starts_at'], 0)
+        self.assertEqual(stages[1]['starts_at'], stages[0]['ends_at'])
+
+    async def test_module_expiry_and_time_limit_are_pushed(self):
+        stages = [
+            {'section': 'verbal', 'module_order': 1, 'starts_at': 0, 'ends_at': 0.05},
+            {'section': 'verbal', 'module_order': 2, 'starts_at': 0.05, 'ends_at': 0.1},
+        ]
+        scheduler = events.SessionScheduler(tick_interval=0.02, end_check_interval=60)
+
+        received = await self.collect(events.stream(self.session.id, time.time(), stages, scheduler))
+
+        names = [name for name, _ in received]
+        self.assertEqual(names[0], 'state')
+        self.assertIn('tick', names)
+        self.assertIn(('module_expired', {'stage': 0, 'next_stage': 1}), received)
+        self.assertEqual(received[-1], ('end_session', {'reason': 'time_expired'}))
+        self.assertFalse(scheduler.subscriptions)
+
+    async def test_session_ended_elsewhere_closes_the_stream(self):
+        stages = [{'section': 'verbal', 'module_order': 1, 'starts_at': 0, 'ends_at': 3600}]
+        scheduler = events.SessionScheduler(tick_interval=60, end_check_interval=0.01)
+        await ExamSession.objects.filter(id=self.session.id).aupdate(end_time=timezone.now())
+
+        received = await self.collect(events.stream(self.session.id, time.time(), stages, scheduler))
+
+        self.assertEqual(received[-1], ('end_session', {'reason': 'ended'}))
+
+    def test_answering_a_later_module_starts_it(self):
+        url = f'/api/exam-displays/{self.display.id}/submit_answer/'
+        stages = events.session_timeline(self.session)
+        later = next(question for question in self.questions if question.module.order == 2)
+
+        self.client.post(url, {'question': later.id, 'answer': 'A'}, format='json')
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.stage, stages[self.session.stage]['module_order']), (1, 2))
+        started_at = self.session.stage_started_at
+
+        # Going back to the first module doesn't restart the second one's timer
+        self.client.post(url, {'question': self.questions[0].id, 'answer': 'A'}, format='json')
+        self.client.post(url, {'question': later.id, 'answer': 'B'}, format='json')
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.stage, self.session.stage_started_at), (1, started_at))
+
+        subscription = events.Subscription(
+            self.session.id, self.session.start_time.timestamp(), stages, 1, started_at.timestamp()
+        )
+        state = subscription.state(started_at.timestamp() + 60)
+        self.assertEqual((state['stage'], state['stage_remaining']), (1, events.duration(stages[1]) - 60))
+
+    async def test_stage_started_elsewhere_moves_the_module_expiry(self):
+        stages = [
+            {'section': 'verbal', 'module_order': 1, 'starts_at': 0, 'ends_at': 3600},
+            {'section': 'verbal', 'module_order': 2, 'starts_at': 3600, 'ends_at': 3600.05},
+            {'section': 'math', 'module_order': 1, 'starts_at': 3600.05, 'ends_at': 3600.1},
+        ]
+        scheduler = events.SessionScheduler(tick_interval=60, end_check_interval=0.01)
+        await ExamSession.objects.filter(id=self.session.id).aupdate(stage=1, stage_started_at=timezone.now())
+
+        received = []
+        async for chunk in events.stream(self.session.id, time.time(), stages, scheduler):
+            name, data = chunk.strip().split('\n')
+            received.append((name[len('event: '):], json.loads(data[len('data: '):])))
+            if received[-1][0] == 'module_expired':
+                break
+
+        self.assertEqual(received[-1], ('module_expired', {'stage': 1, 'next_stage': 2}))
+        self.assertEqual(received[0][1]['stage'], 0)
+
+    async def test_stream_endpoint_requires_a_token(self):
+        url = f'/api/exam-sessions/{self.session.id}/events/'
+        client = AsyncClient()
+
+        self.assertEqual((await client.get(url)).status_code, 401)
+
+        response = await client.get(url, {'token': str(AccessToken.for_user(self.user))})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        self.assertTrue((await anext(chunks)).startswith(b'event: state'))
+        await chunks.aclose()
+
+
+class AsyncCandidateViewTests(ExamDisplayTestCase):
+    def setUp(self):
+        super().setUp()
+        self.async_client = AsyncClient()
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.url = f'/api/async/exam-displays/{self.display.id}/'
+
+    async def test_sitting_through_async_views(self):
+        response = await self.async_client.post(f'{self.url}start_session/', headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+
+        questions = (await self.async_client.get(f'{self.url}questions/', headers=self.headers)).json()['questions']
+        self.assertEqual(len(questions), len(self.questions))
+
+        for question in questions:
+            response = await self.async_client.post(
+                f'{self.url}submit_answer/', {'question': question['id'], 'answer': 'A'}, content_type='application/json',
+                headers=self.headers,
+            )
+            self.assertEqual(response.status_code, 201)
+
+        response = await self.async_client.post(f'{self.url}end_session/', headers=self.headers)
+        self.assertEqual(response.json()['total_score'], 1600)
+
+    async def test_display_without_an_exam_is_rejected(self):
+        display = await ExamDisplay.objects.acreate()
+
+        response = await self.async_client.post(
+            f'/api/async/exam-displays/{display.id}/submit_answer/', {'question': self.questions[0].id, 'answer': 'A'},
+            content_type='application/json', headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_requires_authentication_and_an_open_session(self):
+        self.assertEqual((await AsyncClient().post(f'{self.url}start_session/')).status_code, 401)
+
+        response = await self.async_client.post(
+            f'{self.url}submit_answer/', {'question': self.questions[0].id, 'answer': 'A'}, content_type='application/json',
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 404)
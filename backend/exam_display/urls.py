@@ -1,10 +1,20 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ExamDisplayViewSet
+from .views import (
+    ExamDisplayViewSet, GradingJobViewSet, session_events,
+    async_questions, async_start_session, async_submit_answer, async_end_session
+)
 
 router = DefaultRouter()
 router.register(r'exam-displays', ExamDisplayViewSet)
+router.register(r'grading-jobs', GradingJobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('exam-sessions/<int:pk>/events/', session_events, name='session-events'),
+    # ASGI-native variants of the candidate-facing endpoints
+    path('async/exam-displays/<int:pk>/questions/', async_questions, name='async-questions'),
+    path('async/exam-displays/<int:pk>/start_session/', async_start_session, name='async-start-session'),
+    path('async/exam-displays/<int:pk>/submit_answer/', async_submit_answer, name='async-submit-answer'),
+    path('async/exam-displays/<int:pk>/end_session/', async_end_session, name='async-end-session'),
 ]
\ No newline at end of file
@@ -1,13 +1,19 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
-from .models import ExamDisplay, ExamSession, UserAnswer
+from .models import EXAM_TYPE_CODES, QUESTION_MODELS, ExamDisplay, ExamSession, UserAnswer, GradingJob, session_answers
 from .serializers import (
-    ExamDisplaySerializer, ExamSessionSerializer, UserAnswerSerializer,
+    ExamDisplaySerializer, ExamSessionSerializer, UserAnswerSerializer, AnswerBatchItemSerializer, GradingJobSerializer,
     SATQuestionSerializer, GREQuestionSerializer, GMATQuestionSerializer, IELTSQuestionSerializer,
-    SATExamSubmissionSerializer, GREExamSubmissionSerializer, GMATExamSubmissionSerializer, IELTSExamSubmissionSerializer
+    SATExamSubmissionSerializer, GREExamSubmissionSerializer, GMATExamSubmissionSerializer, IELTSExamSubmissionSerializer,
+    SUBMISSION_SERIALIZERS
 )
 from exam.models import (
     SATExam, SATQuestion, SATExamSubmission,
@@ -15,127 +21,315 @@ from exam.models import (
     GMATExam, GMATQuestion, GMATExamSubmission,
     IELTSExam, IELTSQuestion, IELTSExamSubmission
 )
+from exam import adaptive, passages, snapshots
+from exam.async_api import async_api_view
+from . import answer_sheet, events, expiry, grading
+
+QUESTION_SERIALIZERS = {
+    'sat': SATQuestionSerializer,
+    'gre': GREQuestionSerializer,
+    'gmat': GMATQuestionSerializer,
+    'ielts': IELTSQuestionSerializer,
+}
+
+def question_snapshot(exam_display):
+    exam_type = exam_display.exam_type
+    exam_model = ExamDisplay._meta.get_field(f'{exam_type}_exam').related_model
+    serializer_class = QUESTION_SERIALIZERS[exam_type]
+
+    def render():
+        # Questions of a reading set share one passage; each text is sent once and referenced by digest
+        refs = set()
+        serializer = serializer_class(exam_display.get_questions(), many=True, context={'passages': refs})
+        questions = serializer.data
+        return JSONRenderer().render({'passages': passages.texts(refs), 'questions': questions})
+
+    return snapshots.get_snapshot('questions', exam_model, exam_display.exam_id, render)
+
+def reset_adaptive_state(exam_display, user):
+    # GMAT ability is kept per candidate and exam; a new sitting must not inherit the last one's answers
+    if exam_display.exam_type == 'gmat':
+        adaptive.AdaptiveSession.reset(exam_display.exam_id, user.pk)
+
+def finish_session(session):
+    """End an open session and grade it, or queue it for grading; returns (response data, status)."""
+    result = grading.close_session(session, expiry.end_time(session))
+    if result is None:
+        return {"error": "Session has already ended"}, status.HTTP_409_CONFLICT
+
+    if settings.DEFERRED_GRADING:
+        return {
+            "job": result.id,
+            "status": result.status,
+            "poll_url": reverse('gradingjob-detail', args=[result.id]),
+        }, status.HTTP_202_ACCEPTED
+    return SUBMISSION_SERIALIZERS[session.exam_display.exam_type](result).data, status.HTTP_200_OK
+
+def expire_if_overdue(session):
+    """Close and grade a session past its deadline on access; returns True if it was."""
+    if not expiry.is_expired(session):
+        return False
+    expiry.expire(session)
+    return True
+
+SESSION_EXPIRED = {"error": "Session time has expired"}
 
 class ExamDisplayViewSet(viewsets.ModelViewSet):
     queryset = ExamDisplay.objects.all()
     serializer_class = ExamDisplaySerializer
+    max_answer_batch = 500
 
     @action(detail=True, methods=['get'])
     def questions(self, request, pk=None):
         exam_display = self.get_object()
-        questions = exam_display.get_questions()
-        
-        if exam_display.sat_exam:
-            serializer = SATQuestionSerializer(questions, many=True)
-        elif exam_display.gre_exam:
-            serializer = GREQuestionSerializer(questions, many=True)
-        elif exam_display.gmat_exam:
-            serializer = GMATQuestionSerializer(questions, many=True)
-        elif exam_display.ielts_exam:
-            serializer = IELTSQuestionSerializer(questions, many=True)
-        else:
+
+        if not exam_display.exam_type:
             return Response({"error": "Invalid exam type"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        return Response(serializer.data)
+
+        snapshot = question_snapshot(exam_display)
+        return snapshots.snapshot_response(request, snapshot)
 
     @action(detail=True, methods=['post'])
     def start_session(self, request, pk=None):
         exam_display = self.get_object()
         user = request.user
-        session = ExamSession.objects.create(user=user, exam_display=exam_display)
+        # Close whatever this candidate left running past its deadline before opening a new session
+        expiry.sweep(user=user)
+        session = ExamSession.objects.create(
+            user=user, exam_display=exam_display, deadline=expiry.deadline_for(exam_display, timezone.now())
+        )
+        reset_adaptive_state(exam_display, user)
         serializer = ExamSessionSerializer(session)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'])
     def submit_answer(self, request, pk=None):
         exam_display = self.get_object()
+        if not exam_display.exam_type:
+            return Response({"error": "Invalid exam type"}, status=status.HTTP_400_BAD_REQUEST)
         session = get_object_or_404(ExamSession, user=request.user, exam_display=exam_display, end_time__isnull=True)
-        
+        if expire_if_overdue(session):
+            return Response(SESSION_EXPIRED, status=status.HTTP_403_FORBIDDEN)
+
         serializer = UserAnswerSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save(exam_session=session)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=['post'])
-    def end_session(self, request, pk=None):
+        exam_type = exam_display.exam_type
+        question_model = QUESTION_MODELS[exam_type]
+        question_id = serializer.validated_data['question_id']
+        question = (
+            question_model.objects.filter(id=question_id, module__section__exam_id=exam_display.exam_id)
+            .values_list('question_type', 'module__section__name', 'module__order').first()
+        )
+        if question is None:
+            return Response({"question": ["Question does not belong to this exam"]}, status=status.HTTP_400_BAD_REQUEST)
+        question_type, *module = question
+        events.advance(session, exam_display, [module])
+
+        if settings.ANSWER_WRITE_BEHIND:
+            answer = serializer.validated_data['answer']
+            answer_sheet.record(session.id, EXAM_TYPE_CODES[exam_type], {question_id: answer})
+            return Response({
+                "exam_session": session.id,
+                "exam_type": exam_type,
+                "question": question_id,
+                "answer": answer,
+                "is_correct": None,
+            }, status=status.HTTP_201_CREATED)
+
+        serializer.save(exam_session=session, exam_type=EXAM_TYPE_CODES[exam_type], question_type=question_type)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def my_answers(self, request, pk=None):
         exam_display = self.get_object()
+        if not exam_display.exam_type:
+            return Response({"error": "Invalid exam type"}, status=status.HTTP_400_BAD_REQUEST)
         session = get_object_or_404(ExamSession, user=request.user, exam_display=exam_display, end_time__isnull=True)
-        session.end_time = timezone.now()
-        session.save()
-
-        # Calculate scores and create exam submission
-        if exam_display.sat_exam:
-            submission = self.create_sat_submission(session)
-            serializer = SATExamSubmissionSerializer(submission)
-        elif exam_display.gre_exam:
-            submission = self.create_gre_submission(session)
-            serializer = GREExamSubmissionSerializer(submission)
-        elif exam_display.gmat_exam:
-            submission = self.create_gmat_submission(session)
-            serializer = GMATExamSubmissionSerializer(submission)
-        elif exam_display.ielts_exam:
-            submission = self.create_ielts_submission(session)
-            serializer = IELTSExamSubmissionSerializer(submission)
+
+        if settings.ANSWER_WRITE_BEHIND:
+            answers = answer_sheet.answers(session.id, EXAM_TYPE_CODES[exam_display.exam_type])
         else:
+            answers = session_answers(session)
+        return Response({"session": session.id, "answers": answers})
+
+    @action(detail=True, methods=['post'])
+    def submit_answers(self, request, pk=None):
+        exam_display = self.get_object()
+        if not exam_display.exam_type:
             return Response({"error": "Invalid exam type"}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(serializer.data)
-
-    def create_sat_submission(self, session):
-        # Implement SAT scoring logic here
-        verbal_score = 0  # Calculate verbal score
-        math_score = 0  # Calculate math score
-        total_score = verbal_score + math_score
-        return SATExamSubmission.objects.create(
-            user=session.user,
-            exam=session.exam_display.sat_exam,
-            verbal_score=verbal_score,
-            math_score=math_score,
-            total_score=total_score
-        )
+        items = request.data.get('answers')
+        if not isinstance(items, list) or not items:
+            return Response({"error": "A non-empty list of answers is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_answer_batch:
+            return Response({"error": f"At most {self.max_answer_batch} answers per batch"}, status=status.HTTP_400_BAD_REQUEST)
 
-    def create_gre_submission(self, session):
-        # Implement GRE scoring logic here
-        verbal_score = 0  # Calculate verbal score
-        math_score = 0  # Calculate math score
-        total_score = verbal_score + math_score
-        return GREExamSubmission.objects.create(
-            user=session.user,
-            exam=session.exam_display.gre_exam,
-            verbal_score=verbal_score,
-            math_score=math_score,
-            total_score=total_score
+        session = get_object_or_404(ExamSession, user=request.user, exam_display=exam_display, end_time__isnull=True)
+        if expire_if_overdue(session):
+            return Response(SESSION_EXPIRED, status=status.HTTP_403_FORBIDDEN)
+
+        exam_type = exam_display.exam_type
+        question_model = QUESTION_MODELS[exam_type]
+
+        results = []
+        answers = {}
+        for item in items:
+            serializer = AnswerBatchItemSerializer(data=item)
+            if serializer.is_valid():
+                answers[serializer.validated_data['question']] = serializer.validated_data['answer']
+                results.append({"question": serializer.validated_data['question'], "status": "saved"})
+            else:
+                results.append({"question": item.get('question') if isinstance(item, dict) else None, "status": "invalid", "errors": serializer.errors})
+
+        rows = (
+            question_model.objects.filter(id__in=answers, module__section__exam_id=exam_display.exam_id)
+            .values_list('id', 'question_type', 'module__section__name', 'module__order')
         )
+        known_questions = {}
+        modules = set()
+        for question_id, question_type, section, module_order in rows:
+            known_questions[question_id] = question_type
+            modules.add((section, module_order))
+        for result in results:
+            if result['status'] == 'saved' and result['question'] not in known_questions:
+                result['status'] = 'invalid'
+                result['errors'] = {"question": ["Question does not belong to this exam"]}
+                answers.pop(result['question'], None)
+
+        if answers:
+            events.advance(session, exam_display, modules)
+            # Last answer wins when a question appears more than once in the batch
+            if settings.ANSWER_WRITE_BEHIND:
+                answer_sheet.record(session.id, EXAM_TYPE_CODES[exam_type], answers)
+            else:
+                answer_sheet.persist(session.id, EXAM_TYPE_CODES[exam_type], answers, known_questions)
+
+        return Response({"session": session.id, "saved": len(answers), "results": results})
+
+    @action(detail=True, methods=['post'])
+    def end_session(self, request, pk=None):
+        exam_display = self.get_object()
+        if not exam_display.exam_type:
+            return Response({"error": "Invalid exam type"}, status=status.HTTP_400_BAD_REQUEST)
+
+        session = get_object_or_404(ExamSession, user=request.user, exam_display=exam_display, end_time__isnull=True)
+        session.exam_display = exam_display
+        data, status_code = finish_session(session)
+        return Response(data, status=status_code)
+
+
+class GradingJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = GradingJob.objects.select_related('session__exam_display')
+    serializer_class = GradingJobSerializer
+
+    def get_queryset(self):
+        return super().get_queryset().filter(session__user=self.request.user)
+
+
+@async_api_view(['GET'])
+async def session_events(request, pk):
+    """Server-sent events for one open session: timer ticks, module expiries and the end of the session.
+
+    Needs an ASGI server (exam_portal.asgi); every open stream shares the process's event loop.
+    """
+    session = await ExamSession.objects.select_related('exam_display').filter(
+        id=pk, user=request.user, end_time__isnull=True
+    ).afirst()
+    if session is None or not session.exam_display or not session.exam_display.exam_type:
+        raise Http404
+    stages = await sync_to_async(events.session_timeline)(session)
+
+    response = StreamingHttpResponse(
+        events.stream(
+            session.id, session.start_time.timestamp(), stages,
+            stage=session.stage, stage_started_at=session.stage_started_at and session.stage_started_at.timestamp(),
+        ),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ASGI-native variants of the candidate-facing ExamDisplayViewSet actions
+
+async def _open_session(user, exam_display):
+    session = await ExamSession.objects.filter(user=user, exam_display=exam_display, end_time__isnull=True).afirst()
+    if session is None:
+        raise Http404
+    session.exam_display = exam_display
+    return session
+
+async def _exam_display(pk):
+    exam_display = await ExamDisplay.objects.filter(pk=pk).afirst()
+    if exam_display is None:
+        raise Http404
+    return exam_display
+
+@async_api_view(['GET'], login_required=False)
+async def async_questions(request, pk):
+    exam_display = await _exam_display(pk)
+    if not exam_display.exam_type:
+        return JsonResponse({"error": "Invalid exam type"}, status=400)
+    snapshot = await sync_to_async(question_snapshot)(exam_display)
+    return await sync_to_async(snapshots.snapshot_response)(request, snapshot)
+
+@async_api_view(['POST'])
+async def async_start_session(request, pk):
+    exam_display = await _exam_display(pk)
+    await sync_to_async(expiry.sweep)(user=request.user)
+    deadline = await sync_to_async(expiry.deadline_for)(exam_display, timezone.now())
+    session = await ExamSession.objects.acreate(user=request.user, exam_display=exam_display, deadline=deadline)
+    await sync_to_async(reset_adaptive_state)(exam_display, request.user)
+    return JsonResponse(ExamSessionSerializer(session).data, status=201)
+
+@async_api_view(['POST'])
+async def async_submit_answer(request, pk):
+    exam_display = await _exam_display(pk)
+    if not exam_display.exam_type:
+        return JsonResponse({"error": "Invalid exam type"}, status=400)
+    session = await _open_session(request.user, exam_display)
+    if await sync_to_async(expire_if_overdue)(session):
+        return JsonResponse(SESSION_EXPIRED, status=403)
+
+    serializer = UserAnswerSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    exam_type = exam_display.exam_type
+    question_id = serializer.validated_data['question_id']
+    answer = serializer.validated_data['answer']
+    question = await (
+        QUESTION_MODELS[exam_type].objects.filter(id=question_id, module__section__exam_id=exam_display.exam_id)
+        .values_list('question_type', 'module__section__name', 'module__order').afirst()
+    )
+    if question is None:
+        return JsonResponse({"question": ["Question does not belong to this exam"]}, status=400)
+    question_type, *module = question
+    await sync_to_async(events.advance)(session, exam_display, [module])
 
-    def create_gmat_submission(self, session):
-        # Implement GMAT scoring logic here
-        verbal_score = 0  # Calculate verbal score
-        quant_score = 0  # Calculate quant score
-        dl_score = 0  # Calculate data literacy score
-        total_score = verbal_score + quant_score + dl_score
-        return GMATExamSubmission.objects.create(
-            user=session.user,
-            exam=session.exam_display.gmat_exam,
-            verbal_score=verbal_score,
-            quant_score=quant_score,
-            dl_score=dl_score,
-            total_score=total_score
+    if settings.ANSWER_WRITE_BEHIND:
+        await sync_to_async(answer_sheet.record)(session.id, EXAM_TYPE_CODES[exam_type], {question_id: answer})
+    else:
+        await sync_to_async(answer_sheet.persist)(
+            session.id, EXAM_TYPE_CODES[exam_type], {question_id: answer}, {question_id: question_type}
         )
+    return JsonResponse({
+        "exam_session": session.id,
+        "exam_type": exam_type,
+        "question": question_id,
+        "answer": answer,
+        "is_correct": None,
+    }, status=201)
 
-    def create_ielts_submission(self, session):
-        # Implement IELTS scoring logic here
-        listening_score = 0.0  # Calculate listening score
-        reading_score = 0.0  # Calculate reading score
-        writing_score = 0.0  # Calculate writing score
-        speaking_score = 0.0  # Calculate speaking score
-        overall_score = (listening_score + reading_score + writing_score + speaking_score) / 4
-        return IELTSExamSubmission.objects.create(
-            user=session.user,
-            exam=session.exam_display.ielts_exam,
-            listening_score=listening_score,
-            reading_score=reading_score,
-            writing_score=writing_score,
-            speaking_score=speaking_score,
-            overall_score=overall_score
-        )
\ No newline at end of file
+@async_api_view(['POST'])
+async def async_end_session(request, pk):
+    exam_display = await _exam_display(pk)
+    if not exam_display.exam_type:
+        return JsonResponse({"error": "Invalid exam type"}, status=400)
+    session = await _open_session(request.user, exam_display)
+    # Saving, grading and the job insert share one transaction, which needs a sync context
+    data, status_code = await sync_to_async(finish_session)(session)
+    return JsonResponse(data, status=status_code)
@@ -2,6 +2,8 @@
 ASGI config for exam_portal project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn exam_portal.asgi:application``) for the
+session event streams in exam_display.events, which hold one coroutine per open connection.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import importlib.util
 from pathlib import Path
 from datetime import timedelta
 
@@ -60,12 +61,15 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # zstd / brotli / gzip by Accept-Encoding; brotli and zstd need their optional packages
+    'exam.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'exam.audit.AuditBufferMiddleware',
 ]
 
 APPEND_SLASH = True
@@ -107,7 +111,14 @@ REST_FRAMEWORK = {
     # 'DEFAULT_PERMISSION_CLASSES': [
     #     'rest_framework.permissions.IsAuthenticated',
     # ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
+# MessagePack responses (Accept: application/msgpack) when the optional msgpack package is installed
+if importlib.util.find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('exam.renderers.MessagePackRenderer')
 ROOT_URLCONF = 'exam_portal.urls'
 
 TEMPLATES = [
@@ -146,6 +157,38 @@ DATABASES = {
 }
 
 
+CACHES = {
+    # Shared across workers in production (e.g. Redis); holds exam snapshot versions and payloads
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'exam-portal',
+    },
+    # Per-process tier in front of 'default' for exam snapshots
+    'exam_snapshots': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'exam-snapshots',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 200},
+    },
+}
+
+
+# When True, end_session queues grading for the run_grading_worker command and returns 202
+DEFERRED_GRADING = False
+
+# When True, answers are kept on a per-session answer sheet in the cache and written to UserAnswer
+# in batches (exam_display.answer_sheet). Needs a cache shared by every worker process, and a
+# journal directory on a single host or a volume every worker mounts.
+ANSWER_WRITE_BEHIND = False
+ANSWER_JOURNAL_DIR = BASE_DIR / 'answer_journal'
+ANSWER_FLUSH_INTERVAL = 30  # seconds
+ANSWER_FLUSH_SIZE = 25
+
+# Sessions close at start time plus the exam's total module duration; answers are still accepted
+# for this long after the deadline to absorb client clock skew and network latency
+SESSION_GRACE_PERIOD = 30  # seconds
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,173 @@
+import math
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from exam.models import Question
+from exam_display.models import EXAM_TYPE_CODES, UserAnswer
+from exam_display.scoring import SECTION_FIELDS
+from .models import PerformanceBucket, PerformanceData
+from .read_model import SUBMISSION_SECTIONS
+
+ROLLING_WINDOW = 5
+
+# Width of a percentile bucket on each exam's section score scale
+BUCKET_WIDTHS = {'sat': 10, 'gre': 1, 'gmat': 1, 'ielts': 0.5}
+
+
+def bucket(exam_type, score):
+    return math.floor(score / BUCKET_WIDTHS[exam_type])
+
+
+def slope(values):
+    """Least-squares change per attempt across ``values``."""
+    count = len(values)
+    if count < 2:
+        return 0.0
+    mean_x, mean_y = (count - 1) / 2, sum(values) / count
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    variance = sum((x - mean_x) ** 2 for x in range(count))
+    return covariance / variance
+
+
+def add_score(performance, score):
+    performance.score = score
+    performance.attempts += 1
+    performance.total += score
+    performance.recent_scores = (performance.recent_scores + [score])[-ROLLING_WINDOW:]
+    performance.rolling_average = sum(performance.recent_scores) / len(performance.recent_scores)
+    performance.trend = slope(performance.recent_scores)
+
+
+def section_accuracy(exam_type, **filters):
+    """Graded answers per user and section as ``{(user id, section): (answered, correct)}``."""
+    fields = SECTION_FIELDS[exam_type]
+    sections = {name: field.removesuffix('_score') for name, field in fields.items()}
+    question_section = Question.objects.filter(
+        exam_type=exam_type, question_id=OuterRef('question_id')
+    ).values('section_name')[:1]
+    rows = (
+        UserAnswer.objects.filter(exam_type=EXAM_TYPE_CODES[exam_type], is_correct__isnull=False, **filters)
+        .annotate(section=Subquery(question_section))
+        .values('exam_session__user_id', 'section')
+        .annotate(answered=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+        .order_by()
+    )
+    accuracy = {}
+    for row in rows:
+        section = sections.get(row['section'])
+        if section is None:
+            continue
+        key = (row['exam_session__user_id'], section)
+        answered, correct = accuracy.get(key, (0, 0))
+        accuracy[key] = (answered + row['answered'], correct + row['correct'])
+    return accuracy
+
+
+def _move_bucket(exam_type, section, previous, current):
+    for value, delta in ((previous, -1), (current, 1)):
+        if value is None:
+            continue
+        buckets = PerformanceBucket.objects.filter(exam_type=exam_type, section=section, bucket=value)
+        if not buckets.update(users=F('users') + delta):
+            # First user in this bucket: another worker may be inserting it too, so insert an empty
+            # row unless it exists and apply the delta to whichever row won
+            PerformanceBucket.objects.bulk_create(
+                [PerformanceBucket(exam_type=exam_type, section=section, bucket=value)], ignore_conflicts=True
+            )
+            buckets.update(users=F('users') + delta)
+
+
+def record_submission(submission, session=None):
+    """Fold a new submission's section scores, and the graded answers of its session, into PerformanceData."""
+    exam_type, fields = SUBMISSION_SECTIONS[type(submission)]
+    accuracy = section_accuracy(exam_type, exam_session=session) if session else {}
+
+    with transaction.atomic():
+        for section, field in fields.items():
+            performance, created = PerformanceData.objects.select_for_update().get_or_create(
+                user_id=submission.user_id, exam_type=exam_type, section=section, defaults={'score': 0}
+            )
+            previous = None if created else bucket(exam_type, performance.average)
+            add_score(performance, getattr(submission, field))
+            answered, correct = accuracy.get((submission.user_id, section), (0, 0))
+            performance.answered += answered
+            performance.correct += correct
+            performance.save()
+
+            current = bucket(exam_type, performance.average)
+            if current != previous:
+                _move_bucket(exam_type, section, previous, current)
+
+
+def percentile(buckets, value):
+    """Share of users below ``value``'s bucket plus half of those in it, from ``{bucket: users}``."""
+    total = sum(buckets.values())
+    if not total:
+        return None
+    below = sum(users for other, users in buckets.items() if other < value)
+    return round(100 * (below + buckets.get(value, 0) / 2) / total, 1)
+
+
+def performance(user):
+    """A user's per-section analytics, read from the precomputed aggregates in two queries."""
+    rows = list(PerformanceData.objects.filter(user=user).order_by('exam_type', 'section'))
+    buckets = PerformanceBucket.objects.filter(exam_type__in={row.exam_type for row in rows})
+    distributions = {}
+    for entry in buckets.values('exam_type', 'section', 'bucket', 'users'):
+        distributions.setdefault((entry['exam_type'], entry['section']), {})[entry['bucket']] = entry['users']
+
+    return [
+        {
+            "exam_type": row.exam_type,
+            "section": row.section,
+            "score": row.score,
+            "attempts": row.attempts,
+            "average": round(row.average, 2),
+            "rolling_average": round(row.rolling_average, 2),
+            "trend": round(row.trend, 2),
+            "accuracy": None if row.accuracy is None else round(row.accuracy, 3),
+            "percentile": percentile(
+                distributions.get((row.exam_type, row.section), {}), bucket(row.exam_type, row.average)
+            ),
+        }
+        for row in rows
+    ]
+
+
+def rebuild():
+    """Recompute every PerformanceData row and the percentile buckets from submissions and answers."""
+    performances = {}
+    for submission_model, (exam_type, fields) in SUBMISSION_SECTIONS.items():
+        submissions = submission_model.objects.order_by('submitted_at', 'id').values('user_id', *fields.values())
+        for submission in submissions.iterator():
+            for section, field in fields.items():
+                key = (submission['user_id'], exam_type, section)
+                if key not in performances:
+                    performances[key] = PerformanceData(
+                        user_id=submission['user_id'], exam_type=exam_type, section=section, score=0
+                    )
+                add_score(performances[key], submission[field])
+
+        for (user_id, section), (answered, correct) in section_accuracy(exam_type).items():
+            performance = performances.get((user_id, exam_type, section))
+            if performance is not None:
+                performance.answered, performance.correct = answered, correct
+
+    buckets = Counter(
+        (performance.exam_type, performance.section, bucket(performance.exam_type, performance.average))
+        for performance in performances.values()
+    )
+    with transaction.atomic():
+        PerformanceData.objects.all().delete()
+        PerformanceBucket.objects.all().delete()
+        PerformanceData.objects.bulk_create(performances.values(), batch_size=1000)
+        PerformanceBucket.objects.bulk_create(
+            [
+                PerformanceBucket(exam_type=exam_type, section=section, bucket=value, users=users)
+                for (exam_type, section, value), users in buckets.items()
+            ],
+            batch_size=1000,
+        )
+    return len(performances)
@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from student_dashboard.read_model import rebuild
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Recompute dashboard summaries from exams and submissions, e.g. after a backfill or import"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help="Only rebuild these user ids")
+
+    def handle(self, *args, user_ids, **options):
+        users = User.objects.all()
+        if user_ids:
+            users = users.filter(id__in=user_ids)
+
+        rebuilt = 0
+        for user_id in users.order_by('id').values_list('id', flat=True).iterator():
+            rebuild(user_id)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} dashboards"))
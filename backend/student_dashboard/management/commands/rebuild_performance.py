@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from student_dashboard.analytics import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute per-section performance analytics and percentile buckets from every submission"
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuild()} section performances"))
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_dashboard', '0001_initial'),
+        ('users', '0005_exam'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('completed_exams', models.PositiveIntegerField(default=0)),
+                ('scored_exams', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('recent_tests', models.JSONField(default=list)),
+                ('upcoming_tests', models.JSONField(default=list)),
+                ('sections', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
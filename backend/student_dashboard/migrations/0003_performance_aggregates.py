@@ -0,0 +1,78 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_dashboard', '0002_dashboardsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerformanceBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam_type', models.CharField(max_length=50)),
+                ('section', models.CharField(max_length=255)),
+                ('bucket', models.IntegerField()),
+                ('users', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='performancedata',
+            name='answered',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='performancedata',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='performancedata',
+            name='correct',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='performancedata',
+            name='recent_scores',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='performancedata',
+            name='rolling_average',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='performancedata',
+            name='total',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='performancedata',
+            name='trend',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='performancedata',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='performancedata',
+            name='score',
+            field=models.FloatField(),
+        ),
+        migrations.AddConstraint(
+            model_name='performancedata',
+            constraint=models.UniqueConstraint(fields=('user', 'exam_type', 'section'), name='unique_performance_per_section'),
+        ),
+        migrations.AddConstraint(
+            model_name='performancebucket',
+            constraint=models.UniqueConstraint(fields=('exam_type', 'section', 'bucket'), name='unique_performance_bucket'),
+        ),
+    ]
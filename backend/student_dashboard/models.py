@@ -21,8 +21,84 @@ class UpcomingExam(models.Model):
     duration = models.DurationField()
 
 class PerformanceData(models.Model):
+    """Running performance of one user in one exam section, maintained by student_dashboard.analytics."""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     exam_type = models.CharField(max_length=50)
     section = models.CharField(max_length=255)
-    score = models.IntegerField()
-    date = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    score = models.FloatField()  # latest section score
+    date = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    total = models.FloatField(default=0)
+    recent_scores = models.JSONField(default=list)
+    rolling_average = models.FloatField(default=0)
+    trend = models.FloatField(default=0)  # score change per attempt over the recent scores
+    answered = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'exam_type', 'section'], name='unique_performance_per_section'),
+        ]
+
+    @property
+    def average(self):
+        return self.total / self.attempts if self.attempts else 0
+
+    @property
+    def accuracy(self):
+        return self.correct / self.answered if self.answered else None
+
+class PerformanceBucket(models.Model):
+    """How many users have a section average within one score bucket; percentiles are read from these."""
+    exam_type = models.CharField(max_length=50)
+    section = models.CharField(max_length=255)
+    bucket = models.IntegerField()
+    users = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['exam_type', 'section', 'bucket'], name='unique_performance_bucket'),
+        ]
+
+class DashboardSummary(models.Model):
+    """One user's dashboard, denormalized so a page load is a single primary-key read.
+
+    Kept current by student_dashboard.read_model as exams change and submissions are created;
+    the rebuild_dashboards command recomputes it from the source tables.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='dashboard')
+    completed_exams = models.PositiveIntegerField(default=0)
+    scored_exams = models.PositiveIntegerField(default=0)
+    score_sum = models.BigIntegerField(default=0)
+    recent_tests = models.JSONField(default=list)
+    upcoming_tests = models.JSONField(default=list)
+    # {exam type: {section: {"count": submissions, "total": score sum}}}
+    sections = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def average_score(self):
+        return self.score_sum / self.scored_exams if self.scored_exams else 0
+
+    def section_performance(self):
+        return [
+            {
+                "exam_type": exam_type,
+                "section": section,
+                "score": round(stats['total'] / stats['count'], 2),
+                "attempts": stats['count'],
+            }
+            for exam_type, sections in sorted(self.sections.items())
+            for section, stats in sorted(sections.items())
+        ]
+
+    def performance_data(self):
+        return [
+            {"section": "Total Exams", "score": self.completed_exams},
+            {"section": "Average Score", "score": round(self.average_score, 2)},
+            *(
+                {"section": f"{row['exam_type'].upper()} {row['section'].title()}", "score": row['score']}
+                for row in self.section_performance()
+            ),
+        ]
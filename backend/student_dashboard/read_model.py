@@ -0,0 +1,111 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+
+from exam.models import SATExamSubmission, GREExamSubmission, GMATExamSubmission, IELTSExamSubmission
+from users.models import Exam
+from users.serializers import ExamSerializer
+from .models import DashboardSummary
+
+RECENT_LIMIT = 5
+
+# Submission model -> (exam type, {section: score field})
+SUBMISSION_SECTIONS = {
+    SATExamSubmission: ('sat', {'verbal': 'verbal_score', 'math': 'math_score'}),
+    GREExamSubmission: ('gre', {'verbal': 'verbal_score', 'math': 'math_score'}),
+    GMATExamSubmission: ('gmat', {'verbal': 'verbal_score', 'quant': 'quant_score', 'dl': 'dl_score'}),
+    IELTSExamSubmission: ('ielts', {
+        'listening': 'listening_score',
+        'reading': 'reading_score',
+        'writing': 'writing_score',
+        'speaking': 'speaking_score',
+    }),
+}
+
+
+def get_summary(user):
+    """The user's dashboard row, built on first access."""
+    summary = DashboardSummary.objects.filter(user_id=user.id).first()
+    if summary is not None:
+        return summary
+    try:
+        with transaction.atomic():
+            return rebuild(user.id)
+    except IntegrityError:
+        # Another request built it between the lookup and the insert
+        return DashboardSummary.objects.get(user_id=user.id)
+
+
+def _locked_summary(user_id):
+    return DashboardSummary.objects.select_for_update().filter(user_id=user_id).first()
+
+
+def _refresh_tests(summary):
+    exams = Exam.objects.filter(user_id=summary.user_id)
+    summary.recent_tests = ExamSerializer(exams.order_by('-id')[:RECENT_LIMIT], many=True).data
+    summary.upcoming_tests = ExamSerializer(exams.filter(status='Not Started').order_by('id')[:RECENT_LIMIT], many=True).data
+
+
+def _refresh_exam_totals(summary):
+    totals = Exam.objects.filter(user_id=summary.user_id, status='Completed').aggregate(
+        completed=Count('id'),
+        scored=Count('id', filter=Q(score__isnull=False)),
+        score_sum=Sum('score'),
+    )
+    summary.completed_exams = totals['completed']
+    summary.scored_exams = totals['scored']
+    summary.score_sum = totals['score_sum'] or 0
+
+
+def exam_changed(exam):
+    """Refresh the exam part of a saved or deleted ``users.Exam``'s owner's dashboard.
+
+    Called from the users.Exam signal handlers, so writes from the admin or the shell count too.
+    The totals are recounted from the user's exams rather than adjusted, which needs no previous
+    values and cannot drift. A dashboard not built yet is left to be built on first access.
+    """
+    with transaction.atomic():
+        summary = _locked_summary(exam.user_id)
+        if summary is None:
+            return
+        _refresh_exam_totals(summary)
+        _refresh_tests(summary)
+        summary.save()
+
+
+def _add_submission(sections, submission):
+    exam_type, fields = SUBMISSION_SECTIONS[type(submission)]
+    exam_sections = sections.setdefault(exam_type, {})
+    for section, field in fields.items():
+        stats = exam_sections.setdefault(section, {'count': 0, 'total': 0})
+        stats['count'] += 1
+        stats['total'] += getattr(submission, field)
+
+
+def submission_created(submission):
+    """Fold a new exam submission's section scores into its user's dashboard.
+
+    A dashboard not built yet is left to be built, submission included, on first access.
+    """
+    with transaction.atomic():
+        summary = _locked_summary(submission.user_id)
+        if summary is None:
+            return
+        _add_submission(summary.sections, submission)
+        summary.save(update_fields=['sections', 'updated_at'])
+
+
+def rebuild(user_id):
+    """Recompute one user's dashboard from ``users.Exam`` and the exam submissions."""
+    summary = DashboardSummary(user_id=user_id)
+    _refresh_exam_totals(summary)
+    _refresh_tests(summary)
+    for submission_model, (exam_type, fields) in SUBMISSION_SECTIONS.items():
+        totals = submission_model.objects.filter(user_id=user_id).aggregate(
+            count=Count('id'), **{section: Sum(field) for section, field in fields.items()}
+        )
+        if totals['count']:
+            summary.sections[exam_type] = {
+                section: {'count': totals['count'], 'total': totals[section]} for section in fields
+            }
+    summary.save()
+    return summary
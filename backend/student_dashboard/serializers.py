@@ -13,6 +13,7 @@ class UserSerializer(serializers.ModelSerializer):
 
 class StudentDashboardSerializer(serializers.Serializer):
     user = UserSerializer()
-    recent_tests = ExamSerializer(many=True)
-    upcoming_tests = ExamSerializer(many=True)
+    # Already serialized with ExamSerializer when the dashboard summary was written
+    recent_tests = serializers.ListField(child=serializers.DictField())
+    upcoming_tests = serializers.ListField(child=serializers.DictField())
     performance_data = serializers.ListField(child=serializers.DictField())
\ No newline at end of file
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Exam
+from . import read_model
+
+
+@receiver([post_save, post_delete], sender=Exam)
+def exam_changed(sender, instance, raw=False, **kwargs):
+    # Fixtures are loaded as they are; rebuild_dashboards catches up afterwards
+    if not raw:
+        read_model.exam_changed(instance)
@@ -1,3 +1,165 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Sum
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from exam.models import SATExam, SATExamSubmission
+from exam_display.models import ExamSession
+from exam_display.tests import build_sat_display, make_answers
+from users.models import Exam
+from . import analytics, read_model
+from .models import DashboardSummary, PerformanceBucket, PerformanceData
+
+User = get_user_model()
+
+
+class DashboardReadModelTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='candidate', email='candidate@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.exams = [
+            Exam.objects.create(user=self.user, name='Practice 1', status='Completed', score=80, time_taken=timedelta(minutes=50)),
+            Exam.objects.create(user=self.user, name='Practice 2', status='Completed', score=60),
+            Exam.objects.create(user=self.user, name='Practice 3'),
+        ]
+
+    def summary_fields(self, summary):
+        return (summary.completed_exams, summary.scored_exams, summary.score_sum, summary.recent_tests, summary.upcoming_tests, summary.sections)
+
+    def test_dashboard_is_one_read_once_built(self):
+        self.client.get('/api/student/dashboard/')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/student/dashboard/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([test['name'] for test in response.data['recent_tests']], ['Practice 3', 'Practice 2', 'Practice 1'])
+        self.assertEqual([test['name'] for test in response.data['upcoming_tests']], ['Practice 3'])
+        self.assertEqual(response.data['performance_data'][:2], [
+            {"section": "Total Exams", "score": 2},
+            {"section": "Average Score", "score": 70.0},
+        ])
+
+    def test_incremental_updates_match_a_rebuild(self):
+        read_model.get_summary(self.user)
+
+        self.client.post(f'/api/users/student/start-exam/{self.exams[2].id}/')
+        exam = self.exams[2]
+        exam.refresh_from_db()
+        exam.status, exam.score = 'Completed', 95
+        exam.save()
+        Exam.objects.create(user=self.user, name='Practice 4')
+
+        incremental = self.summary_fields(DashboardSummary.objects.get(user=self.user))
+        self.assertEqual(incremental[:3], (3, 3, 235))
+        self.assertEqual(incremental, self.summary_fields(read_model.rebuild(self.user.id)))
+
+    def test_deleted_exams_leave_the_dashboard(self):
+        read_model.get_summary(self.user)
+
+        self.exams[0].delete()
+
+        summary = DashboardSummary.objects.get(user=self.user)
+        self.assertEqual((summary.completed_exams, summary.score_sum), (1, 60))
+        self.assertEqual([test['name'] for test in summary.recent_tests], ['Practice 3', 'Practice 2'])
+
+        self.user.delete()
+        self.assertFalse(DashboardSummary.objects.exists())
+
+    def test_submissions_feed_section_performance(self):
+        read_model.get_summary(self.user)
+        exam = SATExam.objects.create(name='SAT')
+
+        for verbal, math in [(600, 700), (700, 800)]:
+            self.client.post(f'/api/sat-exams/{exam.id}/submit_exam/', {'scores': {'verbal_score': verbal, 'math_score': math}}, format='json')
+
+        expected = [
+            {"exam_type": "sat", "section": "math", "score": 750.0, "attempts": 2},
+            {"exam_type": "sat", "section": "verbal", "score": 650.0, "attempts": 2},
+        ]
+        self.assertEqual(SATExamSubmission.objects.count(), 2)
+        self.assertEqual(DashboardSummary.objects.get(user=self.user).section_performance(), expected)
+        self.assertEqual(read_model.rebuild(self.user.id).section_performance(), expected)
+
+    def test_submission_before_the_first_dashboard_load_is_counted_on_access(self):
+        exam = SATExam.objects.create(name='SAT')
+
+        self.client.post(f'/api/sat-exams/{exam.id}/submit_exam/', {'scores': {'verbal_score': 600, 'math_score': 700}}, format='json')
+
+        self.assertFalse(DashboardSummary.objects.exists())
+        self.assertEqual(read_model.get_summary(self.user).sections, {'sat': {
+            'verbal': {'count': 1, 'total': 600}, 'math': {'count': 1, 'total': 700},
+        }})
+
+    def test_rebuild_command_backfills_every_user(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass12345')
+
+        out = StringIO()
+        call_command('rebuild_dashboards', stdout=out)
+
+        self.assertIn('Rebuilt 2 dashboards', out.getvalue())
+        self.assertEqual(DashboardSummary.objects.get(user=self.user).completed_exams, 2)
+        self.assertEqual(DashboardSummary.objects.get(user=other).recent_tests, [])
+
+
+class PerformanceAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='candidate', email='candidate@example.com', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.exam = SATExam.objects.create(name='SAT')
+
+    def submit(self, verbal, math, user=None):
+        self.client.force_authenticate(user or self.user)
+        self.client.post(f'/api/sat-exams/{self.exam.id}/submit_exam/', {'scores': {'verbal_score': verbal, 'math_score': math}}, format='json')
+
+    def test_rolling_average_trend_and_percentile(self):
+        others = [
+            User.objects.create_user(username=f'other{number}', email=f'other{number}@example.com', password='pass12345')
+            for number in range(3)
+        ]
+        for other, math in zip(others, [500, 600, 780]):
+            self.submit(500, math, user=other)
+        for math in [500, 550, 600, 650, 700, 750]:
+            self.submit(600, math)
+
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(2):
+            rows = analytics.performance(self.user)
+
+        math = next(row for row in rows if row['section'] == 'math')
+        self.assertEqual((math['score'], math['attempts'], math['average']), (750, 6, 625))
+        self.assertEqual(math['rolling_average'], 650)
+        self.assertEqual(math['trend'], 50)
+        self.assertEqual(math['percentile'], 62.5)
+        self.assertEqual(self.client.get('/api/users/student/performance/').data, rows)
+        self.assertEqual(PerformanceBucket.objects.filter(section='math').aggregate(total=Sum('users'))['total'], 4)
+
+    def test_graded_sessions_record_answer_accuracy(self):
+        display = build_sat_display()
+        session = ExamSession.objects.create(user=self.user, exam_display=display)
+        questions = display.get_questions().order_by('id')
+        make_answers(session, questions.filter(module__section__name='verbal'), 'A')
+        make_answers(session, questions.filter(module__section__name='math'), 'B')
+
+        self.client.post(f'/api/exam-displays/{display.id}/end_session/')
+
+        accuracy = {row['section']: row['accuracy'] for row in analytics.performance(self.user)}
+        self.assertEqual(accuracy, {'math': 0.0, 'verbal': 1.0})
+
+    def test_rebuild_matches_incremental_aggregates(self):
+        for verbal, math in [(600, 700), (650, 650), (700, 720)]:
+            self.submit(verbal, math)
+        incremental = analytics.performance(self.user)
+
+        out = StringIO()
+        call_command('rebuild_performance', stdout=out)
 
-# Create your tests here.
+        self.assertIn('Rebuilt 2 section performances', out.getvalue())
+        self.assertEqual(analytics.performance(self.user), incremental)
+        self.assertEqual(PerformanceData.objects.count(), 2)
@@ -1,5 +1,4 @@
 from django.utils import timezone
-from django.db.models import Avg
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -8,35 +7,21 @@ from rest_framework import status
 from users.models import Exam, CustomUser
 from .serializers import StudentDashboardSerializer
 from .models import StudentExam
+from . import read_model
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def student_dashboard(request):
     try:
         user = request.user
-        
-        # Get recent tests
-        recent_tests = Exam.objects.filter(user=user).order_by('-id')[:5]
-        
-        # Get upcoming tests (assuming 'Not Started' status means upcoming)
-        upcoming_tests = Exam.objects.filter(user=user, status='Not Started').order_by('id')[:5]
-        
-        # Get performance data
-        completed_exams = Exam.objects.filter(user=user, status='Completed')
-        total_exams = completed_exams.count()
-        average_score = completed_exams.aggregate(Avg('score'))['score__avg'] if total_exams > 0 else 0
-        
-        performance_data = [
-            {"section": "Total Exams", "score": total_exams},
-            {"section": "Average Score", "score": round(average_score, 2) if average_score else 0},
-        ]
+        summary = read_model.get_summary(user)
 
         # Prepare data for serialization
         dashboard_data = {
             "user": user,
-            "recent_tests": recent_tests,
-            "upcoming_tests": upcoming_tests,
-            "performance_data": performance_data,
+            "recent_tests": summary.recent_tests,
+            "upcoming_tests": summary.upcoming_tests,
+            "performance_data": summary.performance_data(),
         }
 
         # Serialize the data
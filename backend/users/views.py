@@ -10,6 +10,7 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.permissions import IsAuthenticated 
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from .models import Exam
+from student_dashboard import analytics, read_model
 
 User = get_user_model()
 
@@ -85,14 +86,7 @@ def start_exam(request, exam_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def student_performance(request):
-    # This is a placeholder implementation. You should replace this with actual data from your database.
-    performance_data = [
-        {"section": "Reading", "score": 80},
-        {"section": "Writing", "score": 75},
-        {"section": "Math", "score": 85},
-        {"section": "Science", "score": 78},
-    ]
-    return Response(performance_data)
+    return Response(analytics.performance(request.user))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -147,19 +141,11 @@ def admin_login_view(request):
 @permission_classes([IsAuthenticated])
 def student_dashboard(request):
     try:
-        recent_tests = Exam.objects.filter(user=request.user).order_by('-id')[:5]
-        upcoming_tests = Exam.objects.filter(user=request.user, status='Not Started').order_by('id')[:5]
-        performance_data = [
-            {"section": "Reading", "score": 80},
-            {"section": "Writing", "score": 75},
-            {"section": "Math", "score": 85},
-            {"section": "Science", "score": 78},
-        ]
-
+        summary = read_model.get_summary(request.user)
         data = {
-            "recentTests": ExamSerializer(recent_tests, many=True).data,
-            "upcomingTests": ExamSerializer(upcoming_tests, many=True).data,
-            "performanceData": performance_data,
+            "recentTests": summary.recent_tests,
+            "upcomingTests": summary.upcoming_tests,
+            "performanceData": summary.performance_data(),
         }
         return Response(data)
     except Exception as e:
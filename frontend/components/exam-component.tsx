@@ -19,6 +19,7 @@ interface Question {
   text: string
   options: string[]
   question_type: string
+  passage?: string | null
 }
 
 interface ExamData {
@@ -59,15 +60,18 @@ export default function ExamComponent() {
           Authorization: `Bearer ${localStorage.getItem('access_token')}`,
         },
       })
+      // Passages are sent once and referenced from each question by digest
+      const { passages, questions } = response.data
+      const examQuestions = questions.map((q: Question) => ({ ...q, passage: q.passage ? passages[q.passage] : '' }))
       setExamData({
         id: parseInt(examDisplayId),
-        name: `${response.data[0]?.exam_type || 'Unknown'} Exam`,
-        exam_type: response.data[0]?.exam_type || 'Unknown',
-        questions: response.data
+        name: `${examQuestions[0]?.exam_type || 'Unknown'} Exam`,
+        exam_type: examQuestions[0]?.exam_type || 'Unknown',
+        questions: examQuestions
       })
-      setAnswers(new Array(response.data.length).fill(''))
-      setMarkedQuestions(new Array(response.data.length).fill(false))
-      setCrossedOptions(response.data.map((q: Question) => new Array(q.options?.length || 0).fill(false)))
+      setAnswers(new Array(examQuestions.length).fill(''))
+      setMarkedQuestions(new Array(examQuestions.length).fill(false))
+      setCrossedOptions(examQuestions.map((q: Question) => new Array(q.options?.length || 0).fill(false)))
       
       // Start the exam session
       const sessionResponse = await axios.post(`${API_BASE_URL}/exam-displays/${examDisplayId}/start_session/`, {}, {
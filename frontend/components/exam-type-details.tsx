@@ -12,6 +12,7 @@ import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger, Dialog
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select"
 import { Edit, Plus, Search, Loader2, Trash2, Save, X } from 'lucide-react'
 import axios from 'axios'
+import { fetchAllPages } from '@/lib/pagination'
 
 axios.defaults.baseURL = 'http://127.0.0.1:8000/api'
 
@@ -73,12 +74,7 @@ export default function ExamTypeDetails({ examType, icon }: ExamTypeDetailsProps
     setLoading(true)
     setError(null)
     try {
-      const response = await axios.get(`/${examType.toLowerCase()}-exams/`)
-      if (response.status === 200) {
-        setExams(response.data)
-      } else {
-        setError('Failed to fetch exams')
-      }
+      setExams(await fetchAllPages<Exam>(`/${examType.toLowerCase()}-exams/`, { depth: 0, limit: 500 }))
     } catch (error) {
       setError('Error fetching exams')
       console.error('Error fetching exams:', error)
@@ -3,6 +3,7 @@
 import { useState, useEffect } from 'react'
 import { useRouter } from 'next/navigation'
 import axios from 'axios'
+import { fetchAllPages } from '@/lib/pagination'
 import { Button } from "@/components/ui/button"
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card"
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, ResponsiveContainer } from 'recharts'
@@ -65,14 +66,7 @@ export default function StudentDashboard() {
       setDashboardData(dashboardResponse.data)
 
       const testType = dashboardResponse.data.user.test_type.toLowerCase()
-      const examsResponse = await axios.get(`${API_BASE_URL}/${testType}-exams/`)
-      
-      if (Array.isArray(examsResponse.data)) {
-        setAvailableExams(examsResponse.data)
-      } else {
-        console.error('Invalid exams data received:', examsResponse.data)
-        setAvailableExams([])
-      }
+      setAvailableExams(await fetchAllPages<Exam>(`${API_BASE_URL}/${testType}-exams/`, { depth: 0, limit: 500 }))
 
       setIsLoading(false)
     } catch (error) {
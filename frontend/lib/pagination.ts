@@ -0,0 +1,12 @@
+import axios from 'axios'
+
+// Follows the `next` links of a cursor-paginated list endpoint and returns every result
+export async function fetchAllPages<T>(url: string, params?: Record<string, unknown>): Promise<T[]> {
+  let response = await axios.get(url, { params })
+  const results: T[] = [...response.data.results]
+  while (response.data.next) {
+    response = await axios.get(response.data.next)
+    results.push(...response.data.results)
+  }
+  return results
+}